@@ -0,0 +1 @@
+"""Benchmarks for the Overcoach AI RAG pipeline."""
@@ -0,0 +1,179 @@
+"""
+Benchmark the team composition context modes.
+
+Compares "synthesize" (one LLM summary per collection, then the final
+completion) against "retrieve" (raw top-k nodes fed straight into the final
+prompt) on end-to-end latency, LLM calls per request and answer quality.
+
+Usage:
+    python -m benchmarks.context_mode --runs 3
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMChatStartEvent,
+    LLMCompletionEndEvent,
+    LLMCompletionStartEvent,
+)
+
+from src.api.parsing import is_parsed, parse_team_composition
+from src.rag.retriever import CONTEXT_MODES, RAGRetriever
+from src.utils.config import config
+
+
+LINEUPS: List[Dict[str, Any]] = [
+    {
+        "map": "King's Row",
+        "enemy_team": ["Reinhardt", "Bastion", "Mercy"],
+        "current_team": [],
+        "difficulties": "Enemy has strong bunker defense",
+    },
+    {
+        "map": "Dorado",
+        "enemy_team": ["Winston", "Tracer", "Genji"],
+        "current_team": [],
+        "difficulties": "Fast dive composition",
+    },
+    {
+        "map": "Hanamura",
+        "enemy_team": ["Bastion", "Torbjorn", "Symmetra"],
+        "current_team": [],
+        "difficulties": "Heavy defense",
+    },
+    {
+        "map": "Numbani",
+        "enemy_team": ["Roadhog", "Junkrat", "Moira"],
+        "current_team": ["Ana"],
+        "difficulties": "Hook combos",
+    },
+]
+
+EXPECTED_ROLES = {"tank": 1, "damage": 2, "support": 2}
+
+
+class LLMCallCounter(BaseEventHandler):
+    """Count top-level LLM generations (chat-backed completions count once)."""
+    
+    calls: int = 0
+    depth: int = 0
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMCallCounter"
+    
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            if self.depth == 0:
+                self.calls += 1
+            self.depth += 1
+        elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+            self.depth = max(0, self.depth - 1)
+
+
+def known_hero_names() -> set:
+    """Lower-cased hero display names from the generated markdown."""
+    names = set()
+    for md_file in Path(config.DATA_HEROES_PATH).glob("*.md"):
+        first_line = md_file.read_text(encoding="utf-8").split("\n", 1)[0]
+        names.add(first_line.lstrip("# ").strip().lower())
+    return names
+
+
+def score_answer(raw_response: str, hero_names: set, output_format: str = "text") -> Dict[str, float]:
+    """Score one answer on structure and grounding."""
+    parsed = parse_team_composition(raw_response, output_format)
+    team = parsed.recommended_team if is_parsed(parsed) else []
+    
+    roles: Dict[str, int] = {}
+    for hero in team:
+        roles[hero.role] = roles.get(hero.role, 0) + 1
+    
+    grounded = [h for h in team if h.name.lower() in hero_names]
+    return {
+        "parsed": float(bool(team)),
+        "roles_ok": float(roles == EXPECTED_ROLES),
+        "grounded": len(grounded) / len(team) if team else 0.0,
+        "has_strategy": float(not parsed.strategy.startswith("Check raw_response")),
+    }
+
+
+def run_mode(
+    retriever: RAGRetriever,
+    mode: str,
+    runs: int,
+    counter: LLMCallCounter,
+    hero_names: set
+) -> Dict[str, float]:
+    """Run every lineup `runs` times in one context mode."""
+    latencies = []
+    calls = []
+    scores: Dict[str, List[float]] = {}
+    
+    for _ in range(runs):
+        for lineup in LINEUPS:
+            counter.calls = 0
+            start = time.perf_counter()
+            raw_response = retriever.query_team_composition(lineup, context_mode=mode)
+            latencies.append(time.perf_counter() - start)
+            calls.append(counter.calls)
+            
+            for name, value in score_answer(raw_response, hero_names, config.TEAM_OUTPUT_FORMAT).items():
+                scores.setdefault(name, []).append(value)
+    
+    latencies.sort()
+    result = {
+        "mean_s": statistics.mean(latencies),
+        "p50_s": latencies[len(latencies) // 2],
+        "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "llm_calls": statistics.mean(calls),
+    }
+    result.update({name: statistics.mean(values) for name, values in scores.items()})
+    return result
+
+
+def main():
+    """Main entry point for the context mode benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=2, help="Passes over the lineup set per mode")
+    parser.add_argument("--modes", nargs="+", default=list(CONTEXT_MODES), choices=CONTEXT_MODES)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Context Mode Benchmark")
+    print("=" * 60)
+    
+    retriever = RAGRetriever()
+    counter = LLMCallCounter()
+    get_dispatcher().add_event_handler(counter)
+    hero_names = known_hero_names()
+    
+    # Warm up embedding model and LLM so the first mode isn't penalized
+    retriever.query_team_composition(LINEUPS[0], context_mode="retrieve")
+    
+    results = {}
+    for mode in args.modes:
+        print(f"\nRunning {mode} mode ({args.runs} x {len(LINEUPS)} requests)...")
+        results[mode] = run_mode(retriever, mode, args.runs, counter, hero_names)
+    
+    columns = ["mean_s", "p50_s", "p95_s", "llm_calls", "parsed", "roles_ok", "grounded", "has_strategy"]
+    print("\n" + "mode".ljust(12) + "".join(c.rjust(13) for c in columns))
+    for mode, result in results.items():
+        print(mode.ljust(12) + "".join(f"{result[c]:13.2f}" for c in columns))
+    
+    if "synthesize" in results and "retrieve" in results:
+        saved = 1 - results["retrieve"]["mean_s"] / results["synthesize"]["mean_s"]
+        print(f"\nRetrieve mode latency reduction: {saved:.0%}")
+    
+    retriever.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Compare the embedding backends on speed, memory and retrieval agreement.
+
+Each backend runs in its own spawned process, so load time and memory
+(RSS/PSS growth from creating the model, including its imports) are
+measured in isolation. Per-query latency embeds the hybrid_recall queries
+one at a time; throughput embeds every indexed node of both collections in
+batches, the way the indexer does. Agreement is computed against the first
+backend: for each query, the share of its top-k nodes (each backend ranking
+the corpus with its own vectors) that the reference also returns.
+
+Usage:
+    python -m benchmarks.embedding_backend --backends torch onnx ollama --top-k 5
+"""
+import argparse
+import multiprocessing
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.utils.config import config
+from src.utils.memory import process_memory
+
+
+MB = 1024 * 1024
+
+
+def load_corpus() -> List[str]:
+    """Text of every node the indexer would embed, both collections."""
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.ingestion import run_transformations
+    from llama_index.core.schema import MetadataMode
+    from src.rag.indexer import collection_node_parser
+    
+    texts = []
+    for name, path in (("heroes", config.DATA_HEROES_PATH), ("maps", config.DATA_MAPS_PATH)):
+        documents = SimpleDirectoryReader(input_dir=path, required_exts=[".md"]).load_data()
+        nodes = run_transformations(documents, [collection_node_parser(name)])
+        texts.extend(node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes)
+    return texts
+
+
+def measure(
+    backend: str,
+    texts: List[str],
+    queries: List[str],
+    batch_size: int,
+    results: Any
+):
+    """Load one backend, time queries and batches, report memory growth."""
+    from src.rag.embeddings import create_embed_model
+    
+    before = process_memory()
+    start = time.perf_counter()
+    try:
+        model = create_embed_model(backend)
+        # First call pays for lazy session/model loading
+        model.get_query_embedding("warm up")
+    except Exception as e:
+        results.put({"backend": backend, "error": str(e)})
+        return
+    load_s = time.perf_counter() - start
+    model.embed_batch_size = batch_size
+    
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.get_query_embedding(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    text_vectors = model.get_text_embedding_batch(texts)
+    batch_s = time.perf_counter() - start
+    after = process_memory()
+    
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_ms": load_s * 1000,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "docs_per_s": len(texts) / batch_s,
+        "rss_mb": (after["rss"] - before["rss"]) / MB,
+        "pss_mb": (after["pss"] - before["pss"]) / MB,
+        "query_vectors": np.asarray(query_vectors, dtype=np.float32),
+        "text_vectors": np.asarray(text_vectors, dtype=np.float32),
+    })
+
+
+def top_k_rows(query_vectors: np.ndarray, text_vectors: np.ndarray, top_k: int) -> List[set]:
+    """Top-k corpus rows by cosine similarity, per query."""
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    scores = normalize(query_vectors) @ normalize(text_vectors).T
+    return [set(np.argsort(-row)[:top_k].tolist()) for row in scores]
+
+
+def main():
+    """Main entry point for the embedding backend benchmark."""
+    from benchmarks.hybrid_recall import build_queries
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"], help="First one is the reference")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=200, help="Maximum number of queries")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Embedding Backend Benchmark")
+    print("=" * 60)
+    
+    texts = load_corpus()
+    queries = [query for pairs in build_queries().values() for query, _ in pairs][:args.queries]
+    print(f"✓ {len(texts)} nodes, {len(queries)} queries")
+    
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    rows: List[Dict[str, Any]] = []
+    for backend in args.backends:
+        process = context.Process(target=measure, args=(backend, texts, queries, args.batch_size, results))
+        process.start()
+        row = results.get()
+        process.join()
+        if "error" in row:
+            print(f"⚠ {backend}: {row['error']}")
+            continue
+        rows.append(row)
+    if not rows:
+        return
+    
+    reference = rows[0]
+    reference_top = top_k_rows(reference["query_vectors"], reference["text_vectors"], args.top_k)
+    for row in rows:
+        top = top_k_rows(row["query_vectors"], row["text_vectors"], args.top_k)
+        row["agreement"] = float(np.mean([len(a & b) / args.top_k for a, b in zip(top, reference_top)]))
+    
+    columns = ["load_ms", "p50_ms", "p95_ms", "docs_per_s", "rss_mb", "pss_mb", "agreement"]
+    print(f"\nAgreement: top-{args.top_k} overlap with {reference['backend']}")
+    print("backend".ljust(10) + "".join(c.rjust(12) for c in columns))
+    for row in rows:
+        print(row["backend"].ljust(10) + "".join(f"{row[c]:12.2f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark per-request query component construction.
+
+Times only the object construction each request pays before any embedding,
+search or LLM work: a fresh query engine (the original per-call path), a
+fresh retriever plus response synthesizer, and the cached components that
+RAGRetriever now shares across requests.
+
+Usage:
+    python -m benchmarks.engine_reuse --iterations 2000
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict
+
+from llama_index.core import get_response_synthesizer
+
+from src.rag.retriever import RAGRetriever
+
+
+def time_construction(build: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Time `iterations` calls of build, in microseconds per call."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        build()
+        samples.append((time.perf_counter() - start) * 1e6)
+    
+    samples.sort()
+    return {
+        "mean_us": statistics.mean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    """Main entry point for the engine reuse benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="Constructions timed per strategy")
+    parser.add_argument("--collection", default="heroes", choices=["heroes", "maps"])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Engine Reuse Benchmark")
+    print("=" * 60)
+    
+    retriever = RAGRetriever()
+    index = retriever._get_index(args.collection)
+    if index is None:
+        print(f"⚠ {args.collection} index not found. Please run indexer first.")
+        return
+    
+    strategies = {
+        "query_engine": lambda: index.as_query_engine(similarity_top_k=args.top_k),
+        "per_call": lambda: (
+            index.as_retriever(similarity_top_k=args.top_k),
+            get_response_synthesizer(),
+        ),
+        "cached": lambda: (
+            retriever._get_retriever(args.collection, args.top_k),
+            retriever._get_synthesizer(),
+        ),
+    }
+    
+    results = {}
+    for name, build in strategies.items():
+        build()
+        results[name] = time_construction(build, args.iterations)
+    
+    columns = ["mean_us", "p50_us", "p99_us"]
+    print("\n" + "strategy".ljust(14) + "".join(c.rjust(12) for c in columns))
+    for name, result in results.items():
+        print(name.ljust(14) + "".join(f"{result[c]:12.1f}" for c in columns))
+    
+    speedup = results["per_call"]["mean_us"] / results["cached"]["mean_us"]
+    print(f"\nCached components: {speedup:.0f}x less construction overhead than per-call")
+    
+    retriever.close()
+
+
+if __name__ == "__main__":
+    main()
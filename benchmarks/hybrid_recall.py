@@ -0,0 +1,120 @@
+"""
+Compare vector-only and hybrid (vector + BM25) retrieval on recall vs prompt size.
+
+Queries are derived from the generated markdown, each with the one
+document that answers it: every ability name ("Deflect", "Biotic Grenade")
+and "counter <hero>" for the heroes collection, "<map> map" for the maps
+collection. For each mode and k, recall@k is the share of queries whose
+document is among the top-k nodes, and prompt tokens the size of those k
+nodes as they would be pasted into the prompt ("retrieve" context mode).
+
+Usage:
+    python -m benchmarks.hybrid_recall --k 1 3 5 10
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from llama_index.core.utils import get_tokenizer
+
+from src.rag.entities import document_title
+from src.rag.retriever import RAGRetriever
+from src.utils.config import config
+
+
+def build_queries() -> Dict[str, List[Tuple[str, str]]]:
+    """(query, expected file name) pairs per collection."""
+    queries: Dict[str, List[Tuple[str, str]]] = {"heroes": [], "maps": []}
+    for path in sorted(Path(config.DATA_HEROES_PATH).glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        abilities = text.split("## Abilities", 1)[1] if "## Abilities" in text else ""
+        for ability in re.findall(r"^### (.+)$", abilities.split("\n## ", 1)[0], flags=re.MULTILINE):
+            queries["heroes"].append((ability.strip(), path.name))
+        queries["heroes"].append((f"counter {document_title(path)}", path.name))
+    
+    for path in sorted(Path(config.DATA_MAPS_PATH).glob("*.md")):
+        queries["maps"].append((f"{document_title(path)} map", path.name))
+    return queries
+
+
+def evaluate(
+    retriever: RAGRetriever,
+    collection: str,
+    queries: List[Tuple[str, str]],
+    top_k: int
+) -> Dict[str, float]:
+    """Recall@k, mean prompt tokens and mean latency for one collection."""
+    tokenizer = get_tokenizer()
+    hits, tokens, latencies = [], [], []
+    for query, expected in queries:
+        start = time.perf_counter()
+        nodes = retriever._retrieve(collection, query, top_k, "benchmark")
+        latencies.append((time.perf_counter() - start) * 1000)
+        
+        hits.append(float(any(node.node.metadata.get("file_name") == expected for node in nodes)))
+        tokens.append(len(tokenizer(retriever._format_nodes(nodes))))
+    return {
+        "recall": statistics.mean(hits),
+        "tokens": statistics.mean(tokens),
+        "latency_ms": statistics.mean(latencies),
+    }
+
+
+def main():
+    """Main entry point for the hybrid retrieval benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="top_k values to evaluate")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Hybrid Retrieval Benchmark")
+    print("=" * 60)
+    
+    config.RAG_RETRIEVAL_MODE = "hybrid"
+    retriever = RAGRetriever()
+    lexical_indexes = dict(retriever.lexical_indexes)
+    if not lexical_indexes:
+        print("⚠ No lexical indexes found. Please re-run the indexer first.")
+        return
+    
+    queries = build_queries()
+    # Warm up the embedding model so the first mode isn't penalized
+    retriever.warm_up_embeddings()
+    
+    results: Dict[Tuple[str, str, int], Dict[str, float]] = {}
+    for mode in ("vector", "hybrid"):
+        retriever.lexical_indexes = lexical_indexes if mode == "hybrid" else {}
+        # Both modes embed every query themselves
+        retriever.embed_cache.clear()
+        for collection, collection_queries in queries.items():
+            for top_k in args.k:
+                results[(mode, collection, top_k)] = evaluate(retriever, collection, collection_queries, top_k)
+    
+    columns = ["recall", "tokens", "latency_ms"]
+    for collection, collection_queries in queries.items():
+        print(f"\n{collection} ({len(collection_queries)} queries)")
+        print("mode".ljust(8) + "k".rjust(4) + "".join(c.rjust(12) for c in columns))
+        for mode in ("vector", "hybrid"):
+            for top_k in args.k:
+                row = results[(mode, collection, top_k)]
+                print(mode.ljust(8) + str(top_k).rjust(4) + "".join(f"{row[c]:12.2f}" for c in columns))
+        
+        # Smallest hybrid k that matches the recall of vector search at the largest k
+        largest = max(args.k)
+        target = results[("vector", collection, largest)]
+        for top_k in sorted(args.k):
+            row = results[("hybrid", collection, top_k)]
+            if row["recall"] >= target["recall"]:
+                saved = 1 - row["tokens"] / target["tokens"] if target["tokens"] else 0.0
+                print(f"Hybrid k={top_k} matches vector k={largest} recall "
+                      f"({row['recall']:.2f} vs {target['recall']:.2f}) with {saved:.0%} fewer prompt tokens")
+                break
+    
+    retriever.close()
+
+
+if __name__ == "__main__":
+    main()
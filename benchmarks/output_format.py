@@ -0,0 +1,128 @@
+"""
+Benchmark the team composition output formats.
+
+Compares the sectioned "text" answer against schema-constrained "json" output
+(Ollama structured outputs / OpenAI JSON mode) on latency, output tokens of
+the final completion and parse success rate.
+
+Usage:
+    python -m benchmarks.output_format --runs 3
+"""
+import argparse
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import LLMCompletionEndEvent
+from llama_index.core.utils import get_tokenizer
+
+from benchmarks.context_mode import LINEUPS, known_hero_names, score_answer
+from src.rag.retriever import OUTPUT_FORMATS, RAGRetriever
+
+
+class CompletionUsage(BaseEventHandler):
+    """Remember the raw provider response of the latest completion."""
+    
+    raw: Optional[Any] = None
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "CompletionUsage"
+    
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        if isinstance(event, LLMCompletionEndEvent):
+            self.raw = event.response.raw
+
+
+def output_tokens(raw: Any, text: str) -> int:
+    """Completion tokens reported by the provider, else a tokenizer estimate."""
+    if isinstance(raw, dict):
+        # Ollama
+        if raw.get("eval_count"):
+            return raw["eval_count"]
+        if raw.get("usage", {}).get("completion_tokens"):
+            return raw["usage"]["completion_tokens"]
+    usage = getattr(raw, "usage", None)
+    if getattr(usage, "completion_tokens", None):
+        # OpenAI-compatible
+        return usage.completion_tokens
+    return len(get_tokenizer()(text))
+
+
+def run_format(
+    retriever: RAGRetriever,
+    output_format: str,
+    runs: int,
+    usage: CompletionUsage,
+    hero_names: set
+) -> Dict[str, float]:
+    """Run every lineup `runs` times in one output format."""
+    latencies = []
+    tokens = []
+    scores: Dict[str, List[float]] = {}
+    
+    for _ in range(runs):
+        for lineup in LINEUPS:
+            usage.raw = None
+            start = time.perf_counter()
+            raw_response = retriever.query_team_composition(
+                lineup, context_mode="retrieve", output_format=output_format
+            )
+            latencies.append(time.perf_counter() - start)
+            tokens.append(output_tokens(usage.raw, raw_response))
+            
+            for name, value in score_answer(raw_response, hero_names, output_format).items():
+                scores.setdefault(name, []).append(value)
+    
+    latencies.sort()
+    result = {
+        "mean_s": statistics.mean(latencies),
+        "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "out_tokens": statistics.mean(tokens),
+    }
+    result.update({name: statistics.mean(values) for name, values in scores.items()})
+    return result
+
+
+def main():
+    """Main entry point for the output format benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=2, help="Passes over the lineup set per format")
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS), choices=OUTPUT_FORMATS)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Output Format Benchmark")
+    print("=" * 60)
+    
+    retriever = RAGRetriever()
+    usage = CompletionUsage()
+    get_dispatcher().add_event_handler(usage)
+    hero_names = known_hero_names()
+    
+    # Warm up embedding model and LLM so the first format isn't penalized
+    retriever.query_team_composition(LINEUPS[0], context_mode="retrieve")
+    
+    results = {}
+    for output_format in args.formats:
+        print(f"\nRunning {output_format} format ({args.runs} x {len(LINEUPS)} requests)...")
+        results[output_format] = run_format(retriever, output_format, args.runs, usage, hero_names)
+    
+    columns = ["mean_s", "p95_s", "out_tokens", "parsed", "roles_ok", "grounded", "has_strategy"]
+    print("\n" + "format".ljust(12) + "".join(c.rjust(13) for c in columns))
+    for output_format, result in results.items():
+        print(output_format.ljust(12) + "".join(f"{result[c]:13.2f}" for c in columns))
+    
+    if "text" in results and "json" in results:
+        saved = 1 - results["json"]["out_tokens"] / results["text"]["out_tokens"]
+        print(f"\nJSON output token reduction: {saved:.0%}")
+        print(f"Parse success: text {results['text']['parsed']:.0%}, json {results['json']['parsed']:.0%}")
+    
+    retriever.close()
+
+
+if __name__ == "__main__":
+    main()
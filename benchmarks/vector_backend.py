@@ -0,0 +1,158 @@
+"""
+Compare the Chroma and NumPy vector store backends.
+
+Both backends serve the same collection: the NumPy store is rebuilt from
+the vectors already in Chroma (no re-embedding). Each backend runs in its
+own spawned process so load time and memory (RSS/PSS growth from opening
+the store, including the client import) are measured in isolation. Queries
+are random unit vectors, so only the vector search itself is timed: one
+query at a time, then in batches (Chroma's multi-query call vs one NumPy
+matrix product).
+
+Usage:
+    python -m benchmarks.vector_backend --collection heroes --queries 500
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.utils.config import config
+from src.utils.memory import process_memory
+
+
+MB = 1024 * 1024
+
+
+def build_numpy_store(collection_name: str, persist_path: str) -> int:
+    """Copy a Chroma collection's vectors and nodes into a persisted NumPy store."""
+    import chromadb
+    from llama_index.core.vector_stores.utils import metadata_dict_to_node
+    from src.rag.vector_stores import NumpyVectorStore
+    
+    collection = chromadb.PersistentClient(path=config.CHROMA_DB_PATH).get_collection(collection_name)
+    data = collection.get(include=["embeddings", "metadatas"])
+    
+    nodes = []
+    for embedding, metadata in zip(data["embeddings"], data["metadatas"]):
+        node = metadata_dict_to_node(metadata)
+        node.embedding = list(embedding)
+        nodes.append(node)
+    
+    store = NumpyVectorStore()
+    store.add(nodes)
+    store.persist(persist_path)
+    return store.count()
+
+
+def measure(
+    backend: str,
+    collection_name: str,
+    persist_path: str,
+    queries: np.ndarray,
+    top_k: int,
+    batch_size: int,
+    results: Any
+):
+    """Open one backend, time single and batched queries, report memory growth."""
+    from llama_index.core.vector_stores.types import VectorStoreQuery
+    
+    before = process_memory()
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        from llama_index.vector_stores.chroma import ChromaVectorStore
+        
+        collection = chromadb.PersistentClient(path=config.CHROMA_DB_PATH).get_collection(collection_name)
+        store = ChromaVectorStore(chroma_collection=collection)
+        
+        def query_batch(batch: np.ndarray):
+            collection.query(query_embeddings=batch.tolist(), n_results=top_k)
+    else:
+        from src.rag.vector_stores import NumpyVectorStore
+        
+        store = NumpyVectorStore.from_persist_path(persist_path)
+        
+        def query_batch(batch: np.ndarray):
+            store.query_many(batch, top_k)
+    load_s = time.perf_counter() - start
+    
+    # First query pays for lazy index loading; keep it out of the latencies
+    store.query(VectorStoreQuery(query_embedding=queries[0].tolist(), similarity_top_k=top_k))
+    after_load = process_memory()
+    
+    latencies = []
+    for vector in queries:
+        query = VectorStoreQuery(query_embedding=vector.tolist(), similarity_top_k=top_k)
+        start = time.perf_counter()
+        store.query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        query_batch(queries[offset:offset + batch_size])
+    batched_s = time.perf_counter() - start
+    
+    latencies.sort()
+    results.put({
+        "backend": backend,
+        "load_ms": load_s * 1000,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "batch_qps": len(queries) / batched_s,
+        "rss_mb": (after_load["rss"] - before["rss"]) / MB,
+        "pss_mb": (after_load["pss"] - before["pss"]) / MB,
+    })
+
+
+def main():
+    """Main entry point for the vector backend benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="heroes", choices=["heroes", "maps"])
+    parser.add_argument("--queries", type=int, default=500, help="Random query vectors per backend")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Vector Backend Benchmark")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        persist_path = str(Path(tmp_dir) / args.collection)
+        count = build_numpy_store(args.collection, persist_path)
+        dim = np.load(f"{persist_path}.npy", mmap_mode="r").shape[1]
+        print(f"✓ {args.collection}: {count} vectors of dimension {dim}")
+        
+        rng = np.random.default_rng(0)
+        queries = rng.standard_normal((args.queries, dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        rows: List[Dict[str, float]] = []
+        for backend in ("chroma", "numpy"):
+            process = context.Process(
+                target=measure,
+                args=(backend, args.collection, persist_path, queries, args.top_k, args.batch_size, results),
+            )
+            process.start()
+            rows.append(results.get())
+            process.join()
+    
+    columns = ["load_ms", "p50_ms", "p95_ms", "batch_qps", "rss_mb", "pss_mb"]
+    print("\n" + "backend".ljust(10) + "".join(c.rjust(12) for c in columns))
+    for row in rows:
+        print(row["backend"].ljust(10) + "".join(f"{row[c]:12.2f}" for c in columns))
+    
+    chroma, numpy_row = rows
+    print(f"\nNumPy p50 speedup: {chroma['p50_ms'] / numpy_row['p50_ms']:.1f}x, "
+          f"memory: {numpy_row['rss_mb']:.1f} MB vs {chroma['rss_mb']:.1f} MB RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measure memory of a multi-worker deployment with and without pre-fork loading.
+
+Starts gunicorn (gunicorn.conf.py) once with PRELOAD_MODELS=true and once
+with PRELOAD_MODELS=false, waits until every worker has finished its
+startup, then sums RSS and PSS of the master and its workers from /proc.
+PSS splits shared pages between the processes sharing them, so it is the
+figure that shows the copy-on-write savings.
+
+Usage:
+    python -m benchmarks.worker_memory --workers 4
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, Set
+
+import httpx
+
+from src.utils.memory import child_pids, process_memory
+
+
+MB = 1024 * 1024
+
+
+def wait_for_workers(base_url: str, workers: int, timeout: float) -> Set[int]:
+    """Poll /stats until every worker has answered (i.e. finished its lifespan)."""
+    seen: Set[int] = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and len(seen) < workers:
+        try:
+            # New connection each time so requests spread over the workers
+            response = httpx.get(f"{base_url}/stats", timeout=5.0)
+            if response.status_code == 200:
+                seen.add(response.json()["memory"]["pid"])
+                continue
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    return seen
+
+
+def measure(app: str, workers: int, preload: bool, port: int, timeout: float) -> Dict[str, float]:
+    """Run one gunicorn deployment and return its memory totals in MB."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PRELOAD_MODELS=str(preload).lower())
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", app],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready = wait_for_workers(f"http://127.0.0.1:{port}", workers, timeout)
+        if len(ready) < workers:
+            print(f"⚠ Only {len(ready)}/{workers} workers answered within {timeout:.0f}s")
+        
+        pids = [master.pid] + child_pids(master.pid)
+        memory = [process_memory(pid) for pid in pids]
+        worker_pss = [m.get("pss", 0) for m in memory[1:]]
+        return {
+            "rss_mb": sum(m.get("rss", 0) for m in memory) / MB,
+            "pss_mb": sum(m.get("pss", 0) for m in memory) / MB,
+            "worker_pss_mb": sum(worker_pss) / len(worker_pss) / MB if worker_pss else 0.0,
+            "master_pss_mb": memory[0].get("pss", 0) / MB,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            master.kill()
+
+
+def main():
+    """Main entry point for the worker memory benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Gunicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=180.0, help="Seconds to wait for workers to start")
+    parser.add_argument("--app", default="src.api.main:app")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Worker Memory Benchmark")
+    print("=" * 60)
+    
+    results = {}
+    for preload in (False, True):
+        label = "preload" if preload else "per-worker"
+        print(f"\nStarting {args.workers} workers ({label})...")
+        results[label] = measure(args.app, args.workers, preload, args.port, args.timeout)
+    
+    columns = ["rss_mb", "pss_mb", "worker_pss_mb", "master_pss_mb"]
+    print("\n" + "mode".ljust(12) + "".join(c.rjust(15) for c in columns))
+    for label, result in results.items():
+        print(label.ljust(12) + "".join(f"{result[c]:15.1f}" for c in columns))
+    
+    saved = 1 - results["preload"]["pss_mb"] / results["per-worker"]["pss_mb"]
+    print(f"\nTotal PSS reduction with pre-fork loading: {saved:.0%}")
+
+
+if __name__ == "__main__":
+    main()
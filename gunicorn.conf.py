@@ -0,0 +1,61 @@
+"""
+Gunicorn settings for running the API with several worker processes.
+
+Usage:
+    gunicorn -c gunicorn.conf.py src.api.main:app
+
+The master imports the app and loads the embedding model once, then freezes
+the garbage collector so workers share those pages copy-on-write instead of
+each loading a private copy. Everything that is not fork-safe (Chroma
+client, LLM HTTP clients, thread pools) is still created per worker in the
+FastAPI lifespan, after the fork.
+"""
+import gc
+import os
+import sys
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Above the 120 s LLM request timeout
+timeout = 180
+
+# Set PRELOAD_MODELS=false to give every worker its own copy (for comparison)
+preload_app = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+
+if preload_app:
+    # Avoid freed holes in pages the workers will share (see gc.freeze docs)
+    gc.disable()
+
+
+def when_ready(server):
+    """Runs in the master right before the first workers are forked."""
+    if not preload_app:
+        return
+    
+    from src.rag.embeddings import get_embed_model
+    
+    try:
+        get_embed_model()
+        server.log.info("Embedding model loaded in master, shared with workers")
+        
+        # Move everything allocated so far out of the collector's reach, so
+        # collections in the workers don't write to (and copy) shared pages
+        gc.freeze()
+    finally:
+        # Only objects allocated from here on are collected, in the master
+        # and in the workers it forks
+        gc.enable()
+
+
+def post_fork(server, worker):
+    # Each worker gets its share of the cores for embedding inference
+    from src.utils.config import config
+    
+    if not config.EMBED_THREADS:
+        config.EMBED_THREADS = max(1, (os.cpu_count() or 1) // workers)
+    # Only if the preloaded model brought torch in (ONNX sessions are created
+    # per worker and read EMBED_THREADS then)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(config.EMBED_THREADS)
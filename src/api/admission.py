@@ -0,0 +1,137 @@
+"""Admission control for LLM-bound requests."""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+# Lower value = served first
+PRIORITY_COUNTER = 0
+PRIORITY_SUGGEST = 1
+
+
+class AdmissionRejected(Exception):
+    """The LLM queue is full; retry after the given number of seconds."""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def concurrency_for(provider: str, spec: str, default: int = 2) -> int:
+    """
+    Resolve the LLM concurrency limit for a provider.
+    
+    Args:
+        provider: LLM provider name (ollama, openai, azure)
+        spec: Either a single number or "provider=n" pairs separated by commas
+        default: Limit when the provider is not listed
+    
+    Returns:
+        Maximum concurrent LLM generations
+    """
+    spec = spec.strip()
+    if spec.isdigit():
+        return max(1, int(spec))
+    
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if value.strip().isdigit():
+            limits[name.strip().lower()] = max(1, int(value))
+    return limits.get(provider.lower(), default)
+
+
+class AdmissionController:
+    """
+    Bounded, prioritized queue in front of the LLM.
+    
+    At most max_concurrency requests hold a slot; up to max_queue more wait
+    for one, lowest priority value first (FIFO within a priority). Anything
+    beyond that is rejected immediately with an estimated Retry-After instead
+    of waiting for the LLM request timeout.
+    """
+    
+    def __init__(self, max_concurrency: int, max_queue: int, initial_service_seconds: float = 10.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        
+        self._active = 0
+        self._queued = 0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        
+        # Smoothed time a request holds a slot, used for Retry-After
+        self.service_seconds = initial_service_seconds
+        self.admitted = 0
+        self.rejected = 0
+    
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new request."""
+        waves = (self._queued + 1) / self.max_concurrency
+        return max(1, math.ceil(self.service_seconds * waves))
+    
+    def check(self):
+        """Raise AdmissionRejected now if a new request would not fit in the queue."""
+        if self._active >= self.max_concurrency and self._queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+    
+    async def acquire(self, priority: int = PRIORITY_SUGGEST):
+        """Wait for a slot, or raise AdmissionRejected if the queue is full."""
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self.admitted += 1
+            return
+        
+        self.check()
+        
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), waiter])
+        self._queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            else:
+                self._queued -= 1
+            raise
+        self.admitted += 1
+    
+    def release(self):
+        """Free a slot, handing it straight to the next waiter if any."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._queued -= 1
+                waiter.set_result(None)
+                return
+        self._active -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_SUGGEST) -> AsyncIterator[None]:
+        """Hold an LLM slot for the enclosed block."""
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.service_seconds += 0.2 * (elapsed - self.service_seconds)
+            self.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Slot usage and rejection counters."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queued": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_seconds": round(self.service_seconds, 3),
+        }
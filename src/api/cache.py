@@ -0,0 +1,277 @@
+"""Response cache for team composition suggestions."""
+import asyncio
+import hashlib
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.api.models import TeamCompositionRequest
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    """Case-fold and collapse whitespace and quote variants."""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value)
+    value = value.replace("’", "'").replace("‘", "'")
+    return re.sub(r"\s+", " ", value).strip().casefold()
+
+
+def _normalize_team(heroes: List[str]) -> List[str]:
+    """Order-insensitive, case-folded team list (duplicates are kept)."""
+    return sorted(name for name in (_normalize_text(hero) for hero in heroes) if name)
+
+
+def canonical_request(request: TeamCompositionRequest) -> Dict[str, Any]:
+    """Canonical form of a request: equivalent requests map to the same dict."""
+    return {
+        "map": _normalize_text(request.map_name),
+        "enemy_team": _normalize_team(request.enemy_team),
+        "current_team": _normalize_team(request.current_team),
+        "difficulties": _normalize_text(request.difficulties).rstrip(".!"),
+    }
+
+
+def request_cache_key(request: TeamCompositionRequest, namespace: str = "") -> str:
+    """
+    Build the cache key for a team composition request.
+    
+    Args:
+        request: Incoming request
+        namespace: Anything else the answer depends on (LLM model, context mode)
+    """
+    payload = json.dumps(
+        {"namespace": namespace, "request": canonical_request(request)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with TTL for serialized responses.
+    
+    Every entry remembers the index version it was computed against; a lookup
+    with a different version is a miss, so rebuilding the index invalidates
+    the cache. With a path, entries are also written to SQLite so they
+    survive restarts: writes are queued to a background thread (batched into
+    one commit, with the table trimmed to max_entries every
+    TRIM_INTERVAL_SECONDS), and only lookups that miss in memory read the
+    database (see aget()).
+    """
+    
+    TRIM_INTERVAL_SECONDS = 60.0
+    BUSY_TIMEOUT_SECONDS = 5.0
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        
+        # key -> (created_at, index_version, payload)
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Guards the connection, shared by lookups and the writer thread
+        self._db_lock = threading.Lock()
+        # Pending (statement, parameters) for the writer thread, None to stop it
+        self._writes: "queue.Queue[Optional[Tuple[str, Tuple]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        
+        if path:
+            self._open_db(path)
+    
+    def _open_db(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Workers sharing the file wait for each other's write locks
+        self._db = sqlite3.connect(path, timeout=self.BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, created_at REAL, index_version TEXT, payload TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self._db.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="response-cache-writer", daemon=True)
+        self._writer.start()
+    
+    def _write_loop(self):
+        """Apply queued writes in batches, one commit per batch."""
+        last_trim = time.monotonic()
+        while True:
+            batch = [self._writes.get()]
+            while not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            
+            try:
+                with self._db_lock:
+                    try:
+                        for write in batch:
+                            if write is not None:
+                                self._db.execute(*write)
+                        if time.monotonic() - last_trim >= self.TRIM_INTERVAL_SECONDS or None in batch:
+                            self._trim()
+                            last_trim = time.monotonic()
+                        self._db.commit()
+                    except sqlite3.Error as e:
+                        # Entries are still served from memory; only persistence is lost
+                        print(f"⚠ Response cache write failed ({len(batch)} queued writes dropped): {e}")
+                        self._db.rollback()
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if None in batch:
+                return
+    
+    def _trim(self):
+        """Keep the newest max_entries rows (walks the created_at index)."""
+        self._db.execute(
+            "DELETE FROM responses WHERE created_at < "
+            "(SELECT created_at FROM responses ORDER BY created_at DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries - 1,),
+        )
+    
+    def _write(self, statement: str, parameters: Tuple = ()):
+        if self._writer is not None:
+            self._writes.put((statement, parameters))
+    
+    def flush(self):
+        """Wait until every queued write is in the database."""
+        if self._writer is not None:
+            self._writes.join()
+    
+    def _is_fresh(self, created_at: float, version: str, index_version: str) -> bool:
+        return version == index_version and time.time() - created_at < self.ttl_seconds
+    
+    def _load_from_db(self, key: str) -> Optional[Tuple[float, str, Dict[str, Any]]]:
+        if not self._db:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT created_at, index_version, payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return row[0], row[1], json.loads(row[2])
+    
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        self._write("DELETE FROM responses WHERE key = ?", (key,))
+    
+    def get(self, key: str, index_version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload, or None on a miss, expiry or version change."""
+        entry = self._entries.get(key)
+        if entry is None:
+            # Read outside the lock: a slow disk must not hold up memory hits
+            entry = self._load_from_db(key)
+        
+        with self._lock:
+            entry = self._entries.get(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            created_at, version, payload = entry
+            if not self._is_fresh(created_at, version, index_version):
+                self._delete(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.hits += 1
+            return payload
+    
+    async def aget(self, key: str, index_version: str) -> Optional[Dict[str, Any]]:
+        """get() for async handlers: only a lookup that has to read the database leaves the event loop."""
+        if self._db is None or key in self._entries:
+            return self.get(key, index_version)
+        return await asyncio.to_thread(self.get, key, index_version)
+    
+    def set(self, key: str, index_version: str, payload: Dict[str, Any]):
+        """Store a payload computed against the given index version (written to disk in the background)."""
+        with self._lock:
+            entry = (time.time(), index_version, payload)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self._write(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, entry[0], index_version, json.dumps(payload, ensure_ascii=False)),
+            )
+    
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._write("DELETE FROM responses")
+    
+    def drop_stale(self, index_version: str) -> int:
+        """
+        Drop every entry computed against another index version, in memory
+        and on disk, instead of waiting for each one's next lookup. Waits for
+        the database, so async callers should run it in a thread.
+        
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            stale = [key for key, (_, version, _) in self._entries.items() if version != index_version]
+            for key in stale:
+                del self._entries[key]
+            dropped = len(stale)
+        
+        if self._db:
+            self.flush()
+            with self._db_lock:
+                cursor = self._db.execute("DELETE FROM responses WHERE index_version != ?", (index_version,))
+                self._db.commit()
+            # In-memory entries are written through, so the table holds them too
+            dropped = max(dropped, cursor.rowcount)
+        with self._lock:
+            self.invalidations += dropped
+        return dropped
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+    
+    def close(self):
+        """Write pending entries, then close the on-disk backend."""
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._db:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,109 @@
+"""Background health monitoring for the API."""
+import asyncio
+import time
+from typing import Callable, Optional, Tuple
+import httpx
+from src.api.models import HealthResponse, ReadinessResponse
+from src.rag.retriever import RAGRetriever
+from src.utils.config import config
+from src.utils.llm_config import get_provider_from_env
+
+
+class HealthMonitor:
+    """
+    Periodically checks Ollama (when it is the LLM provider) and the vector
+    indexes and keeps the result.
+    
+    /health and /health/ready read the latest snapshot instead of making
+    network and database round trips on every probe.
+    """
+    
+    def __init__(self, get_retriever: Callable[[], Optional[RAGRetriever]], interval: float = 5.0):
+        self.get_retriever = get_retriever
+        self.interval = interval
+        
+        self.snapshot = HealthResponse(
+            status="starting",
+            ollama_connected=False,
+            heroes_indexed=0,
+            maps_indexed=0,
+        )
+        self.llm_warm = False
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def _check_ollama(self) -> Tuple[bool, bool]:
+        """Return (reachable, model loaded in memory) for the Ollama server."""
+        try:
+            response = await self._client.get(f"{config.OLLAMA_BASE_URL}/api/tags", timeout=5.0)
+            if response.status_code != 200:
+                return False, False
+            
+            # /api/ps lists the models currently resident in memory
+            response = await self._client.get(f"{config.OLLAMA_BASE_URL}/api/ps", timeout=5.0)
+            loaded = {model.get("name") for model in response.json().get("models", [])}
+            model = config.OLLAMA_MODEL
+            return True, model in loaded or f"{model}:latest" in loaded
+        except Exception:
+            return False, False
+    
+    async def refresh(self):
+        """Run all checks once and publish a new snapshot."""
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        
+        retriever = self.get_retriever()
+        provider = retriever.provider if retriever else get_provider_from_env()
+        
+        # Hosted providers have nothing to warm up (and no Ollama server to
+        # probe); Ollama needs the model resident
+        uses_ollama = provider == "ollama"
+        ollama_connected, ollama_model_loaded = False, False
+        if uses_ollama:
+            ollama_connected, ollama_model_loaded = await self._check_ollama()
+        
+        counts = {"heroes": 0, "maps": 0}
+        if retriever:
+            counts = await asyncio.to_thread(retriever.index_counts)
+        
+        llm_reachable = ollama_connected if uses_ollama else True
+        self.llm_warm = ollama_model_loaded if uses_ollama else retriever is not None
+        
+        self.snapshot = HealthResponse(
+            status="healthy" if llm_reachable else "degraded",
+            ollama_connected=ollama_connected,
+            heroes_indexed=counts["heroes"],
+            maps_indexed=counts["maps"],
+            checked_at=time.time(),
+        )
+    
+    async def run(self):
+        """Refresh forever; meant to run as a background task."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠ Health check failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    def readiness(self) -> ReadinessResponse:
+        """Whether the embedding model, indexes and LLM are warm."""
+        retriever = self.get_retriever()
+        embedding_model_warm = bool(retriever and retriever.embed_warm)
+        indexes_loaded = bool(
+            retriever
+            and retriever.heroes_index is not None
+            and retriever.maps_index is not None
+        )
+        
+        return ReadinessResponse(
+            ready=embedding_model_warm and indexes_loaded and self.llm_warm,
+            embedding_model_warm=embedding_model_warm,
+            indexes_loaded=indexes_loaded,
+            llm_warm=self.llm_warm,
+        )
+    
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,39 +1,234 @@
 """FastAPI application for Overwatch RAG Team Composer."""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
-import httpx
-from typing import List
+import asyncio
+import json
+import os
+import secrets
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.api.models import (
     TeamCompositionRequest,
     TeamCompositionResponse,
-    HeroRecommendation,
     HeroSimple,
     MapSimple,
     HeroCounterRequest,
     HeroCounterResponse,
     HealthResponse,
+    ReadinessResponse,
+    IndexReloadRequest,
+    IndexReloadResponse,
 )
-from src.rag.retriever import RAGRetriever
-from src.ingestion.overfast_client import OverFastClient
+from src.api.admission import (
+    PRIORITY_COUNTER,
+    PRIORITY_SUGGEST,
+    AdmissionController,
+    AdmissionRejected,
+    concurrency_for,
+)
+from src.api.cache import ResponseCache, request_cache_key
+from src.api.health import HealthMonitor
+from src.api.warmup import Warmup
+from src.api.singleflight import SingleFlight
+from src.api.parsing import (
+    TeamCompositionParser,
+    is_parsed,
+    parse_team_composition,
+    response_events,
+)
+from src.rag.counters import CounterTable, counter_query
+from src.rag.embeddings import embed_model_inherited, get_embed_model
+from src.rag.retriever import RAGRetriever, RetrievalOverloaded, RetrievalTimeout
+from src.ingestion.catalog import Catalog
 from src.utils.config import config
+from src.utils.llm_config import get_provider_from_env
+from src.utils.memory import process_memory
+from src.utils.metrics import registry, track_stage
 
 
 # Global retriever instance
 retriever: RAGRetriever = None
 
+# Cache of parsed /suggest responses
+response_cache: ResponseCache = None
+
+# Bounded, prioritized queue in front of the LLM
+admission: AdmissionController = None
+
+# Identical concurrent requests share one computation
+suggest_flights = SingleFlight()
+counter_flights = SingleFlight()
+
+# One blue/green indexer build at a time from /admin/reload
+rebuild_lock = asyncio.Lock()
+
+# Hero and map listings served from ingested data
+catalog = Catalog()
+
+# Counter answers precomputed at index time
+counter_table = CounterTable()
+
+# Dependency checks refreshed in the background for /health
+health_monitor = HealthMonitor(lambda: retriever, interval=config.HEALTH_REFRESH_SECONDS)
+
+# Background startup progress for /health/ready
+warmup: Warmup = None
+WARMUP_STEPS = ("embedding_model", "indexes", "embedding_warmup", "llm_warmup")
+
+
+async def _fetch_catalog_from_overfast():
+    """Fill an empty catalog from the OverFast API without blocking startup."""
+    try:
+        await asyncio.to_thread(catalog.load_from_overfast)
+    except Exception as e:
+        print(f"⚠ Could not load catalog from OverFast API: {e}")
+
+
+async def _refresh_catalog_periodically(interval: float):
+    """Pick up re-ingested data/raw files in the background."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(catalog.load)
+        except Exception as e:
+            print(f"⚠ Catalog refresh failed: {e}")
+
+
+async def _reload_index(force: bool = False) -> Tuple[bool, int]:
+    """
+    Swap in the published indexes (loaded and warmed off the event loop),
+    then drop cached responses of other index versions and pick up the
+    counter table built with them.
+    
+    Returns:
+        (whether a new generation was swapped in, cached responses dropped)
+    """
+    if not await asyncio.to_thread(retriever.reload, force):
+        return False, 0
+    dropped = await asyncio.to_thread(response_cache.drop_stale, retriever.index_version)
+    if counter_table.load():
+        print(f"✓ Counter table reloaded ({len(counter_table)} heroes)")
+    print(f"✓ Serving index version {retriever.index_version} ({dropped} cached responses dropped)")
+    return True, dropped
+
+
+async def _watch_index(interval: float):
+    """Swap in indexes published by later indexer runs."""
+    while True:
+        await asyncio.sleep(interval)
+        if retriever is None:
+            continue
+        try:
+            await _reload_index()
+        except Exception as e:
+            print(f"⚠ Index reload failed: {e}")
+
+
+async def _run_blue_green_build(full: bool = False):
+    """
+    Run `python -m src.rag.indexer --blue-green` in a subprocess (also
+    rewriting the snapshot when serving from INDEX_SNAPSHOT_PATH).
+    
+    Raises:
+        RuntimeError: The indexer failed (message ends with its last output lines)
+    """
+    command = [sys.executable, "-m", "src.rag.indexer", "--blue-green"]
+    if full:
+        command.append("--full")
+    if config.INDEX_SNAPSHOT_PATH:
+        command += ["--snapshot", config.INDEX_SNAPSHOT_PATH]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    output, _ = await process.communicate()
+    if process.returncode != 0:
+        tail = output.decode("utf-8", errors="replace").strip().splitlines()[-3:]
+        raise RuntimeError(f"Indexer exited with code {process.returncode}: {' | '.join(tail)}")
+
+
+async def _warm_up():
+    """
+    Load the embedding model and indexes, then warm up the LLM.
+    
+    Runs after the server is already accepting connections; requests that
+    need the retriever get 503 until it is published.
+    """
+    global retriever
+    try:
+        async with warmup.step("embedding_model"):
+            await asyncio.to_thread(get_embed_model)
+        async with warmup.step("indexes"):
+            instance = await asyncio.to_thread(RAGRetriever)
+        async with warmup.step("embedding_warmup"):
+            await asyncio.to_thread(instance.warm_up_embeddings)
+        retriever = instance
+        print("✓ RAG retriever initialized")
+        
+        if config.LLM_WARMUP:
+            try:
+                async with warmup.step("llm_warmup"):
+                    await instance.awarm_up_llm()
+            except Exception as e:
+                print(f"⚠ LLM warmup failed: {e}")
+        else:
+            warmup.skip("llm_warmup")
+    except Exception as e:
+        print(f"⚠ Warmup failed: {e}")
+    
+    warmup.finish()
+    await health_monitor.refresh()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle management for the FastAPI app."""
-    global retriever
-    print("Initializing RAG retriever...")
-    retriever = RAGRetriever()
-    print("✓ RAG retriever initialized")
-    print("✓ Overcoach AI is ready to serve requests!")
+    global response_cache, admission, warmup
+    background_tasks = []
+    warmup = Warmup(WARMUP_STEPS)
+    
+    catalog.load()
+    if counter_table.load():
+        print(f"✓ Counter table loaded ({len(counter_table)} heroes)")
+    if not catalog.is_loaded and config.CATALOG_OVERFAST_FALLBACK:
+        print("No ingested catalog found, fetching from OverFast API in the background...")
+        background_tasks.append(asyncio.create_task(_fetch_catalog_from_overfast()))
+    if config.CATALOG_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            _refresh_catalog_periodically(config.CATALOG_REFRESH_SECONDS)
+        ))
+    if config.INDEX_RELOAD_POLL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(_watch_index(config.INDEX_RELOAD_POLL_SECONDS)))
+    
+    admission = AdmissionController(
+        max_concurrency=concurrency_for(get_provider_from_env(), config.LLM_MAX_CONCURRENCY),
+        max_queue=config.LLM_QUEUE_DEPTH,
+    )
+    print(f"✓ LLM admission: {admission.max_concurrency} concurrent, {admission.max_queue} queued")
+    response_cache = ResponseCache(
+        max_entries=config.RESPONSE_CACHE_SIZE,
+        ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+        path=config.RESPONSE_CACHE_PATH or None,
+    )
+    
+    # Bind right away; models, indexes and the LLM warm up in the background
+    print("Warming up RAG retriever in the background...")
+    background_tasks.append(asyncio.create_task(_warm_up()))
+    background_tasks.append(asyncio.create_task(health_monitor.run()))
+    print("✓ Overcoach AI is accepting connections")
     yield
     print("Shutting down...")
+    for task in background_tasks:
+        task.cancel()
+    if retriever:
+        retriever.close()
+    response_cache.close()
+    await health_monitor.close()
 
 
 # Create FastAPI app
@@ -66,38 +261,204 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Health check endpoint."""
-    # Check Ollama connection
-    ollama_connected = False
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{config.OLLAMA_BASE_URL}/api/tags", timeout=5.0)
-            ollama_connected = response.status_code == 200
-    except:
-        pass
+    """Health check endpoint (served from the latest background check)."""
+    return health_monitor.snapshot
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", response_model=ReadinessResponse, tags=["Health"])
+async def readiness():
+    """
+    Readiness probe: embedding model, indexes and LLM are warm (503 otherwise).
+    
+    Also reports the progress and timings of the background warmup steps.
+    """
+    state = health_monitor.readiness()
+    if warmup:
+        state = state.model_copy(update={
+            "ready": state.ready and warmup.done,
+            "warmup": warmup.report(),
+            "seconds_to_ready": warmup.seconds_to_ready,
+        })
+    return JSONResponse(status_code=200 if state.ready else 503, content=state.model_dump())
+
+
+def _team_context(request: TeamCompositionRequest) -> Dict[str, Any]:
+    """Build the retriever context from a team composition request."""
+    return {
+        "map": request.map_name,
+        "enemy_team": request.enemy_team,
+        "current_team": request.current_team,
+        "difficulties": request.difficulties,
+    }
+
+
+def _cache_key(request: TeamCompositionRequest) -> str:
+    """Cache key for a request under the current LLM, context mode and output format."""
+    namespace = (
+        f"{retriever.provider}:{retriever.llm_model}:"
+        f"{config.RAG_CONTEXT_MODE}:{config.TEAM_OUTPUT_FORMAT}"
+    )
+    return request_cache_key(request, namespace=namespace)
+
+
+def _too_busy(e: AdmissionRejected) -> HTTPException:
+    """429 telling the client when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _retrieval_overloaded(e: RetrievalOverloaded) -> HTTPException:
+    """503 while the retrieval pool is saturated."""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
+
+def _parse_team(raw_response: str, parser: Optional[TeamCompositionParser] = None) -> TeamCompositionResponse:
+    """Parse the final LLM answer in the configured output format, with metrics."""
+    output_format = config.TEAM_OUTPUT_FORMAT
+    with track_stage(operation="team_composition", stage="parse", **retriever.metric_labels):
+        if parser is not None:
+            # Text already fed incrementally while streaming
+            response = parser.result(raw_response)
+        else:
+            response = parse_team_composition(raw_response, output_format)
+    PARSE_RESULTS.inc(
+        output_format=output_format,
+        outcome="parsed" if is_parsed(response) else "failed",
+        **retriever.metric_labels,
+    )
+    return response
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _memory_stats() -> Dict[str, Any]:
+    """Memory of the worker serving this request."""
+    return {
+        "pid": os.getpid(),
+        "embed_model_inherited": embed_model_inherited(),
+        **process_memory(),
+    }
+
+
+@app.get("/stats", tags=["Health"])
+async def get_stats():
+    """Runtime statistics (response cache and request coalescing counters)."""
+    return {
+        "response_cache": response_cache.stats() if response_cache else None,
+        "embedding_cache": retriever.embed_cache.stats() if retriever else None,
+        "entities": retriever.entities.stats() if retriever else None,
+        "index": retriever.index_stats() if retriever else None,
+        "retrieval": retriever.retrieval_stats() if retriever else None,
+        "suggest_coalescing": suggest_flights.stats(),
+        "counter_coalescing": counter_flights.stats(),
+        "catalog": catalog.stats(),
+        "admission": admission.stats() if admission else None,
+        "counter_table": counter_table.stats(),
+        "memory": _memory_stats(),
+    }
+
+
+# Mirrors of the /stats counters, refreshed when /metrics is scraped
+RESPONSE_CACHE_EVENTS = registry.counter(
+    "overcoach_response_cache_events_total",
+    "Response cache lookups and removals by outcome",
+    ["event"],
+)
+EMBEDDING_CACHE_EVENTS = registry.counter(
+    "overcoach_embedding_cache_events_total",
+    "Query embedding cache lookups and evictions by outcome",
+    ["event"],
+)
+COALESCING_REQUESTS = registry.counter(
+    "overcoach_coalescing_requests_total",
+    "Requests that started a generation (executed) or joined one (coalesced)",
+    ["endpoint", "outcome"],
+)
+COALESCING_IN_FLIGHT = registry.gauge(
+    "overcoach_coalescing_in_flight",
+    "Generations currently in flight",
+    ["endpoint"],
+)
+ADMISSION_SLOTS = registry.gauge(
+    "overcoach_llm_admission_requests",
+    "LLM requests holding a slot (active) or waiting for one (queued)",
+    ["state"],
+)
+ADMISSION_DECISIONS = registry.counter(
+    "overcoach_llm_admission_decisions_total",
+    "LLM requests admitted or rejected with 429",
+    ["decision"],
+)
+PARSE_RESULTS = registry.counter(
+    "overcoach_team_parse_total",
+    "Team composition responses by output format and parse outcome",
+    ["provider", "model", "output_format", "outcome"],
+)
+PROCESS_MEMORY = registry.gauge(
+    "overcoach_process_memory_bytes",
+    "Memory of this worker process (pss counts shared pages fractionally)",
+    ["pid", "kind"],
+)
+CATALOG_ITEMS = registry.gauge(
+    "overcoach_catalog_items",
+    "Entries in the hero and map catalog",
+    ["kind"],
+)
+
+
+def _refresh_mirrored_metrics():
+    if response_cache:
+        cache_stats = response_cache.stats()
+        for event in ("hits", "misses", "evictions", "invalidations"):
+            RESPONSE_CACHE_EVENTS.set(cache_stats[event], event=event)
     
-    # Get index stats
-    heroes_count = 0
-    maps_count = 0
     if retriever:
-        try:
-            heroes_collection = retriever.chroma_client.get_collection("heroes")
-            heroes_count = heroes_collection.count()
-        except:
-            pass
-        
-        try:
-            maps_collection = retriever.chroma_client.get_collection("maps")
-            maps_count = maps_collection.count()
-        except:
-            pass
+        embed_stats = retriever.embed_cache.stats()
+        for event in ("hits", "misses", "evictions"):
+            EMBEDDING_CACHE_EVENTS.set(embed_stats[event], event=event)
     
-    return HealthResponse(
-        status="healthy" if ollama_connected else "degraded",
-        ollama_connected=ollama_connected,
-        heroes_indexed=heroes_count,
-        maps_indexed=maps_count,
-    )
+    for endpoint, flights in (("suggest", suggest_flights), ("counter", counter_flights)):
+        flight_stats = flights.stats()
+        COALESCING_REQUESTS.set(flight_stats["executions"], endpoint=endpoint, outcome="executed")
+        COALESCING_REQUESTS.set(flight_stats["coalesced"], endpoint=endpoint, outcome="coalesced")
+        COALESCING_IN_FLIGHT.set(flight_stats["in_flight"], endpoint=endpoint)
+    
+    if admission:
+        admission_stats = admission.stats()
+        ADMISSION_SLOTS.set(admission_stats["active"], state="active")
+        ADMISSION_SLOTS.set(admission_stats["queued"], state="queued")
+        ADMISSION_DECISIONS.set(admission_stats["admitted"], decision="admitted")
+        ADMISSION_DECISIONS.set(admission_stats["rejected"], decision="rejected")
+    
+    pid = str(os.getpid())
+    for kind, value in process_memory().items():
+        PROCESS_MEMORY.set(value, pid=pid, kind=kind)
+    
+    CATALOG_ITEMS.set(len(catalog.heroes), kind="heroes")
+    CATALOG_ITEMS.set(len(catalog.maps), kind="maps")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def get_metrics():
+    """Prometheus metrics: per-stage RAG latency plus cache and coalescing counters."""
+    _refresh_mirrored_metrics()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/suggest", response_model=TeamCompositionResponse, tags=["Team Composition"])
@@ -109,193 +470,231 @@ async def suggest_team_composition(request: TeamCompositionRequest):
         raise HTTPException(status_code=503, detail="RAG retriever not initialized")
     
     try:
-        # Prepare context
-        context = {
-            "map": request.map_name,
-            "enemy_team": request.enemy_team,
-            "current_team": request.current_team,
-            "difficulties": request.difficulties,
-        }
-        
-        # Query RAG
-        raw_response = retriever.query_team_composition(context)
-        
-        # Parse response - extract heroes from "RECOMMENDED TEAM" section
-        recommended_team = []
-        strategy = ""
-        synergies = ""
-        alternatives = []
+        # Serve repeated lineups from cache
+        cache_key = _cache_key(request)
+        index_version = retriever.index_version
+        cached = await response_cache.aget(cache_key, index_version)
+        if cached is not None:
+            return TeamCompositionResponse(**cached)
         
-        lines = raw_response.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Detect sections
-            if "RECOMMENDED TEAM" in line.upper():
-                current_section = "team"
-                continue
-            elif "COUNTER STRATEGY" in line.upper():
-                current_section = "strategy"
-                continue
-            elif "SYNERGIES" in line.upper() or "KEY SYNERGIES" in line.upper():
-                current_section = "synergies"
-                continue
-            elif "ALTERNATIVE" in line.upper():
-                current_section = "alternatives"
-                continue
+        async def compute() -> TeamCompositionResponse:
+            # Prepare context
+            context = _team_context(request)
             
-            # Extract content based on section
-            if current_section == "team":
-                # Look for pattern: "Role: HeroName - reasoning" or "Role: HeroName – reasoning"
-                # Handle both regular dash (-) and em dash (–)
-                if ':' in line and ('-' in line or '–' in line):
-                    parts = line.split(':', 1)
-                    if len(parts) == 2:
-                        role = parts[0].strip().lower()
-                        if role in ['tank', 'damage', 'support']:
-                            # Try to split by em dash first, then regular dash
-                            hero_parts = None
-                            if '–' in parts[1]:
-                                hero_parts = parts[1].split('–', 1)
-                            elif '-' in parts[1]:
-                                hero_parts = parts[1].split('-', 1)
-                            
-                            if hero_parts:
-                                hero_name = hero_parts[0].strip()
-                                reasoning = hero_parts[1].strip() if len(hero_parts) > 1 else "Strategic pick"
-                                
-                                recommended_team.append(HeroRecommendation(
-                                    name=hero_name,
-                                    role=role,
-                                    reasoning=reasoning
-                                ))
+            # Query RAG once an LLM slot is free
+            async with admission.slot(PRIORITY_SUGGEST):
+                raw_response = await retriever.aquery_team_composition(context)
             
-            elif current_section == "strategy":
-                if line and not any(x in line.upper() for x in ["COUNTER STRATEGY", "STRATEGY:"]):
-                    strategy += line + " "
-            
-            elif current_section == "synergies":
-                if line and not any(x in line.upper() for x in ["SYNERGIES", "KEY SYNERGIES"]):
-                    synergies += line + " "
-            
-            elif current_section == "alternatives":
-                # Handle multiple formats:
-                # "- HeroName (Role): description" or "- Role: HeroName - description"
-                if line.startswith('-'):
-                    # Format 1: "- D.Va (Tank): description"
-                    if '(' in line and ')' in line:
-                        hero_with_role = line.split(':', 1)[0]  # Get "- D.Va (Tank)"
-                        hero_name = hero_with_role.split('(')[0].replace('-', '').strip()
-                        if hero_name and len(hero_name) < 30:
-                            alternatives.append(hero_name)
-                    # Format 2: "- Role: HeroName - description"
-                    elif ':' in line:
-                        parts = line.split(':', 1)
-                        if len(parts) == 2:
-                            after_role = parts[1].strip()
-                            # Split by dash (regular or em dash)
-                            if '–' in after_role:
-                                hero_desc = after_role.split('–', 1)
-                            elif '-' in after_role:
-                                hero_desc = after_role.split('-', 1)
-                            else:
-                                hero_desc = [after_role]
-                            
-                            hero_name = hero_desc[0].strip()
-                            if hero_name and len(hero_name) < 30:
-                                alternatives.append(hero_name)
-        
-        # Fallback if parsing failed
-        if not recommended_team:
-            recommended_team = [
-                HeroRecommendation(
-                    name="Parsing failed - see raw_response",
-                    role="various",
-                    reasoning="Check raw_response field for full recommendation"
-                )
-            ]
-        
-        if not strategy.strip():
-            strategy = "Check raw_response for detailed strategy"
-        
-        if not synergies.strip():
-            synergies = "Check raw_response for team synergies"
+            response = _parse_team(raw_response)
+            if is_parsed(response):
+                response_cache.set(cache_key, index_version, response.model_dump())
+            return response
         
-        return TeamCompositionResponse(
-            recommended_team=recommended_team,
-            strategy=strategy.strip(),
-            synergies=synergies.strip(),
-            alternatives=alternatives,
-            raw_response=raw_response,
-        )
+        # Concurrent identical requests wait on the same generation (of the same index)
+        return await suggest_flights.do(f"{index_version}:{cache_key}", compute)
     
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except RetrievalOverloaded as e:
+        raise _retrieval_overloaded(e)
+    except RetrievalTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating suggestion: {str(e)}")
 
 
+@app.post("/suggest/stream", tags=["Team Composition"])
+async def stream_team_composition(request: TeamCompositionRequest):
+    """
+    Stream a team composition suggestion as Server-Sent Events.
+    
+    Events:
+        - token: raw LLM text delta
+        - hero, strategy, synergies, alternative: parsed pieces of the
+          response, sent as soon as each one is complete (in JSON output
+          mode, once the whole object has been received)
+        - done: the full TeamCompositionResponse
+        - error: generation failed part-way through
+    """
+    if not retriever:
+        raise HTTPException(status_code=503, detail="RAG retriever not initialized")
+    
+    context = _team_context(request)
+    cache_key = _cache_key(request)
+    index_version = retriever.index_version
+    
+    cached = await response_cache.aget(cache_key, index_version)
+    if cached is None:
+        # Reject before the 200 is sent; the slot itself is taken in the stream
+        try:
+            admission.check()
+        except AdmissionRejected as e:
+            raise _too_busy(e)
+    
+    async def event_stream():
+        if cached is not None:
+            response = TeamCompositionResponse(**cached)
+            for event, data in response_events(response):
+                yield _sse_event(event, data)
+            yield _sse_event("done", cached)
+            return
+        
+        # Sectioned text can be parsed line by line; JSON only once complete
+        parser = TeamCompositionParser() if config.TEAM_OUTPUT_FORMAT == "text" else None
+        chunks = []
+        try:
+            async with admission.slot(PRIORITY_SUGGEST):
+                async for delta in retriever.astream_team_composition(context):
+                    chunks.append(delta)
+                    yield _sse_event("token", {"text": delta})
+                    for event, data in parser.feed(delta) if parser else []:
+                        yield _sse_event(event, data)
+            
+            if parser:
+                for event, data in parser.close():
+                    yield _sse_event(event, data)
+                response = _parse_team("".join(chunks), parser)
+            else:
+                response = _parse_team("".join(chunks))
+                for event, data in response_events(response):
+                    yield _sse_event(event, data)
+            if is_parsed(response):
+                response_cache.set(cache_key, index_version, response.model_dump())
+            yield _sse_event("done", response.model_dump())
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Error generating suggestion: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/counter", response_model=HeroCounterResponse, tags=["Hero Information"])
 async def get_hero_counters(request: HeroCounterRequest):
     """
     Get information about heroes that counter a specific hero.
+    
+    Answers come from the counter table built at index time; set live=true
+    (or ask about a hero missing from the table) to generate one with the LLM.
     """
+    if not request.live:
+        entry = counter_table.get(request.hero_name)
+        if entry is not None:
+            return HeroCounterResponse(
+                hero=request.hero_name,
+                counters=entry["counters"],
+                source="table",
+            )
+    
     if not retriever:
         raise HTTPException(status_code=503, detail="RAG retriever not initialized")
     
     try:
-        query = f"What heroes counter {request.hero_name}? Provide specific counter picks and strategies."
-        response = retriever.query_heroes(query, top_k=5)
+        query = counter_query(request.hero_name)
+        flight_key = f"{retriever.index_version}:{' '.join(request.hero_name.split()).casefold()}"
+        
+        async def compute() -> str:
+            # Short answers jump ahead of queued team compositions
+            async with admission.slot(PRIORITY_COUNTER):
+                return await retriever.aquery_heroes(query, top_k=5)
+        
+        response = await counter_flights.do(flight_key, compute)
         
         return HeroCounterResponse(
             hero=request.hero_name,
             counters=response,
         )
     
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except RetrievalOverloaded as e:
+        raise _retrieval_overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting counters: {str(e)}")
 
 
-@app.get("/heroes", response_model=List[HeroSimple], tags=["Data"])
-async def list_heroes():
+def _require_admin(authorization: Optional[str]):
+    """403 while ADMIN_TOKEN is unset, 401 unless the request carries it as a bearer token."""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if not secrets.compare_digest(authorization or "", f"Bearer {config.ADMIN_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.post("/admin/reload", response_model=IndexReloadResponse, tags=["Admin"])
+async def reload_index(
+    request: Optional[IndexReloadRequest] = None,
+    authorization: Optional[str] = Header(default=None)
+):
     """
-    Get list of all available heroes.
+    Swap in newly published indexes without restarting the server.
+    
+    With rebuild=true, a blue/green indexer build runs first (one at a
+    time: 409 while another is running). The new indexes are warmed up
+    before the swap; requests already running finish against the old ones,
+    and cached responses of the old version are dropped.
     """
+    _require_admin(authorization)
+    if not retriever:
+        raise HTTPException(status_code=503, detail="RAG retriever not initialized")
+    request = request or IndexReloadRequest()
+    
+    previous_version = retriever.index_version
+    start = time.perf_counter()
+    if request.rebuild:
+        if rebuild_lock.locked():
+            raise HTTPException(status_code=409, detail="An index rebuild is already running")
+        async with rebuild_lock:
+            try:
+                await _run_blue_green_build(request.full)
+            except RuntimeError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+    
     try:
-        with OverFastClient() as client:
-            heroes = client.get_heroes()
-            return [
-                HeroSimple(
-                    key=hero.get("key", ""),
-                    name=hero.get("name", ""),
-                    role=hero.get("role", "")
-                )
-                for hero in heroes
-            ]
+        reloaded, dropped = await _reload_index(request.force)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching heroes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reloading indexes: {str(e)}")
+    return IndexReloadResponse(
+        # The index watcher may have swapped the new build in first
+        reloaded=reloaded or retriever.index_version != previous_version,
+        index_version=retriever.index_version,
+        previous_version=previous_version,
+        seconds=time.perf_counter() - start,
+        invalidated_responses=dropped,
+    )
+
+
+def _catalog_response(request: Request, payload: Tuple[bytes, str]) -> Response:
+    """Serve a pre-serialized listing, honouring If-None-Match."""
+    if not catalog.is_loaded:
+        raise HTTPException(status_code=503, detail="Hero and map catalog not loaded yet")
+    
+    body, etag = payload
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/heroes", response_model=List[HeroSimple], tags=["Data"])
+async def list_heroes(request: Request):
+    """
+    Get list of all available heroes.
+    """
+    return _catalog_response(request, catalog.heroes_payload)
 
 
 @app.get("/maps", response_model=List[MapSimple], tags=["Data"])
-async def list_maps():
+async def list_maps(request: Request):
     """
     Get list of all available maps.
     """
-    try:
-        with OverFastClient() as client:
-            maps = client.get_maps()
-            return [
-                MapSimple(
-                    name=map_data.get("name", ""),
-                    gamemodes=map_data.get("gamemodes", []),
-                    location=map_data.get("location"),
-                )
-                for map_data in maps
-            ]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching maps: {str(e)}")
+    return _catalog_response(request, catalog.maps_payload)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 """Pydantic models for API requests and responses."""
 from typing import List, Optional
 from pydantic import BaseModel, Field
+from src.rag.schemas import HeroRecommendation
 
 
 class TeamCompositionRequest(BaseModel):
@@ -31,14 +32,6 @@ class TeamCompositionRequest(BaseModel):
         }
 
 
-class HeroRecommendation(BaseModel):
-    """Model for a single hero recommendation."""
-    
-    name: str = Field(..., description="Hero name")
-    role: str = Field(..., description="Hero role (tank, damage, support)")
-    reasoning: str = Field(..., description="Why this hero is recommended")
-
-
 class TeamCompositionResponse(BaseModel):
     """Response model for team composition suggestions."""
     
@@ -75,6 +68,10 @@ class HeroCounterRequest(BaseModel):
     """Request for hero counter information."""
     
     hero_name: str = Field(..., description="Name of the hero to counter")
+    live: bool = Field(
+        default=False,
+        description="Generate a fresh answer with the LLM instead of using the precomputed one"
+    )
     
     class Config:
         json_schema_extra = {
@@ -89,6 +86,7 @@ class HeroCounterResponse(BaseModel):
     
     hero: str = Field(..., description="The hero being countered")
     counters: str = Field(..., description="Counter suggestions and strategies")
+    source: str = Field(default="live", description="table (precomputed at index time) or live")
 
 
 class HealthResponse(BaseModel):
@@ -98,3 +96,51 @@ class HealthResponse(BaseModel):
     ollama_connected: bool
     heroes_indexed: int
     maps_indexed: int
+    checked_at: Optional[float] = Field(
+        default=None,
+        description="Unix time of the background check this snapshot comes from"
+    )
+
+
+class WarmupStep(BaseModel):
+    """Progress of one background startup step."""
+    
+    name: str
+    status: str = Field(..., description="pending, running, done, failed or skipped")
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response."""
+    
+    ready: bool
+    embedding_model_warm: bool
+    indexes_loaded: bool
+    llm_warm: bool
+    warmup: List[WarmupStep] = []
+    seconds_to_ready: Optional[float] = Field(
+        default=None,
+        description="Seconds from startup until the background warmup finished"
+    )
+
+
+class IndexReloadRequest(BaseModel):
+    """Admin request to swap in newly published indexes."""
+    
+    rebuild: bool = Field(
+        default=False,
+        description="Run a blue/green indexer build first (python -m src.rag.indexer --blue-green)"
+    )
+    full: bool = Field(default=False, description="With rebuild, re-embed every document")
+    force: bool = Field(default=False, description="Reload even if the published version is unchanged")
+
+
+class IndexReloadResponse(BaseModel):
+    """Outcome of an index reload."""
+    
+    reloaded: bool = Field(..., description="Whether a new index generation was swapped in")
+    index_version: str
+    previous_version: str
+    seconds: float
+    invalidated_responses: int = Field(default=0, description="Cached /suggest responses dropped")
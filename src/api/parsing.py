@@ -0,0 +1,252 @@
+"""Parser for the structured team composition text returned by the LLM."""
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from src.api.models import TeamCompositionResponse
+from src.rag.schemas import HeroRecommendation, TeamCompositionJSON
+
+
+# (event name, payload) emitted as soon as a piece of the response is complete
+ParseEvent = Tuple[str, Dict[str, Any]]
+
+PARSE_FAILED_NAME = "Parsing failed - see raw_response"
+
+
+class TeamCompositionParser:
+    """
+    Incremental line-based parser for RECOMMENDED TEAM / COUNTER STRATEGY /
+    KEY SYNERGIES / ALTERNATIVES responses.
+    
+    Text can be fed in arbitrary chunks (e.g. streamed LLM tokens). Each call
+    to feed() returns the events completed by that chunk:
+        - hero:        a recommended hero line was parsed
+        - strategy:    the counter strategy section ended
+        - synergies:   the synergies section ended
+        - alternative: an alternative hero line was parsed
+    """
+    
+    def __init__(self):
+        self.recommended_team: List[HeroRecommendation] = []
+        self.strategy = ""
+        self.synergies = ""
+        self.alternatives: List[str] = []
+        self.current_section: Optional[str] = None
+        self._buffer = ""
+        self._emitted = {"strategy": "", "synergies": ""}
+    
+    def feed(self, chunk: str) -> List[ParseEvent]:
+        """Consume a chunk of text and return events for every completed line."""
+        self._buffer += chunk
+        events: List[ParseEvent] = []
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            events.extend(self._process_line(line))
+        return events
+    
+    def close(self) -> List[ParseEvent]:
+        """Flush the trailing partial line and any section still open."""
+        events: List[ParseEvent] = []
+        if self._buffer:
+            events.extend(self._process_line(self._buffer))
+            self._buffer = ""
+        events.extend(self._end_section())
+        return events
+    
+    def _end_section(self) -> List[ParseEvent]:
+        """Emit the accumulated text of a free-form section when it ends."""
+        section = self.current_section
+        if section not in self._emitted:
+            return []
+        
+        text = (self.strategy if section == "strategy" else self.synergies).strip()
+        if not text or text == self._emitted[section]:
+            return []
+        self._emitted[section] = text
+        return [(section, {"text": text})]
+    
+    def _switch_section(self, section: str) -> List[ParseEvent]:
+        events = self._end_section()
+        self.current_section = section
+        return events
+    
+    def _process_line(self, line: str) -> List[ParseEvent]:
+        line = line.strip()
+        if not line:
+            return []
+        
+        # Detect sections
+        if "RECOMMENDED TEAM" in line.upper():
+            return self._switch_section("team")
+        elif "COUNTER STRATEGY" in line.upper():
+            return self._switch_section("strategy")
+        elif "SYNERGIES" in line.upper() or "KEY SYNERGIES" in line.upper():
+            return self._switch_section("synergies")
+        elif "ALTERNATIVE" in line.upper():
+            return self._switch_section("alternatives")
+        
+        # Extract content based on section
+        if self.current_section == "team":
+            # Look for pattern: "Role: HeroName - reasoning" or "Role: HeroName – reasoning"
+            # Handle both regular dash (-) and em dash (–)
+            if ':' in line and ('-' in line or '–' in line):
+                parts = line.split(':', 1)
+                if len(parts) == 2:
+                    role = parts[0].strip().lower()
+                    if role in ['tank', 'damage', 'support']:
+                        # Try to split by em dash first, then regular dash
+                        hero_parts = None
+                        if '–' in parts[1]:
+                            hero_parts = parts[1].split('–', 1)
+                        elif '-' in parts[1]:
+                            hero_parts = parts[1].split('-', 1)
+                        
+                        if hero_parts:
+                            hero_name = hero_parts[0].strip()
+                            reasoning = hero_parts[1].strip() if len(hero_parts) > 1 else "Strategic pick"
+                            
+                            hero = HeroRecommendation(
+                                name=hero_name,
+                                role=role,
+                                reasoning=reasoning
+                            )
+                            self.recommended_team.append(hero)
+                            return [("hero", hero.model_dump())]
+        
+        elif self.current_section == "strategy":
+            if line and not any(x in line.upper() for x in ["COUNTER STRATEGY", "STRATEGY:"]):
+                self.strategy += line + " "
+        
+        elif self.current_section == "synergies":
+            if line and not any(x in line.upper() for x in ["SYNERGIES", "KEY SYNERGIES"]):
+                self.synergies += line + " "
+        
+        elif self.current_section == "alternatives":
+            # Handle multiple formats:
+            # "- HeroName (Role): description" or "- Role: HeroName - description"
+            if line.startswith('-'):
+                hero_name = None
+                # Format 1: "- D.Va (Tank): description"
+                if '(' in line and ')' in line:
+                    hero_with_role = line.split(':', 1)[0]  # Get "- D.Va (Tank)"
+                    hero_name = hero_with_role.split('(')[0].replace('-', '').strip()
+                # Format 2: "- Role: HeroName - description"
+                elif ':' in line:
+                    parts = line.split(':', 1)
+                    if len(parts) == 2:
+                        after_role = parts[1].strip()
+                        # Split by dash (regular or em dash)
+                        if '–' in after_role:
+                            hero_desc = after_role.split('–', 1)
+                        elif '-' in after_role:
+                            hero_desc = after_role.split('-', 1)
+                        else:
+                            hero_desc = [after_role]
+                        
+                        hero_name = hero_desc[0].strip()
+                
+                if hero_name and len(hero_name) < 30:
+                    self.alternatives.append(hero_name)
+                    return [("alternative", {"name": hero_name})]
+        
+        return []
+    
+    def result(self, raw_response: str) -> TeamCompositionResponse:
+        """Build the final response, falling back to placeholders for empty sections."""
+        recommended_team = self.recommended_team
+        strategy = self.strategy
+        synergies = self.synergies
+        
+        # Fallback if parsing failed
+        if not recommended_team:
+            recommended_team = [
+                HeroRecommendation(
+                    name=PARSE_FAILED_NAME,
+                    role="various",
+                    reasoning="Check raw_response field for full recommendation"
+                )
+            ]
+        
+        if not strategy.strip():
+            strategy = "Check raw_response for detailed strategy"
+        
+        if not synergies.strip():
+            synergies = "Check raw_response for team synergies"
+        
+        return TeamCompositionResponse(
+            recommended_team=recommended_team,
+            strategy=strategy.strip(),
+            synergies=synergies.strip(),
+            alternatives=self.alternatives,
+            raw_response=raw_response,
+        )
+
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a ```json ... ``` wrapper some models add despite instructions."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_team_composition_json(raw_response: str) -> Optional[TeamCompositionResponse]:
+    """
+    Validate a JSON-mode response straight into a TeamCompositionResponse.
+    
+    Returns:
+        The response, or None if the text is not valid JSON for the schema
+    """
+    try:
+        data = TeamCompositionJSON.model_validate_json(_strip_code_fence(raw_response))
+    except ValidationError:
+        return None
+    
+    return TeamCompositionResponse(
+        recommended_team=[
+            hero.model_copy(update={"role": hero.role.strip().lower()})
+            for hero in data.recommended_team
+        ],
+        strategy=data.strategy.strip(),
+        synergies=data.synergies.strip(),
+        alternatives=data.alternatives,
+        raw_response=raw_response,
+    )
+
+
+def parse_team_composition(raw_response: str, output_format: str = "text") -> TeamCompositionResponse:
+    """
+    Parse a RECOMMENDED TEAM / COUNTER STRATEGY / KEY SYNERGIES / ALTERNATIVES
+    response into a TeamCompositionResponse.
+    
+    With output_format="json" the response is validated against the JSON
+    schema first; the text parser is only the fallback.
+    
+    Falls back to placeholder values pointing at raw_response when a section
+    cannot be parsed.
+    """
+    if output_format == "json":
+        response = parse_team_composition_json(raw_response)
+        if response is not None:
+            return response
+    
+    parser = TeamCompositionParser()
+    parser.feed(raw_response)
+    parser.close()
+    return parser.result(raw_response)
+
+
+def is_parsed(response: TeamCompositionResponse) -> bool:
+    """True if the recommended team was actually extracted from the LLM text."""
+    return bool(response.recommended_team) and response.recommended_team[0].name != PARSE_FAILED_NAME
+
+
+def response_events(response: TeamCompositionResponse) -> List[ParseEvent]:
+    """The parse events a streamed response would have produced."""
+    events: List[ParseEvent] = []
+    if is_parsed(response):
+        events.extend(("hero", hero.model_dump()) for hero in response.recommended_team)
+    events.append(("strategy", {"text": response.strategy}))
+    events.append(("synergies", {"text": response.synergies}))
+    events.extend(("alternative", {"name": name}) for name in response.alternatives or [])
+    return events
@@ -0,0 +1,55 @@
+"""Background startup steps and their progress."""
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from src.api.models import WarmupStep
+
+
+class Warmup:
+    """
+    Tracks the warmup steps that run after the server starts accepting
+    connections, for /health/ready and the startup timing report.
+    """
+    
+    def __init__(self, steps: Sequence[str]):
+        self.started_at = time.perf_counter()
+        self.steps: Dict[str, WarmupStep] = {
+            name: WarmupStep(name=name, status="pending") for name in steps
+        }
+        self.seconds_to_ready: Optional[float] = None
+    
+    @property
+    def done(self) -> bool:
+        return self.seconds_to_ready is not None
+    
+    @asynccontextmanager
+    async def step(self, name: str) -> AsyncIterator[None]:
+        """Time one step and record whether it succeeded."""
+        step = self.steps[name]
+        step.status = "running"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            step.status = "failed"
+            step.error = str(e)
+            raise
+        else:
+            step.status = "done"
+        finally:
+            step.seconds = round(time.perf_counter() - start, 3)
+    
+    def skip(self, name: str):
+        self.steps[name].status = "skipped"
+    
+    def finish(self):
+        """Mark the warmup complete and print the timing report."""
+        self.seconds_to_ready = round(time.perf_counter() - self.started_at, 3)
+        timings = ", ".join(
+            f"{step.name} {step.seconds:.2f}s" if step.seconds is not None else f"{step.name} {step.status}"
+            for step in self.steps.values()
+        )
+        print(f"✓ Warmup finished {self.seconds_to_ready:.2f}s after startup ({timings})")
+    
+    def report(self) -> List[WarmupStep]:
+        return list(self.steps.values())
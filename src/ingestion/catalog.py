@@ -0,0 +1,136 @@
+"""In-memory hero and map catalog built from ingested OverFast data."""
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.ingestion.overfast_client import OverFastClient
+from src.utils.config import config
+
+
+class Catalog:
+    """
+    Hero and map listings loaded from the raw JSON written by MarkdownGenerator.
+    
+    Listings are sorted, serialized to JSON bytes and given an ETag once per
+    load, so serving them is a dictionary lookup. load() is cheap to call
+    repeatedly: it only re-reads files when data/raw changed.
+    """
+    
+    def __init__(self, raw_path: Optional[str] = None):
+        self.raw_path = Path(raw_path or config.DATA_RAW_PATH)
+        
+        self.heroes: List[Dict[str, Any]] = []
+        self.maps: List[Dict[str, Any]] = []
+        # (serialized JSON, ETag) pairs, replaced as a unit on reload
+        self.heroes_payload: Tuple[bytes, str] = (b"[]", self._etag(b"[]"))
+        self.maps_payload: Tuple[bytes, str] = (b"[]", self._etag(b"[]"))
+        
+        self.source = "empty"
+        self.loaded_at: Optional[float] = None
+        self._fingerprint: Optional[Tuple] = None
+    
+    @staticmethod
+    def _etag(payload: bytes) -> str:
+        return '"' + hashlib.sha1(payload).hexdigest()[:16] + '"'
+    
+    @staticmethod
+    def _serialize(items: List[Dict[str, Any]]) -> bytes:
+        return json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self.heroes or self.maps)
+    
+    def _scan(self) -> Tuple:
+        """Fingerprint of the raw JSON files (name, size, mtime)."""
+        if not self.raw_path.exists():
+            return ()
+        return tuple(
+            (path.name, stat.st_size, stat.st_mtime_ns)
+            for path in sorted(self.raw_path.glob("*.json"))
+            for stat in [path.stat()]
+        )
+    
+    def _publish(self, heroes: List[Dict[str, Any]], maps: List[Dict[str, Any]], source: str):
+        """Swap in new listings with their precomputed payloads."""
+        heroes = sorted(heroes, key=lambda hero: hero["key"])
+        maps = sorted(maps, key=lambda map_data: map_data["name"].lower())
+        
+        heroes_json = self._serialize(heroes)
+        maps_json = self._serialize(maps)
+        
+        self.heroes_payload = (heroes_json, self._etag(heroes_json))
+        self.maps_payload = (maps_json, self._etag(maps_json))
+        self.heroes = heroes
+        self.maps = maps
+        self.source = source
+        self.loaded_at = time.time()
+    
+    @staticmethod
+    def _hero_entry(key: str, hero_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "key": hero_data.get("key", key),
+            "name": hero_data.get("name", key),
+            "role": hero_data.get("role", ""),
+        }
+    
+    @staticmethod
+    def _map_entry(map_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": map_data.get("name", ""),
+            "gamemodes": map_data.get("gamemodes", []),
+            "location": map_data.get("location"),
+        }
+    
+    def load(self) -> bool:
+        """
+        Load listings from data/raw if the files changed since the last load.
+        
+        Returns:
+            True if the catalog was (re)loaded
+        """
+        fingerprint = self._scan()
+        if fingerprint == self._fingerprint:
+            return False
+        
+        heroes = []
+        maps = []
+        for path in sorted(self.raw_path.glob("*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠ Skipping unreadable catalog file {path.name}: {e}")
+                continue
+            
+            if path.stem.startswith("hero_"):
+                heroes.append(self._hero_entry(path.stem[len("hero_"):], data))
+            elif path.stem.startswith("map_"):
+                maps.append(self._map_entry(data))
+        
+        self._fingerprint = fingerprint
+        if heroes or maps:
+            self._publish(heroes, maps, source="disk")
+            print(f"✓ Catalog loaded from {self.raw_path} ({len(heroes)} heroes, {len(maps)} maps)")
+            return True
+        return False
+    
+    def load_from_overfast(self) -> bool:
+        """Fetch listings from the OverFast API (fallback when nothing is ingested)."""
+        with OverFastClient() as client:
+            heroes = [self._hero_entry(hero.get("key", ""), hero) for hero in client.get_heroes()]
+            maps = [self._map_entry(map_data) for map_data in client.get_maps()]
+        
+        self._publish(heroes, maps, source="overfast")
+        print(f"✓ Catalog loaded from OverFast API ({len(heroes)} heroes, {len(maps)} maps)")
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Catalog size and provenance."""
+        return {
+            "source": self.source,
+            "heroes": len(self.heroes),
+            "maps": len(self.maps),
+            "loaded_at": self.loaded_at,
+        }
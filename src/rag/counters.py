@@ -0,0 +1,219 @@
+"""Precomputed hero counter answers served by /counter without an LLM call."""
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from src.rag.entities import document_title, entity_key as hero_lookup_key
+from src.utils.config import config
+
+TABLE_FORMAT_VERSION = 1
+
+
+def counter_query(hero_name: str) -> str:
+    """Question asked to the heroes index for a hero's counters."""
+    return f"What heroes counter {hero_name}? Provide specific counter picks and strategies."
+
+
+def _hash_file(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+class CounterTable:
+    """
+    Counter answers for every hero in data/heroes, stored as one JSON file.
+    
+    Each entry remembers the content hash of the hero documents its answer
+    was synthesized from, so a rebuild only regenerates entries whose
+    sources changed. Lookups are a dictionary access; at most every
+    check_interval seconds (default: INDEX_RELOAD_POLL_SECONDS, 0 = only
+    on explicit load() calls after the first lookup) one of them checks the
+    file's mtime and re-reads it if it changed (e.g. after a rebuild while
+    serving).
+    """
+    
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None):
+        self.path = Path(path or config.COUNTER_TABLE_PATH)
+        self.check_interval = config.INDEX_RELOAD_POLL_SECONDS if check_interval is None else check_interval
+        self._checked_at: Optional[float] = None
+        self.model: Optional[str] = None
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._mtime: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def load(self) -> bool:
+        """
+        (Re)load the table if the file changed since the last load.
+        
+        Returns:
+            True if the table was (re)loaded
+        """
+        self._checked_at = time.monotonic()
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read counter table {self.path}: {e}")
+            return False
+        
+        self._mtime = mtime
+        if data.get("version") != TABLE_FORMAT_VERSION:
+            print(f"⚠ Ignoring counter table {self.path}: unsupported format")
+            return False
+        
+        self.model = data.get("model")
+        self._set_entries(data.get("entries", {}))
+        return True
+    
+    def _set_entries(self, entries: Dict[str, Dict[str, Any]]):
+        aliases = {}
+        for key, entry in entries.items():
+            for alias in [key, entry["hero"]]:
+                aliases[hero_lookup_key(alias)] = key
+        self._aliases = aliases
+        self.entries = entries
+    
+    def get(self, hero_name: str) -> Optional[Dict[str, Any]]:
+        """Entry for a hero name (any spelling hero_lookup_key accepts), or None."""
+        if self._checked_at is None or (
+            self.check_interval > 0 and time.monotonic() - self._checked_at >= self.check_interval
+        ):
+            self.load()
+        key = self._aliases.get(hero_lookup_key(hero_name))
+        entry = self.entries.get(key) if key else None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+    
+    def stats(self) -> Dict[str, Any]:
+        """Table size and lookup counters."""
+        return {
+            "entries": len(self.entries),
+            "model": self.model,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+    
+    def save(self):
+        """Write the table atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": TABLE_FORMAT_VERSION,
+            "model": self.model,
+            "generated_at": time.time(),
+            "entries": self.entries,
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+    
+    @staticmethod
+    def _is_fresh(entry: Dict[str, Any], query: str, doc_hashes: Dict[str, str]) -> bool:
+        """True if the entry's question and every source document are unchanged."""
+        if entry.get("query") != query:
+            return False
+        sources = entry.get("sources", {})
+        return bool(sources) and all(doc_hashes.get(name) == digest for name, digest in sources.items())
+    
+    def build(self, retriever, heroes_path: Optional[str] = None, force: bool = False) -> Dict[str, int]:
+        """
+        Generate counter answers for every hero document, reusing fresh entries.
+        
+        Args:
+            retriever: RAGRetriever used to answer the counter question
+            heroes_path: Directory of hero markdown files
+            force: Regenerate every entry
+        
+        Returns:
+            Number of entries generated, reused and removed
+        """
+        self.load()
+        heroes_dir = Path(heroes_path or config.DATA_HEROES_PATH)
+        hero_files = sorted(heroes_dir.glob("*.md"))
+        doc_hashes = {path.name: _hash_file(path) for path in hero_files}
+        
+        # A different LLM gives different answers: start over
+        if self.model != retriever.llm_model:
+            force = True
+        
+        entries: Dict[str, Dict[str, Any]] = {}
+        summary = {"generated": 0, "reused": 0, "removed": 0}
+        for path in hero_files:
+            key = path.stem
+            name = document_title(path)
+            query = counter_query(name)
+            
+            entry = self.entries.get(key)
+            if entry and not force and self._is_fresh(entry, query, doc_hashes):
+                entries[key] = entry
+                summary["reused"] += 1
+                continue
+            
+            answer, sources = retriever.query_heroes_with_sources(query, top_k=5, operation="counter_table")
+            # The hero's own document always counts as a source
+            source_names = set(sources) | {path.name}
+            entries[key] = {
+                "hero": name,
+                "counters": answer,
+                "query": query,
+                "sources": {source: doc_hashes[source] for source in sorted(source_names) if source in doc_hashes},
+                "generated_at": time.time(),
+            }
+            summary["generated"] += 1
+            print(f"  ✓ {name}")
+        
+        summary["removed"] = len(set(self.entries) - set(entries))
+        self.model = retriever.llm_model
+        self._set_entries(entries)
+        self.save()
+        return summary
+
+
+def build_counter_table(force: bool = False, path: Optional[str] = None) -> Tuple[CounterTable, Dict[str, int]]:
+    """Build or refresh the counter table from the current indexes."""
+    from src.rag.retriever import RAGRetriever
+    
+    retriever = RAGRetriever()
+    try:
+        table = CounterTable(path)
+        summary = table.build(retriever, force=force)
+    finally:
+        retriever.close()
+    return table, summary
+
+
+def main():
+    """Main entry point for building the counter table."""
+    parser = argparse.ArgumentParser(description="Precompute /counter answers for every hero")
+    parser.add_argument("--force", action="store_true", help="Regenerate every entry")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Overcoach AI - Counter Table")
+    print("=" * 60)
+    
+    table, summary = build_counter_table(force=args.force)
+    print(f"\n✓ Counter table written to {table.path}")
+    print(f"Generated: {summary['generated']}, reused: {summary['reused']}, removed: {summary['removed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""Shared embedding model for indexing and retrieval."""
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+from src.utils.config import config
+
+EMBED_BACKENDS = ("torch", "onnx", "ollama")
+
+# Instructions the BGE models were trained with (what HuggingFaceEmbedding adds)
+_QUERY_INSTRUCTIONS = {
+    "BAAI/bge-small-en-v1.5": "Represent this question for searching relevant passages: ",
+}
+
+_embed_model: Optional[BaseEmbedding] = None
+_loaded_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """
+    Sentence embeddings from an ONNX export, run with ONNX Runtime on CPU.
+    
+    Loads tokenizer.json and the ONNX file from a Hugging Face repo or a
+    local directory (source); no torch. model_name names the weights the
+    export was made from, so indexes and caches built with the torch
+    backend stay valid. The inference session is created on first
+    use in each process (ONNX Runtime thread pools do not survive a fork),
+    with config.EMBED_THREADS intra-op threads.
+    """
+    
+    source: str = Field(description="Hugging Face repo or local directory of the export.")
+    file_name: str = Field(description="ONNX file inside the repo or directory.")
+    pooling: str = Field(default="cls", description="'cls' or 'mean'.")
+    max_length: int = Field(default=512, description="Maximum tokens per input.")
+    query_instruction: str = Field(default="", description="Prefix added to queries.")
+    text_instruction: str = Field(default="", description="Prefix added to documents.")
+    
+    _model_path: str = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+    _session: Any = PrivateAttr(default=None)
+    _session_pid: Optional[int] = PrivateAttr(default=None)
+    _session_lock: Any = PrivateAttr()
+    
+    def __init__(
+        self,
+        model_name: str,
+        file_name: str,
+        source: Optional[str] = None,
+        pooling: str = "cls",
+        max_length: int = 512,
+        query_instruction: str = "",
+        text_instruction: str = "",
+        embed_batch_size: int = 32
+    ):
+        from tokenizers import Tokenizer
+        
+        source = source or model_name
+        super().__init__(
+            model_name=model_name,
+            source=source,
+            file_name=file_name,
+            pooling=pooling,
+            max_length=max_length,
+            query_instruction=query_instruction,
+            text_instruction=text_instruction,
+            embed_batch_size=embed_batch_size,
+        )
+        if os.path.isdir(source):
+            tokenizer_path = os.path.join(source, "tokenizer.json")
+            self._model_path = os.path.join(source, file_name)
+        else:
+            from huggingface_hub import hf_hub_download
+            
+            tokenizer_path = hf_hub_download(source, "tokenizer.json")
+            self._model_path = hf_hub_download(source, file_name)
+        
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length)
+        self._tokenizer.enable_padding()
+        self._session_lock = threading.Lock()
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+    
+    def _get_session(self) -> Any:
+        """This process's inference session, created on first use."""
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                import onnxruntime
+                
+                options = onnxruntime.SessionOptions()
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                if config.EMBED_THREADS:
+                    options.intra_op_num_threads = config.EMBED_THREADS
+                self._session = onnxruntime.InferenceSession(
+                    self._model_path,
+                    sess_options=options,
+                    providers=["CPUExecutionProvider"],
+                )
+                self._session_pid = os.getpid()
+            return self._session
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Normalized embeddings of one padded batch."""
+        session = self._get_session()
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if any(model_input.name == "token_type_ids" for model_input in session.get_inputs()):
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        
+        hidden = session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.tolist()
+    
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([self.query_instruction + query])[0]
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+    
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([self.text_instruction + text])[0]
+    
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([self.text_instruction + text for text in texts])
+
+
+class OllamaEmbedding(BaseEmbedding):
+    """
+    Embeddings computed by an Ollama server's /api/embed endpoint.
+    
+    Nothing is loaded in-process; batches are sent as one request.
+    """
+    
+    base_url: str = Field(description="Ollama server URL.")
+    keep_alive: str = Field(default="30m", description="How long Ollama keeps the model loaded.")
+    query_instruction: str = Field(default="", description="Prefix added to queries.")
+    text_instruction: str = Field(default="", description="Prefix added to documents.")
+    
+    _client: Any = PrivateAttr()
+    _async_client: Any = PrivateAttr()
+    
+    def __init__(
+        self,
+        model_name: str,
+        base_url: str,
+        keep_alive: str = "30m",
+        query_instruction: str = "",
+        text_instruction: str = "",
+        request_timeout: float = 60.0,
+        embed_batch_size: int = 32
+    ):
+        from ollama import AsyncClient, Client
+        
+        super().__init__(
+            model_name=model_name,
+            base_url=base_url,
+            keep_alive=keep_alive,
+            query_instruction=query_instruction,
+            text_instruction=text_instruction,
+            embed_batch_size=embed_batch_size,
+        )
+        self._client = Client(host=base_url, timeout=request_timeout)
+        self._async_client = AsyncClient(host=base_url, timeout=request_timeout)
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "OllamaEmbedding"
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        response = self._client.embed(model=self.model_name, input=texts, keep_alive=self.keep_alive)
+        return [list(vector) for vector in response["embeddings"]]
+    
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([self.query_instruction + query])[0]
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        response = await self._async_client.embed(
+            model=self.model_name,
+            input=[self.query_instruction + query],
+            keep_alive=self.keep_alive,
+        )
+        return list(response["embeddings"][0])
+    
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([self.text_instruction + text])[0]
+    
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([self.text_instruction + text for text in texts])
+
+
+def create_embed_model(backend: Optional[str] = None) -> BaseEmbedding:
+    """
+    Build a new embedding model.
+    
+    Args:
+        backend: "torch" (sentence-transformers), "onnx" (ONNX Runtime on
+            CPU) or "ollama" (remote embed endpoint); defaults to
+            config.EMBED_BACKEND
+    
+    Raises:
+        ValueError: Unknown backend
+    """
+    backend = backend or config.EMBED_BACKEND
+    if backend == "torch":
+        # Imported here: pulls in torch and sentence-transformers
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        
+        if config.EMBED_THREADS:
+            import torch
+            torch.set_num_threads(config.EMBED_THREADS)
+        return HuggingFaceEmbedding(
+            model_name=config.EMBED_MODEL,
+            query_instruction=config.EMBED_QUERY_INSTRUCTION,
+            text_instruction=config.EMBED_TEXT_INSTRUCTION,
+        )
+    
+    if backend == "onnx":
+        return OnnxEmbedding(
+            model_name=config.EMBED_MODEL,
+            file_name=config.EMBED_ONNX_FILE,
+            source=config.EMBED_ONNX_MODEL,
+            query_instruction=config.EMBED_QUERY_INSTRUCTION or _QUERY_INSTRUCTIONS.get(config.EMBED_MODEL, ""),
+            text_instruction=config.EMBED_TEXT_INSTRUCTION or "",
+        )
+    
+    if backend == "ollama":
+        return OllamaEmbedding(
+            model_name=config.OLLAMA_EMBED_MODEL,
+            base_url=config.OLLAMA_BASE_URL,
+            keep_alive=config.OLLAMA_KEEP_ALIVE,
+            query_instruction=config.EMBED_QUERY_INSTRUCTION or "",
+            text_instruction=config.EMBED_TEXT_INSTRUCTION or "",
+        )
+    
+    raise ValueError(f"Unknown embedding backend {backend!r} (expected one of {', '.join(EMBED_BACKENDS)})")
+
+
+def get_embed_model() -> BaseEmbedding:
+    """
+    Return the process-wide embedding model, loading it on first use.
+    
+    When the model is loaded before workers fork (see gunicorn.conf.py), each
+    worker gets it from here instead of loading its own copy, and the weights
+    stay shared copy-on-write.
+    """
+    global _embed_model, _loaded_pid
+    with _lock:
+        if _embed_model is None:
+            _embed_model = create_embed_model()
+            _loaded_pid = os.getpid()
+        return _embed_model
+
+
+def embed_model_inherited() -> bool:
+    """True if the model was loaded by a parent process before forking."""
+    return _loaded_pid is not None and _loaded_pid != os.getpid()
+
+
+def embedding_cache_file(directory: str, model_name: str) -> str:
+    """Cache file for one model inside the cache directory."""
+    slug = re.sub(r"[^0-9A-Za-z._-]+", "_", model_name)
+    return str(Path(directory) / f"{slug}.npz")
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Query-embedding memo in front of another embedding model.
+    
+    Query embeddings are kept by exact text in a bounded LRU, so repeated
+    templated queries skip the model entirely. Document embeddings are passed
+    through uncached. With a path, the cache is loaded from and saved to a
+    single .npz file (texts plus a float32 matrix) that records the model
+    name; a file written by another model is ignored.
+    """
+    
+    _model: BaseEmbedding = PrivateAttr()
+    _max_entries: int = PrivateAttr()
+    _path: Optional[str] = PrivateAttr()
+    _entries: "OrderedDict[str, List[float]]" = PrivateAttr()
+    _lock: Any = PrivateAttr()
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+    _evictions: int = PrivateAttr(default=0)
+    
+    def __init__(self, model: BaseEmbedding, max_entries: int = 2048, path: Optional[str] = None):
+        super().__init__(model_name=model.model_name, embed_batch_size=model.embed_batch_size)
+        self._model = model
+        self._max_entries = max_entries
+        self._path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+    
+    @property
+    def model(self) -> BaseEmbedding:
+        """The wrapped embedding model."""
+        return self._model
+    
+    def _lookup(self, query: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(query)
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(query)
+            self._hits += 1
+            return embedding
+    
+    def _store(self, query: str, embedding: List[float]):
+        with self._lock:
+            self._entries[query] = embedding
+            self._entries.move_to_end(query)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+    
+    def _get_query_embedding(self, query: str) -> List[float]:
+        embedding = self._lookup(query)
+        if embedding is None:
+            embedding = self._model.get_query_embedding(query)
+            self._store(query, embedding)
+        return embedding
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        embedding = self._lookup(query)
+        if embedding is None:
+            embedding = await self._model.aget_query_embedding(query)
+            self._store(query, embedding)
+        return embedding
+    
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._model.get_text_embedding(text)
+    
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._model.get_text_embedding_batch(texts)
+    
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await self._model.aget_text_embedding(text)
+    
+    def load(self) -> int:
+        """Load persisted entries for this model; returns how many were loaded."""
+        if not self._path or not os.path.exists(self._path):
+            return 0
+        try:
+            with np.load(self._path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    return 0
+                texts = data["texts"].tolist()
+                vectors = data["vectors"]
+        except Exception as e:
+            print(f"⚠ Could not load embedding cache {self._path}: {e}")
+            return 0
+        
+        with self._lock:
+            # Most recently used entries were saved last
+            for text, vector in zip(texts[-self._max_entries:], vectors[-self._max_entries:]):
+                self._entries[text] = vector.tolist()
+        return len(self._entries)
+    
+    def save(self):
+        """Write the cache atomically to its file (no-op without a path)."""
+        if not self._path:
+            return
+        with self._lock:
+            texts = list(self._entries)
+            vectors = list(self._entries.values())
+        if not texts:
+            return
+        
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                model_name=np.array(self.model_name),
+                texts=np.array(texts),
+                vectors=np.asarray(vectors, dtype=np.float32),
+            )
+        os.replace(tmp_path, self._path)
+    
+    def clear(self):
+        """Drop every in-memory entry."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy."""
+        lookups = self._hits + self._misses
+        return {
+            "model": self.model_name,
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "persistent": self._path is not None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "evictions": self._evictions,
+        }
@@ -0,0 +1,218 @@
+"""Direct lookup of the hero and map documents named in a request."""
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from llama_index.core.schema import NodeWithScore, TextNode
+from src.utils.config import config
+
+# Community nicknames -> OverFast hero key (names and keys are matched anyway)
+HERO_ALIASES: Dict[str, List[str]] = {
+    "baptiste": ["bap"],
+    "brigitte": ["brig"],
+    "cassidy": ["mccree", "cass"],
+    "doomfist": ["doom"],
+    "dva": ["hana song"],
+    "junker-queen": ["jq", "queen"],
+    "kiriko": ["kiri"],
+    "lifeweaver": ["lw"],
+    "ramattra": ["ram"],
+    "reinhardt": ["rein"],
+    "roadhog": ["hog"],
+    "sigma": ["sig"],
+    "soldier-76": ["soldier", "76", "s76"],
+    "sojourn": ["soj"],
+    "symmetra": ["sym"],
+    "torbjorn": ["torb"],
+    "widowmaker": ["widow"],
+    "wrecking-ball": ["ball", "hammond", "wrecking ball"],
+    "zenyatta": ["zen"],
+}
+
+
+# Role slots of a 5v5 team
+ROLE_SLOTS: Dict[str, int] = {"tank": 1, "damage": 2, "support": 2}
+
+_HERO_FIELD = re.compile(r"^- \*\*(\w+)\*\*: (.+)$", re.MULTILINE)
+
+
+def hero_fields(text: str) -> Dict[str, str]:
+    """The "- **Field**: value" lines of a hero document, keyed by lower-cased field."""
+    return {field.lower(): value.strip() for field, value in _HERO_FIELD.findall(text)}
+
+
+def entity_key(name: str) -> str:
+    """Normalize a name so "Soldier: 76", "soldier-76" and "Lúcio"/"lucio" match."""
+    name = unicodedata.normalize("NFKD", name.casefold())
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return re.sub(r"[^0-9a-z]", "", name)
+
+
+def document_title(path: Path) -> str:
+    """Display name from the "# Name" header of a generated markdown file."""
+    with open(path, encoding="utf-8") as f:
+        first_line = f.readline()
+    return first_line.lstrip("# ").strip() or path.stem
+
+
+def _text_title(text: str, default: str) -> str:
+    """document_title() of markdown already read into memory."""
+    return text.partition("\n")[0].lstrip("# ").strip() or default
+
+
+class EntityIndex:
+    """
+    Hero and map documents from data/, addressable by any spelling of their name.
+    
+    Every document written by MarkdownGenerator is kept as one node, keyed
+    by file stem; hero keys, display names, HERO_ALIASES and map names all
+    resolve to that key, so a named entity is a dictionary lookup instead of
+    a vector search. load() only re-reads files when the directories changed;
+    an index made by from_documents() (e.g. out of an index snapshot) never
+    touches data/.
+    """
+    
+    def __init__(self, heroes_path: Optional[str] = None, maps_path: Optional[str] = None):
+        self.paths = {
+            "heroes": Path(heroes_path or config.DATA_HEROES_PATH),
+            "maps": Path(maps_path or config.DATA_MAPS_PATH),
+        }
+        # collection -> {document key -> node}, collection -> {lookup key -> document key}
+        self._nodes: Dict[str, Dict[str, TextNode]] = {"heroes": {}, "maps": {}}
+        self._aliases: Dict[str, Dict[str, str]] = {"heroes": {}, "maps": {}}
+        # hero key -> role
+        self._roles: Dict[str, str] = {}
+        self._fingerprint: Optional[Tuple] = None
+        self._static = False
+        self.hits = 0
+        self.misses = 0
+    
+    def _scan(self) -> Tuple:
+        """Fingerprint of the markdown files (name, size, mtime)."""
+        return tuple(
+            (collection, path.name, stat.st_size, stat.st_mtime_ns)
+            for collection, directory in self.paths.items()
+            for path in sorted(directory.glob("*.md"))
+            for stat in [path.stat()]
+        )
+    
+    @classmethod
+    def from_documents(cls, documents: Dict[str, Dict[str, str]]) -> "EntityIndex":
+        """
+        Index of documents already in memory, never reloaded from data/.
+        
+        Args:
+            documents: collection -> {file name -> markdown}, as returned by
+                read_documents()
+        """
+        index = cls()
+        index._build(documents)
+        index._static = True
+        return index
+    
+    def read_documents(self) -> Dict[str, Dict[str, str]]:
+        """Markdown of every document, by collection and file name."""
+        return {
+            collection: {
+                path.name: path.read_text(encoding="utf-8")
+                for path in sorted(directory.glob("*.md"))
+            }
+            for collection, directory in self.paths.items()
+        }
+    
+    def load(self) -> bool:
+        """
+        (Re)load documents if the markdown files changed since the last load.
+        
+        Returns:
+            True if the index was (re)loaded
+        """
+        if self._static:
+            return False
+        fingerprint = self._scan()
+        if fingerprint == self._fingerprint:
+            return False
+        
+        self._build(self.read_documents())
+        self._fingerprint = fingerprint
+        return True
+    
+    def _build(self, documents: Dict[str, Dict[str, str]]):
+        nodes: Dict[str, Dict[str, TextNode]] = {"heroes": {}, "maps": {}}
+        aliases: Dict[str, Dict[str, str]] = {"heroes": {}, "maps": {}}
+        roles: Dict[str, str] = {}
+        for collection, files in documents.items():
+            for file_name, text in sorted(files.items()):
+                key = Path(file_name).stem
+                nodes[collection][key] = TextNode(
+                    id_=f"{collection}:{key}",
+                    text=text,
+                    metadata={"file_name": file_name, "entity": key},
+                )
+                names = [key, _text_title(text, key)]
+                if collection == "heroes":
+                    names += HERO_ALIASES.get(key, [])
+                    role = hero_fields(text).get("role", "").lower()
+                    if role in ROLE_SLOTS:
+                        roles[key] = role
+                for name in names:
+                    aliases[collection].setdefault(entity_key(name), key)
+        
+        self._nodes = nodes
+        self._aliases = aliases
+        self._roles = roles
+    
+    def resolve(self, collection: str, name: str) -> Optional[str]:
+        """Document key for a hero or map name, or None if it isn't known."""
+        return self._aliases[collection].get(entity_key(name or ""))
+    
+    def open_roles(self, team: Iterable[str]) -> Optional[List[str]]:
+        """
+        Roles a partial team still has free slots for (see ROLE_SLOTS).
+        
+        Returns:
+            The open roles, or None when that doesn't narrow anything down:
+            no known hero in the team, every role still open, or none left
+        """
+        counts = dict.fromkeys(ROLE_SLOTS, 0)
+        for name in team:
+            role = self._roles.get(self.resolve("heroes", name) or "")
+            if role:
+                counts[role] += 1
+        open_roles = [role for role, slots in ROLE_SLOTS.items() if counts[role] < slots]
+        if not any(counts.values()) or len(open_roles) in (0, len(ROLE_SLOTS)):
+            return None
+        return open_roles
+    
+    def fetch(self, collection: str, names: Iterable[str]) -> List[NodeWithScore]:
+        """
+        Documents for the given names, in order, once each.
+        
+        Args:
+            collection: "heroes" or "maps"
+            names: Names as typed by the user (unknown names are skipped)
+        
+        Returns:
+            One node per distinct known entity, scored 1.0
+        """
+        nodes = []
+        seen = set()
+        for name in names:
+            key = self.resolve(collection, name)
+            if key is None:
+                self.misses += 1
+                continue
+            self.hits += 1
+            if key not in seen:
+                seen.add(key)
+                nodes.append(NodeWithScore(node=self._nodes[collection][key], score=1.0))
+        return nodes
+    
+    def stats(self) -> Dict[str, Any]:
+        """Document counts and lookup counters."""
+        return {
+            "heroes": len(self._nodes["heroes"]),
+            "maps": len(self._nodes["maps"]),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,100 @@
+"""Section-aware node parser for the hero markdown written by MarkdownGenerator."""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from llama_index.core.bridge.pydantic import Field
+from llama_index.core.node_parser import NodeParser, SentenceSplitter
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.schema import BaseNode
+from llama_index.core.utils import get_tqdm_iterable
+from src.rag.entities import hero_fields
+
+# Metadata attached to every hero node (used by retrieval filters)
+HERO_METADATA_KEYS = ["hero", "role", "section", "ability"]
+
+# Ability icon lines: URLs only, nothing worth embedding
+_IMAGE_LINE = re.compile(r"^!\[[^\]]*\]\([^)]*\)\s*$", re.MULTILINE)
+
+
+def section_key(heading: str) -> str:
+    """Metadata value of a "## Heading" ("Basic Information" -> "basic_information")."""
+    return re.sub(r"[^0-9a-z]+", "_", heading.casefold()).strip("_")
+
+
+def split_hero_sections(text: str) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Split a hero document into (section heading, ability name, body) parts.
+    
+    Every "## " section is one part, except "## Abilities", which yields
+    one part per "### " ability (ability is None elsewhere). Text before
+    the first section (the "# Name" title) is dropped.
+    """
+    parts = []
+    for block in re.split(r"^## ", _IMAGE_LINE.sub("", text), flags=re.MULTILINE)[1:]:
+        heading, _, body = block.partition("\n")
+        heading = heading.strip()
+        if section_key(heading) == "abilities":
+            for ability_block in re.split(r"^### ", body, flags=re.MULTILINE)[1:]:
+                ability, _, description = ability_block.partition("\n")
+                parts.append((heading, ability.strip(), description.strip()))
+        else:
+            parts.append((heading, None, body.strip()))
+    return parts
+
+
+class HeroMarkdownNodeParser(NodeParser):
+    """
+    One node per section of a hero document, and one per ability.
+    
+    Each node's text starts with the hero name, role and its headings so it
+    reads (and embeds) on its own, and it carries hero, role, section and
+    ability metadata for retrieval filters. Sections longer than chunk_size
+    tokens are split further by sentence.
+    """
+    
+    chunk_size: int = Field(default=1024, description="Maximum tokens per node.", gt=0)
+    chunk_overlap: int = Field(default=200, description="Token overlap when a section is split.", ge=0)
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "HeroMarkdownNodeParser"
+    
+    def _parse_nodes(
+        self,
+        nodes: Sequence[BaseNode],
+        show_progress: bool = False,
+        **kwargs: Any
+    ) -> List[BaseNode]:
+        splitter = SentenceSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+        parsed: List[BaseNode] = []
+        for node in get_tqdm_iterable(nodes, show_progress, "Parsing hero sections"):
+            parsed.extend(self._parse_document(node, splitter))
+        return parsed
+    
+    def _parse_document(self, document: BaseNode, splitter: SentenceSplitter) -> List[BaseNode]:
+        text = document.get_content()
+        fields = hero_fields(text)
+        title = text.partition("\n")[0].lstrip("# ").strip()
+        hero = fields.get("key") or title
+        role = fields.get("role", "").lower()
+        
+        splits: List[str] = []
+        metadata: List[Dict[str, str]] = []
+        for heading, ability, body in split_hero_sections(text):
+            header = f"# {title} ({role})\n## {heading}" if role else f"# {title}\n## {heading}"
+            if ability:
+                header += f"\n### {ability}"
+            
+            part_metadata = {"hero": hero, "role": role, "section": section_key(heading)}
+            if ability:
+                part_metadata["ability"] = ability
+            for chunk in splitter.split_text(body) or [""]:
+                splits.append(f"{header}\n\n{chunk}".strip())
+                metadata.append(part_metadata)
+        
+        nodes = build_nodes_from_splits(splits, document, id_func=self.id_func)
+        for node, node_metadata in zip(nodes, metadata):
+            node.metadata.update(node_metadata)
+            # Already spelled out in the text's headings
+            node.excluded_embed_metadata_keys = list(node.excluded_embed_metadata_keys) + HERO_METADATA_KEYS
+            node.excluded_llm_metadata_keys = list(node.excluded_llm_metadata_keys) + HERO_METADATA_KEYS
+        return nodes
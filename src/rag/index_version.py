@@ -0,0 +1,120 @@
+"""
+Index version marker shared by the indexer and downstream caches, and the
+pointer to the active blue/green collections.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+from src.utils.config import config
+
+
+# Logical collections, each stored under collection_name(name, version)
+COLLECTIONS = ("heroes", "maps")
+
+INDEX_VERSION_FILE = "index_version"
+ACTIVE_INDEX_FILE = "active_index.json"
+UNVERSIONED = "unversioned"
+
+# (path, mtime) -> version, so repeated reads cost a single stat()
+_cached_version = (None, None, UNVERSIONED)
+_cached_active = (None, None, None)
+
+
+def _version_path() -> Path:
+    return Path(config.CHROMA_DB_PATH) / INDEX_VERSION_FILE
+
+
+def _active_path() -> Path:
+    return Path(config.CHROMA_DB_PATH) / ACTIVE_INDEX_FILE
+
+
+def _write_atomic(path: Path, text: str):
+    """Write then rename so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def new_index_version() -> str:
+    """A fresh, time-ordered index version."""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def write_index_version(version: Optional[str] = None) -> str:
+    """Record an index version (a new one by default) after the indexes were (re)built."""
+    version = version or new_index_version()
+    _write_atomic(_version_path(), version)
+    return version
+
+
+def read_index_version() -> str:
+    """Return the current index version, or UNVERSIONED if none was recorded."""
+    global _cached_version
+    path = _version_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return UNVERSIONED
+    
+    cached_path, cached_mtime, version = _cached_version
+    if cached_path == path and cached_mtime == mtime:
+        return version
+    
+    version = path.read_text(encoding="utf-8").strip() or UNVERSIONED
+    _cached_version = (path, mtime, version)
+    return version
+
+
+def collection_name(name: str, version: Optional[str] = None) -> str:
+    """Physical name of a collection: "heroes", or "heroes-<version>" when built blue/green."""
+    return f"{name}-{version}" if version else name
+
+
+def write_active_index(version: str, collections: Dict[str, str]):
+    """
+    Publish a blue/green build: servers switch to these collections on
+    their next reload.
+    
+    Args:
+        version: Index version of the build
+        collections: Collection name -> physical collection name
+    """
+    _write_atomic(_active_path(), json.dumps({"version": version, "collections": collections}, indent=2))
+
+
+def read_active_index() -> Optional[Dict[str, Any]]:
+    """
+    The published blue/green build ({"version", "collections"}), or None
+    while collections are indexed in place under their own names.
+    """
+    global _cached_active
+    path = _active_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    
+    cached_path, cached_mtime, active = _cached_active
+    if cached_path == path and cached_mtime == mtime:
+        return active
+    
+    try:
+        active = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read active index {path}: {e}")
+        return None
+    _cached_active = (path, mtime, active)
+    return active
+
+
+def active_collection_name(name: str) -> str:
+    """Physical name of the collection servers should read: the published build's, or name itself."""
+    active = read_active_index()
+    if active is None:
+        return name
+    return active["collections"].get(name, name)
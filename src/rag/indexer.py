@@ -1,31 +1,134 @@
 """RAG indexer to load markdown files into ChromaDB via LlamaIndex."""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List
-import chromadb
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 from llama_index.core import (
+    Document,
     VectorStoreIndex,
     SimpleDirectoryReader,
-    StorageContext,
     Settings,
 )
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.node_parser import NodeParser
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from llama_index.llms.ollama import Ollama
+from src.rag.embeddings import create_embed_model, get_embed_model
+from src.rag.entities import EntityIndex
+from src.rag.hero_parser import HeroMarkdownNodeParser
+from src.rag.index_version import (
+    COLLECTIONS,
+    active_collection_name,
+    collection_name,
+    new_index_version,
+    read_active_index,
+    read_index_version,
+    write_active_index,
+    write_index_version,
+)
+from src.rag.lexical import BM25Index, lexical_index_path
+from src.rag.manifest import IndexManifest, content_hash, manifest_path
+from src.rag.snapshot import SNAPSHOT_COLLECTIONS, default_snapshot_path, write_snapshot
+from src.rag.vector_stores import (
+    NumpyVectorStore,
+    numpy_store_files,
+    numpy_store_path,
+    open_vector_store,
+    vector_count,
+)
 from src.utils.config import config
 
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent runs are not detected
+    fcntl = None
+
+
+def node_id(i: int, document: BaseNode) -> str:
+    """Deterministic id of a document's i-th node."""
+    return f"{document.doc_id}#{i}"
+
+
+def collection_node_parser(name: str) -> NodeParser:
+    """
+    How a collection's documents are split: heroes by markdown section (with
+    hero/role/section/ability metadata), maps by the default sentence splitter.
+    """
+    if name == "heroes":
+        return HeroMarkdownNodeParser(id_func=node_id)
+    return Settings.node_parser
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Embedding model of an embedding pool worker process
+_worker_model = None
+
+
+def _init_embed_worker(threads: int):
+    """Embedding pool initializer: load the worker's own model."""
+    global _worker_model
+    config.EMBED_THREADS = threads
+    _worker_model = create_embed_model()
+
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed one batch of node texts in an embedding pool worker."""
+    return _worker_model.get_text_embedding_batch(texts)
+
+
+@contextmanager
+def _indexer_lock() -> Iterator[None]:
+    """
+    Hold CHROMA_DB_PATH/indexer.lock for the duration of a run.
+    
+    Raises:
+        RuntimeError: Another indexer run holds the lock
+    """
+    if fcntl is None:
+        yield
+        return
+    path = Path(config.CHROMA_DB_PATH) / "indexer.lock"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"Another indexer run is in progress ({path})")
+        # Released when the file is closed
+        yield
+
 
 class RAGIndexer:
-    """Indexer for loading Overwatch data into ChromaDB."""
+    """Indexer for loading Overwatch data into the configured vector store."""
     
     def __init__(self):
-        # Initialize ChromaDB client
-        self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH)
+        # Initialize ChromaDB client (not needed by the numpy backend)
+        self.chroma_client = None
+        if config.VECTOR_BACKEND == "chroma":
+            import chromadb
+            
+            self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH)
         
         # Configure LlamaIndex settings
         print("Initializing embedding model...")
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+        Settings.embed_model = get_embed_model()
+        # Same document, same node ids: re-indexing replaces vectors in place
+        Settings.node_parser.id_func = node_id
         
         print("Initializing LLM (Ollama)...")
         Settings.llm = Ollama(
@@ -36,21 +139,227 @@ class RAGIndexer:
         
         print("✓ RAG components initialized")
         
-        self.heroes_collection = None
-        self.maps_collection = None
+        self.vector_stores: Dict[str, BasePydanticVectorStore] = {}
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self._embed_pool: Optional[ProcessPoolExecutor] = None
+        self._embed_pool_lock = threading.Lock()
         self.heroes_index = None
         self.maps_index = None
     
-    def create_heroes_index(self) -> VectorStoreIndex:
-        """Create or load heroes index."""
-        print("\nCreating heroes index...")
+    def _vector_store(self, name: str, rebuild: bool, source: Optional[str] = None) -> BasePydanticVectorStore:
+        """
+        Store a collection is indexed into, emptied first when rebuilding.
+        
+        With another source collection (blue/green builds), the store starts
+        as a copy of the source instead of its own previous contents.
+        """
+        source = source or name
+        if config.VECTOR_BACKEND == "numpy":
+            path = numpy_store_path(source)
+            if rebuild or not os.path.exists(f"{path}.json"):
+                return NumpyVectorStore()
+            return NumpyVectorStore.from_persist_path(path, mmap=False)
+        
+        from llama_index.vector_stores.chroma import ChromaVectorStore
+        
+        if rebuild or source != name:
+            try:
+                self.chroma_client.delete_collection(name)
+            except Exception:
+                pass  # Nothing to delete yet
+        collection = self.chroma_client.get_or_create_collection(name)
+        if source != name and not rebuild:
+            self._copy_collection(source, collection)
+        return ChromaVectorStore(chroma_collection=collection)
+    
+    def _copy_collection(self, source: str, target: Any):
+        """Copy every row of a Chroma collection, if it exists, in insert batches."""
+        try:
+            collection = self.chroma_client.get_collection(source)
+        except Exception:
+            return  # Nothing indexed yet
+        batch_size = config.INDEX_INSERT_BATCH_SIZE
+        for offset in range(0, collection.count(), batch_size):
+            rows = collection.get(
+                include=["embeddings", "metadatas", "documents"],
+                limit=batch_size,
+                offset=offset
+            )
+            target.add(
+                ids=rows["ids"],
+                embeddings=rows["embeddings"],
+                metadatas=rows["metadatas"],
+                documents=rows["documents"]
+            )
+    
+    @staticmethod
+    def _fingerprint(node_parser: NodeParser) -> str:
+        """Everything besides document content that the stored vectors depend on."""
+        pipeline = {
+            "embed_model": Settings.embed_model.model_name,
+            "vector_backend": config.VECTOR_BACKEND,
+            "node_parser": json.loads(node_parser.to_json()),
+        }
+        return hashlib.sha256(json.dumps(pipeline, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    
+    def _get_embed_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Process pool embedding node batches, created on first use.
+        
+        Each worker loads its own copy of the embedding model with its
+        share of the cores. None when INDEX_WORKERS (default: all cores)
+        is 1.
+        """
+        workers = config.INDEX_WORKERS or available_cores()
+        if workers <= 1:
+            return None
+        with self._embed_pool_lock:
+            if self._embed_pool is None:
+                print(f"Starting {workers} embedding workers...")
+                self._embed_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    # Spawned, not forked: torch and ONNX Runtime are not fork-safe
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_embed_worker,
+                    initargs=(max(1, available_cores() // workers),),
+                )
+            return self._embed_pool
+    
+    def _embed_and_store(self, nodes: Sequence[BaseNode], vector_store: BasePydanticVectorStore):
+        """
+        Embed nodes in INDEX_EMBED_BATCH_SIZE batches and write them to the
+        store in bulk as batches complete.
+        
+        Batches are spread over the embedding pool once there are at least
+        INDEX_PARALLEL_MIN_NODES nodes (below that, starting workers costs
+        more than it saves); otherwise they are embedded in-process.
+        """
+        batch_size = config.INDEX_EMBED_BATCH_SIZE
+        batches = [nodes[offset:offset + batch_size] for offset in range(0, len(nodes), batch_size)]
+        texts = [[node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch] for batch in batches]
+        
+        pool = self._get_embed_pool() if len(nodes) >= config.INDEX_PARALLEL_MIN_NODES else None
+        if pool is not None:
+            embeddings = pool.map(_embed_texts, texts)
+        else:
+            embeddings = map(Settings.embed_model.get_text_embedding_batch, texts)
+        
+        pending: List[BaseNode] = []
+        for batch, vectors in zip(batches, embeddings):
+            for node, vector in zip(batch, vectors):
+                node.embedding = vector
+            pending.extend(batch)
+            if len(pending) >= config.INDEX_INSERT_BATCH_SIZE:
+                vector_store.add(pending)
+                pending = []
+        if pending:
+            vector_store.add(pending)
+    
+    def close(self):
+        """Shut down the embedding pool, if one was started."""
+        with self._embed_pool_lock:
+            if self._embed_pool is not None:
+                self._embed_pool.shutdown()
+                self._embed_pool = None
+    
+    @staticmethod
+    def _persist(name: str, store: BasePydanticVectorStore):
+        """Write in-process stores to disk (Chroma persists as it goes)."""
+        if isinstance(store, NumpyVectorStore):
+            store.persist(numpy_store_path(name))
+    
+    def _index_documents(
+        self,
+        name: str,
+        documents: List[Document],
+        full: bool = False,
+        version: Optional[str] = None
+    ) -> VectorStoreIndex:
+        """
+        Bring a collection up to date with its documents.
         
-        # Get or create collection
-        self.heroes_collection = self.chroma_client.get_or_create_collection("heroes")
+        Documents get deterministic ids (<collection>/<file name>) and are
+        compared by content hash with the collection's manifest: only new
+        and changed documents are split and embedded (changed ones replace
+        their old vectors), vectors of deleted files are removed, unchanged
+        documents are skipped. Everything is rebuilt when full is set or
+        the embedding model, vector backend or node parser changed. The BM25
+        index is rebuilt over all nodes whenever anything changed (splitting
+        is cheap, and node ids match the stored vectors).
         
-        # Create vector store
-        vector_store = ChromaVectorStore(chroma_collection=self.heroes_collection)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        With a version, the collection is built blue/green: into
+        collection_name(name, version), starting from a copy of the active
+        collection and its manifest, which are left untouched.
+        
+        The run's summary is kept in self.summaries[name].
+        
+        Raises:
+            RuntimeError: No version while a blue/green build is published
+                (servers would not see the update)
+        """
+        start = time.perf_counter()
+        for document in documents:
+            document.id_ = f"{name}/{document.metadata['file_name']}"
+        hashes = {document.doc_id: content_hash(document.text) for document in documents}
+        
+        if version is None and read_active_index() is not None:
+            raise RuntimeError(
+                f"A blue/green index is published: update {name} through index_all(), not in place"
+            )
+        target = collection_name(name, version)
+        source = active_collection_name(name) if version else target
+        
+        node_parser = collection_node_parser(name)
+        fingerprint = self._fingerprint(node_parser)
+        manifest = IndexManifest.load(manifest_path(source))
+        manifest.path = Path(manifest_path(target))
+        rebuild = full or manifest.fingerprint != fingerprint
+        vector_store = self.vector_stores[name] = self._vector_store(target, rebuild, source)
+        if rebuild or not vector_count(vector_store):
+            manifest = IndexManifest(manifest_path(target))
+        plan = manifest.plan(hashes)
+        
+        for doc_id in plan["updated"] + plan["removed"]:
+            vector_store.delete(doc_id)
+        
+        changed_ids = set(plan["added"] + plan["updated"])
+        changed = [document for document in documents if document.doc_id in changed_ids]
+        embed_start = time.perf_counter()
+        nodes = run_transformations(changed, [node_parser])
+        self._embed_and_store(nodes, vector_store)
+        embedded = len(nodes)
+        embed_seconds = time.perf_counter() - embed_start
+        self._persist(target, vector_store)
+        index = VectorStoreIndex.from_vector_store(vector_store)
+        
+        manifest.fingerprint = fingerprint
+        manifest.documents = hashes
+        manifest.save()
+        
+        modified = bool(changed or plan["removed"])
+        if modified or not os.path.exists(lexical_index_path(target)):
+            if len(changed) < len(documents):
+                nodes = run_transformations(documents, [node_parser])
+            BM25Index.from_nodes(nodes).save(lexical_index_path(target))
+            print(f"✓ Lexical index built over {len(nodes)} {name} nodes")
+        
+        self.summaries[name] = {
+            "rebuild": rebuild,
+            "modified": modified,
+            **{action: len(doc_ids) for action, doc_ids in plan.items()},
+            "nodes_embedded": embedded,
+            "embed_seconds": embed_seconds,
+            "seconds": time.perf_counter() - start,
+        }
+        return index
+    
+    def create_heroes_index(self, full: bool = False, version: Optional[str] = None) -> VectorStoreIndex:
+        """
+        Create or update the heroes index (full=True re-embeds everything).
+        
+        With a version, it is built blue/green and only published by index_all().
+        """
+        print("\nCreating heroes index...")
         
         # Load documents
         heroes_path = Path(config.DATA_HEROES_PATH)
@@ -65,25 +374,20 @@ class RAGIndexer:
         
         # Create index
         print("Indexing heroes (this may take a minute)...")
-        self.heroes_index = VectorStoreIndex.from_documents(
-            documents,
-            storage_context=storage_context,
-            show_progress=True
-        )
+        self.heroes_index = self._index_documents("heroes", documents, full, version)
         
-        print(f"✓ Heroes index created with {len(documents)} documents")
+        if version is None and self.summaries["heroes"]["modified"]:
+            write_index_version()
+        print(f"✓ Heroes index up to date with {len(documents)} documents")
         return self.heroes_index
     
-    def create_maps_index(self) -> VectorStoreIndex:
-        """Create or load maps index."""
-        print("\nCreating maps index...")
+    def create_maps_index(self, full: bool = False, version: Optional[str] = None) -> VectorStoreIndex:
+        """
+        Create or update the maps index (full=True re-embeds everything).
         
-        # Get or create collection
-        self.maps_collection = self.chroma_client.get_or_create_collection("maps")
-        
-        # Create vector store
-        vector_store = ChromaVectorStore(chroma_collection=self.maps_collection)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        With a version, it is built blue/green and only published by index_all().
+        """
+        print("\nCreating maps index...")
         
         # Load documents
         maps_path = Path(config.DATA_MAPS_PATH)
@@ -98,53 +402,192 @@ class RAGIndexer:
         
         # Create index
         print("Indexing maps (this may take a minute)...")
-        self.maps_index = VectorStoreIndex.from_documents(
-            documents,
-            storage_context=storage_context,
-            show_progress=True
-        )
+        self.maps_index = self._index_documents("maps", documents, full, version)
         
-        print(f"✓ Maps index created with {len(documents)} documents")
+        if version is None and self.summaries["maps"]["modified"]:
+            write_index_version()
+        print(f"✓ Maps index up to date with {len(documents)} documents")
         return self.maps_index
     
     def load_existing_indexes(self):
-        """Load existing indexes from ChromaDB."""
+        """Load existing indexes (the active blue/green build, if any) from the configured backend."""
         print("\nLoading existing indexes...")
         
         try:
             # Load heroes
-            self.heroes_collection = self.chroma_client.get_collection("heroes")
-            vector_store = ChromaVectorStore(chroma_collection=self.heroes_collection)
+            vector_store = self.vector_stores["heroes"] = open_vector_store(
+                active_collection_name("heroes"), self.chroma_client
+            )
             self.heroes_index = VectorStoreIndex.from_vector_store(vector_store)
-            print(f"✓ Loaded heroes index ({self.heroes_collection.count()} vectors)")
+            print(f"✓ Loaded heroes index ({vector_count(vector_store)} vectors)")
         except Exception as e:
             print(f"⚠ Could not load heroes index: {e}")
         
         try:
             # Load maps
-            self.maps_collection = self.chroma_client.get_collection("maps")
-            vector_store = ChromaVectorStore(chroma_collection=self.maps_collection)
+            vector_store = self.vector_stores["maps"] = open_vector_store(
+                active_collection_name("maps"), self.chroma_client
+            )
             self.maps_index = VectorStoreIndex.from_vector_store(vector_store)
-            print(f"✓ Loaded maps index ({self.maps_collection.count()} vectors)")
+            print(f"✓ Loaded maps index ({vector_count(vector_store)} vectors)")
         except Exception as e:
             print(f"⚠ Could not load maps index: {e}")
     
-    def index_all(self):
-        """Index all heroes and maps."""
-        self.create_heroes_index()
-        self.create_maps_index()
+    def index_all(self, full: bool = False, blue_green: bool = False) -> Optional[str]:
+        """
+        Index heroes and maps concurrently (sharing the embedding pool).
+        
+        With blue_green, both collections are built under a new version
+        while servers keep reading the active ones, then published together
+        (see _publish). Once a build has been published, every run is a
+        blue/green one.
+        
+        Returns:
+            The active index version after a blue_green run, else None
+        
+        Raises:
+            RuntimeError: Another indexer run is in progress
+        """
+        if not blue_green and read_active_index() is not None:
+            # Servers read the published build, not the in-place collections
+            print("Blue/green index already published, building a new version instead of updating in place")
+            blue_green = True
+        version = new_index_version() if blue_green else None
+        with _indexer_lock():
+            try:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="indexer") as executor:
+                    heroes = executor.submit(self.create_heroes_index, full, version)
+                    maps = executor.submit(self.create_maps_index, full, version)
+                    heroes.result()
+                    maps.result()
+            finally:
+                self.close()
+            if version is not None:
+                return self._publish(version)
+        return None
+    
+    def _publish(self, version: str) -> str:
+        """
+        Make a blue/green build the active index, unless nothing changed.
+        
+        The pointer is only written once both collections are complete, so
+        servers never see half a build. Versioned collections other than the
+        new and the previously active ones are deleted; the previous ones
+        stay for servers that have not reloaded yet.
+        
+        Returns:
+            The active index version
+        """
+        active = read_active_index()
+        previous = set(active["collections"].values()) if active else set()
+        if active is not None and not any(summary["modified"] for summary in self.summaries.values()):
+            print(f"\n✓ Nothing changed, keeping index version {active['version']}")
+            self._prune(previous)
+            self.vector_stores = {}
+            self.load_existing_indexes()
+            return active["version"]
+        
+        collections = {name: collection_name(name, version) for name in COLLECTIONS}
+        write_active_index(version, collections)
+        write_index_version(version)
+        print(f"\n✓ Published index version {version}")
+        self._prune(previous | set(collections.values()))
+        return version
+    
+    def _versioned_collections(self) -> Iterable[str]:
+        """Physical names of every blue/green collection found in any store."""
+        names = set()
+        if self.chroma_client is not None:
+            # Collection objects or names, depending on the Chroma version
+            names.update(getattr(collection, "name", collection) for collection in self.chroma_client.list_collections())
+        for directory in (config.NUMPY_STORE_PATH, config.LEXICAL_INDEX_PATH, Path(manifest_path("")).parent):
+            names.update(path.stem for path in Path(directory).glob("*.json"))
+        return sorted(name for name in names if any(name.startswith(f"{base}-") for base in COLLECTIONS))
+    
+    def _prune(self, keep: Iterable[str]):
+        """Delete blue/green collections, their manifests and lexical indexes, except keep."""
+        keep = set(keep)
+        for name in self._versioned_collections():
+            if name in keep:
+                continue
+            if self.chroma_client is not None:
+                try:
+                    self.chroma_client.delete_collection(name)
+                except Exception:
+                    pass  # Only on disk for the numpy backend
+            for path in (
+                *numpy_store_files(numpy_store_path(name)),
+                manifest_path(name),
+                lexical_index_path(name),
+            ):
+                Path(path).unlink(missing_ok=True)
+            print(f"✓ Removed stale collection {name}")
+    
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Write both collections, their lexical indexes and the hero and map
+        documents to one snapshot file (see src.rag.snapshot).
+        
+        Collections, manifest fingerprints and index version all come from
+        the active blue/green build when there is one, else from the
+        collections indexed in place.
+        
+        Raises:
+            ValueError: A collection has not been indexed
+        """
+        active = read_active_index()
+        collections = active["collections"] if active else {}
+        stores = {}
+        missing = []
+        for name in SNAPSHOT_COLLECTIONS:
+            try:
+                stores[name] = open_vector_store(collections.get(name, name), self.chroma_client)
+            except Exception:
+                missing.append(name)
+        if missing:
+            raise ValueError(f"Cannot snapshot unindexed collections: {', '.join(missing)}")
+        
+        return write_snapshot(
+            path,
+            stores,
+            EntityIndex().read_documents(),
+            embed_model=Settings.embed_model.model_name,
+            fingerprints={
+                name: IndexManifest.load(manifest_path(collections.get(name, name))).fingerprint
+                for name in SNAPSHOT_COLLECTIONS
+            },
+            index_version=active["version"] if active else read_index_version(),
+        )
     
     def get_stats(self) -> dict:
         """Get indexing statistics."""
         stats = {
-            "heroes_count": self.heroes_collection.count() if self.heroes_collection else 0,
-            "maps_count": self.maps_collection.count() if self.maps_collection else 0,
+            f"{name}_count": vector_count(self.vector_stores[name]) if name in self.vector_stores else 0
+            for name in ("heroes", "maps")
         }
         return stats
 
 
 def main():
     """Main entry point for indexing."""
+    parser = argparse.ArgumentParser(description="Index hero and map markdown into the vector store")
+    parser.add_argument("--full", action="store_true", help="Re-embed every document instead of only changed ones")
+    parser.add_argument(
+        "--blue-green",
+        action="store_true",
+        help="Build new versioned collections and publish them when complete, for servers to hot-reload"
+    )
+    parser.add_argument(
+        "--snapshot",
+        nargs="?",
+        const=default_snapshot_path(),
+        metavar="PATH",
+        help="Also write the index snapshot served via INDEX_SNAPSHOT_PATH (default: %(const)s)"
+    )
+    parser.add_argument("--counters", action="store_true", help="Also build the precomputed /counter table")
+    parser.add_argument("--force-counters", action="store_true", help="Regenerate every counter table entry")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Overcoach AI - Data Indexer")
     print("=" * 60)
@@ -152,7 +595,9 @@ def main():
     indexer = RAGIndexer()
     
     # Index all data
-    indexer.index_all()
+    start = time.perf_counter()
+    indexer.index_all(full=args.full, blue_green=args.blue_green)
+    elapsed = time.perf_counter() - start
     
     # Show stats
     stats = indexer.get_stats()
@@ -162,6 +607,32 @@ def main():
     print(f"Heroes vectors: {stats['heroes_count']}")
     print(f"Maps vectors: {stats['maps_count']}")
     print(f"Total vectors: {stats['heroes_count'] + stats['maps_count']}")
+    for name, summary in indexer.summaries.items():
+        mode = "full rebuild" if summary["rebuild"] else "incremental"
+        print(f"{name.capitalize()} ({mode}): {summary['added']} added, {summary['updated']} updated, "
+              f"{summary['skipped']} skipped, {summary['removed']} removed - "
+              f"{summary['nodes_embedded']} nodes embedded in {summary['embed_seconds']:.1f}s, "
+              f"{summary['seconds']:.1f}s total")
+    
+    documents = sum(summary["added"] + summary["updated"] for summary in indexer.summaries.values())
+    nodes = sum(summary["nodes_embedded"] for summary in indexer.summaries.values())
+    print(f"Throughput: {documents / elapsed:.1f} documents/s, {nodes / elapsed:.1f} nodes/s "
+          f"({documents} documents, {nodes} nodes in {elapsed:.1f}s)")
+    
+    if args.snapshot:
+        start = time.perf_counter()
+        header = indexer.export_snapshot(args.snapshot)
+        size_mb = os.path.getsize(args.snapshot) / 1024 / 1024
+        print(f"\n✓ Index snapshot {header['index_version']} written to {args.snapshot} "
+              f"({size_mb:.1f} MB in {time.perf_counter() - start:.1f}s)")
+    
+    if args.counters or args.force_counters:
+        from src.rag.counters import build_counter_table
+        
+        print("\nBuilding counter table...")
+        table, summary = build_counter_table(force=args.force_counters)
+        print(f"✓ Counter table: {summary['generated']} generated, {summary['reused']} reused, "
+              f"{summary['removed']} removed ({table.path})")
 
 
 if __name__ == "__main__":
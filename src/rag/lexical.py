@@ -0,0 +1,240 @@
+"""BM25 lexical index over the indexed nodes, fused with vector search at query time."""
+import heapq
+import json
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.schema import BaseNode, NodeWithScore
+from llama_index.core.vector_stores.types import MetadataFilters
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+from src.rag.vector_stores import metadata_matches
+from src.utils.config import config
+
+LEXICAL_FORMAT_VERSION = 1
+
+# Constant of reciprocal rank fusion: damps the weight of the very top ranks
+RRF_K = 60
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their them "
+    "they this to was were will with about also into than then".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, accent-stripped word tokens with a light plural fold."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    tokens = []
+    for token in re.findall(r"[0-9a-z]+", text):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def lexical_index_path(name: str) -> str:
+    """File of a collection's lexical index."""
+    return str(Path(config.LEXICAL_INDEX_PATH) / f"{name}.json")
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of nodes, held as an inverted index.
+    
+    Built by the indexer from the same nodes that go into the vector store,
+    so node ids match and results can be fused with vector hits. Postings
+    are kept as flat arrays (CSR), which an index snapshot can map without
+    parsing: the postings of term t are rows/freqs[starts[c]:starts[c + 1]]
+    with c = columns[t]. Scoring a query only touches the postings of its
+    terms.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.nodes: Sequence[Dict[str, Any]] = []
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+        # term -> column; document rows and term frequencies per column
+        self.columns: Dict[str, int] = {}
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.freqs = np.zeros(0, dtype=np.int32)
+        self._idf = np.zeros(0, dtype=np.float64)
+        self._avg_length = 0.0
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @classmethod
+    def from_nodes(cls, nodes: Sequence[BaseNode], **kwargs: Any) -> "BM25Index":
+        """Build the index from parsed nodes (text plus metadata)."""
+        index = cls(**kwargs)
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_lengths = []
+        for row, node in enumerate(nodes):
+            terms = Counter(tokenize(node.get_content()))
+            for term, frequency in terms.items():
+                postings[term].append((row, frequency))
+            index.ids.append(node.node_id)
+            index.nodes.append(node_to_metadata_dict(node, remove_text=False, flat_metadata=False))
+            doc_lengths.append(sum(terms.values()))
+        index._set_postings(postings, doc_lengths)
+        return index
+    
+    @classmethod
+    def from_arrays(
+        cls,
+        ids: List[str],
+        nodes: Sequence[Dict[str, Any]],
+        terms: List[str],
+        arrays: Dict[str, np.ndarray],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "BM25Index":
+        """
+        Index over existing postings arrays (used as is, e.g. views of a
+        memory-mapped snapshot).
+        
+        Args:
+            ids: Node ids, by row
+            nodes: Node dicts (any sequence), by row
+            terms: Term of each column
+            arrays: "starts", "rows", "freqs" and "doc_lengths", as returned
+                by arrays()
+        """
+        index = cls(k1=k1, b=b)
+        index.ids = ids
+        index.nodes = nodes
+        index.columns = {term: column for column, term in enumerate(terms)}
+        index.starts = arrays["starts"]
+        index.rows = arrays["rows"]
+        index.freqs = arrays["freqs"]
+        index.doc_lengths = arrays["doc_lengths"]
+        index._prepare()
+        return index
+    
+    def terms(self) -> List[str]:
+        """Term of each column."""
+        terms = [""] * len(self.columns)
+        for term, column in self.columns.items():
+            terms[column] = term
+        return terms
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The postings arrays and document lengths, for from_arrays()."""
+        return {"starts": self.starts, "rows": self.rows, "freqs": self.freqs, "doc_lengths": self.doc_lengths}
+    
+    def _set_postings(self, postings: Dict[str, List[Tuple[int, int]]], doc_lengths: List[int]):
+        """Flatten term -> [(row, frequency)] postings into the CSR arrays."""
+        self.columns = {term: column for column, term in enumerate(postings)}
+        lengths = [len(docs) for docs in postings.values()]
+        self.starts = np.zeros(len(lengths) + 1, dtype=np.int64)
+        self.starts[1:] = np.cumsum(lengths, dtype=np.int64)
+        flat = np.array([posting for docs in postings.values() for posting in docs], dtype=np.int32).reshape(-1, 2)
+        self.rows = np.ascontiguousarray(flat[:, 0])
+        self.freqs = np.ascontiguousarray(flat[:, 1])
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.int32)
+        self._prepare()
+    
+    def _prepare(self):
+        """Precompute IDF per term and the average document length."""
+        count = len(self.ids)
+        self._avg_length = float(self.doc_lengths.mean()) if count else 0.0
+        document_frequency = np.diff(self.starts)
+        self._idf = np.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+    
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every document sharing a term with the query."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            column = self.columns.get(term)
+            if column is None:
+                continue
+            start, end = self.starts[column], self.starts[column + 1]
+            rows = self.rows[start:end]
+            frequencies = self.freqs[start:end]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / self._avg_length)
+            term_scores = self._idf[column] * frequencies * (self.k1 + 1) / (frequencies + norm)
+            for row, score in zip(rows.tolist(), term_scores.tolist()):
+                scores[row] += score
+        return scores
+    
+    def search(self, query: str, top_k: int, filters: Optional[MetadataFilters] = None) -> List[NodeWithScore]:
+        """
+        Top-k nodes by BM25 score (nodes without any query term are left out),
+        optionally restricted to nodes whose metadata passes the filters.
+        """
+        scores = self.scores(query).items()
+        if filters is not None:
+            scores = [(row, score) for row, score in scores if metadata_matches(self.nodes[row], filters)]
+        best = heapq.nlargest(top_k, scores, key=lambda item: item[1])
+        return [NodeWithScore(node=metadata_dict_to_node(self.nodes[row]), score=score) for row, score in best]
+    
+    def save(self, path: str):
+        """Write the index atomically as JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        rows, freqs = self.rows.tolist(), self.freqs.tolist()
+        data = {
+            "version": LEXICAL_FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "nodes": list(self.nodes),
+            "doc_lengths": self.doc_lengths.tolist(),
+            "postings": {
+                term: [[row, frequency] for row, frequency in zip(rows[start:end], freqs[start:end])]
+                for term, start, end in zip(self.terms(), self.starts[:-1].tolist(), self.starts[1:].tolist())
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Load a saved index, or None if there is none (or it is unreadable)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read lexical index {path}: {e}")
+            return None
+        if data.get("version") != LEXICAL_FORMAT_VERSION:
+            print(f"⚠ Ignoring lexical index {path}: unsupported format")
+            return None
+        
+        index = cls(k1=data["k1"], b=data["b"])
+        index.ids = data["ids"]
+        index.nodes = data["nodes"]
+        index._set_postings(data["postings"], data["doc_lengths"])
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[NodeWithScore]], top_k: int) -> List[NodeWithScore]:
+    """
+    Merge ranked node lists by reciprocal rank fusion.
+    
+    Each list contributes 1 / (RRF_K + rank) per node. Only ranks count, so
+    vector similarities and BM25 scores need no common scale. The returned
+    nodes carry their fused score.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    nodes: Dict[str, NodeWithScore] = {}
+    for ranking in rankings:
+        for rank, node in enumerate(ranking, start=1):
+            fused[node.node.node_id] += 1.0 / (RRF_K + rank)
+            nodes.setdefault(node.node.node_id, node)
+    
+    best = heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
+    return [NodeWithScore(node=nodes[node_id].node, score=score) for node_id, score in best]
@@ -0,0 +1,89 @@
+"""Record of what each collection holds, so re-indexing only embeds what changed."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.utils.config import config
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+def manifest_path(name: str) -> str:
+    """Manifest file of a collection."""
+    return str(Path(config.CHROMA_DB_PATH) / "manifests" / f"{name}.json")
+
+
+def content_hash(text: str) -> str:
+    """Short content hash of a document's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class IndexManifest:
+    """
+    Content hash of every document indexed into one collection.
+    
+    Also records the fingerprint of the pipeline that produced the vectors
+    (embedding model, vector backend, node parser settings): a document is
+    only skipped on the next run if both its hash and the fingerprint are
+    unchanged.
+    """
+    
+    def __init__(self, path: str, fingerprint: str = "", documents: Optional[Dict[str, str]] = None):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.documents: Dict[str, str] = documents or {}
+    
+    @classmethod
+    def load(cls, path: str) -> "IndexManifest":
+        """Load a manifest (empty if missing, unreadable or of another format)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not read index manifest {path}: {e}")
+            return cls(path)
+        if data.get("version") != MANIFEST_FORMAT_VERSION:
+            print(f"⚠ Ignoring index manifest {path}: unsupported format")
+            return cls(path)
+        return cls(path, fingerprint=data.get("fingerprint", ""), documents=data.get("documents", {}))
+    
+    def plan(self, hashes: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Compare the documents on disk with the indexed ones.
+        
+        Args:
+            hashes: Content hash of each current document, by document id
+        
+        Returns:
+            Document ids that are "added", "updated", "skipped" (unchanged)
+            and "removed" (indexed but no longer on disk)
+        """
+        plan: Dict[str, List[str]] = {"added": [], "updated": [], "skipped": [], "removed": []}
+        for doc_id, digest in sorted(hashes.items()):
+            indexed = self.documents.get(doc_id)
+            if indexed is None:
+                plan["added"].append(doc_id)
+            elif indexed != digest:
+                plan["updated"].append(doc_id)
+            else:
+                plan["skipped"].append(doc_id)
+        plan["removed"] = sorted(set(self.documents) - set(hashes))
+        return plan
+    
+    def save(self):
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "indexed_at": time.time(),
+            "documents": self.documents,
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -1,117 +1,721 @@
 """RAG retriever for querying indexed Overwatch data."""
-import chromadb
-from typing import List, Dict, Any
-from llama_index.core import VectorStoreIndex, Settings
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Iterator, Literal, Optional, Tuple, TypeVar
+from llama_index.core import QueryBundle, VectorStoreIndex, Settings, get_response_synthesizer
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.response_synthesizers import BaseSynthesizer, ResponseMode
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+from src.rag.embeddings import CachedEmbedding, embedding_cache_file, get_embed_model
+from src.rag.entities import EntityIndex
+from src.rag.index_version import COLLECTIONS, UNVERSIONED, read_active_index, read_index_version
+from src.rag.lexical import BM25Index, lexical_index_path, reciprocal_rank_fusion
+from src.rag.schemas import TeamCompositionJSON
+from src.rag.snapshot import IndexSnapshot, read_snapshot_version
+from src.rag.vector_stores import open_vector_store, vector_count
 from src.utils.config import config
 from src.utils.llm_config import configure_llm, get_provider_from_env
+from src.utils.metrics import RAG_STAGE_SECONDS, track_stage
+
+T = TypeVar("T")
+
+ContextMode = Literal["synthesize", "retrieve"]
+CONTEXT_MODES = ("synthesize", "retrieve")
+
+OutputFormat = Literal["text", "json"]
+OUTPUT_FORMATS = ("text", "json")
+
+TEXT_RESPONSE_INSTRUCTIONS = """**YOUR RESPONSE MUST BE STRUCTURED AS:**
+
+1. RECOMMENDED TEAM (exactly 5 heroes):
+Tank: [Hero Name] - [One sentence why]
+Damage: [Hero Name] - [One sentence why]
+Damage: [Hero Name] - [One sentence why]
+Support: [Hero Name] - [One sentence why]
+Support: [Hero Name] - [One sentence why]
+
+2. COUNTER STRATEGY:
+[2-3 sentences explaining how this team counters the enemy]
+
+3. KEY SYNERGIES:
+[2-3 sentences about ability combos and team playstyle]
+
+4. ALTERNATIVES:
+[List 2-3 substitute heroes with brief reasons]
+
+Keep responses concise and actionable. Focus on current Overwatch meta."""
+
+JSON_RESPONSE_INSTRUCTIONS = """**RESPOND WITH JSON ONLY, IN THIS SHAPE:**
+{"recommended_team":[{"name":"Hero","role":"tank|damage|support","reasoning":"one sentence"}],"strategy":"2-3 sentences on countering the enemy","synergies":"2-3 sentences on combos and playstyle","alternatives":["Hero"]}
+
+recommended_team has exactly 5 heroes: 1 tank, 2 damage, 2 support. alternatives lists 2-3 substitute hero names.
+Be concise. Focus on current Overwatch meta. No text outside the JSON object."""
+
+
+class RetrievalTimeout(TimeoutError):
+    """Collection lookups did not all finish before the shared deadline."""
+    
+    def __init__(self, pending: List[str], timeout: float):
+        super().__init__(f"Retrieval from {', '.join(pending)} exceeded the {timeout:g}s deadline")
+        self.pending = pending
+
+
+class RetrievalOverloaded(RuntimeError):
+    """The retrieval pool already holds as much work as it may queue."""
+    
+    def __init__(self, inflight: int, capacity: int):
+        super().__init__(f"Retrieval pool is saturated ({inflight}/{capacity} lookups in flight)")
+        self.inflight = inflight
+        self.capacity = capacity
+
+
+class IndexGeneration:
+    """
+    One loaded version of the indexes, swapped in and out as a whole.
+    
+    Requests take the current generation once and run every lookup against
+    it, so a reload never mixes two versions within a request, and the old
+    generation stays usable until its last request finishes.
+    """
+    
+    def __init__(
+        self,
+        version: str = UNVERSIONED,
+        pinned: bool = False,
+        collections: Optional[Dict[str, str]] = None,
+        entities: Optional[EntityIndex] = None,
+        snapshot: Optional[IndexSnapshot] = None
+    ):
+        # Published version it was loaded at; pinned when its collections
+        # never change afterwards (blue/green builds, snapshots), unlike
+        # collections indexed in place
+        self.version = version
+        self.pinned = pinned
+        # Collection name -> physical collection name
+        self.collections = collections or {}
+        self.entities = entities or EntityIndex()
+        self.snapshot = snapshot
+        self.indexes: Dict[str, VectorStoreIndex] = {}
+        self.lexical_indexes: Dict[str, BM25Index] = {}
+        # Retrievers over these indexes, keyed by (collection, top_k, filters)
+        self.retrievers: Dict[Tuple[str, int, Optional[str]], BaseRetriever] = {}
 
 
 class RAGRetriever:
     """Retriever for querying Overwatch heroes and maps data."""
     
     def __init__(self):
-        # Initialize ChromaDB client
-        self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH)
+        # Initialize ChromaDB client (not needed by the numpy backend or a snapshot)
+        self.chroma_client = None
+        if config.VECTOR_BACKEND == "chroma" and not config.INDEX_SNAPSHOT_PATH:
+            import chromadb
+            
+            self.chroma_client = chromadb.PersistentClient(path=config.CHROMA_DB_PATH)
         
-        # Configure embeddings
-        Settings.embed_model = HuggingFaceEmbedding(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
+        # Configure embeddings (query embeddings memoized by text)
+        embed_model = get_embed_model()
+        cache_path = None
+        if config.EMBED_CACHE_DIR:
+            cache_path = embedding_cache_file(config.EMBED_CACHE_DIR, embed_model.model_name)
+        self.embed_cache = CachedEmbedding(embed_model, max_entries=config.EMBED_CACHE_SIZE, path=cache_path)
+        Settings.embed_model = self.embed_cache
         
         # Configure LLM (auto-detect or use explicit provider)
-        provider = get_provider_from_env()
-        configure_llm(provider)
+        self.provider = get_provider_from_env()
+        configure_llm(self.provider)
+        self.llm_model = Settings.llm.metadata.model_name
+        
+        # Bounded pool for CPU-bound embedding and vector search in async paths
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.RETRIEVAL_WORKERS,
+            thread_name_prefix="rag-retrieval"
+        )
+        # Lookups submitted and not finished, including ones abandoned at a
+        # deadline (a running thread cannot be stopped, so it keeps its
+        # worker until the search returns)
+        self._inflight_lock = threading.Lock()
+        self._inflight = 0
+        self._capacity = config.RETRIEVAL_WORKERS + config.RETRIEVAL_QUEUE_DEPTH
+        self._shed = 0
+        self._timeouts = 0
+        self._abandoned = 0
         
-        # Load indexes
-        self.heroes_index = None
-        self.maps_index = None
-        self._load_indexes()
+        # Set once a query embedding has gone through the model
+        self.embed_warm = False
+        
+        # Synthesizers keyed by response mode, built on first use and shared
+        # by all requests (retrievers are cached per index generation)
+        self._components_lock = threading.Lock()
+        self._synthesizers: Dict[str, BaseSynthesizer] = {}
+        
+        # Load indexes (from INDEX_SNAPSHOT_PATH when set); reload() swaps in new ones
+        self._reload_lock = threading.Lock()
+        self._rejected_version: Optional[str] = None
+        self.reloads = 0
+        self.generation = self._load_generation()
     
-    def _load_indexes(self):
-        """Load existing indexes from ChromaDB."""
-        try:
-            # Load heroes index
-            heroes_collection = self.chroma_client.get_collection("heroes")
-            heroes_vector_store = ChromaVectorStore(chroma_collection=heroes_collection)
-            self.heroes_index = VectorStoreIndex.from_vector_store(heroes_vector_store)
-            print(f"✓ Loaded heroes index ({heroes_collection.count()} vectors)")
-        except Exception as e:
-            print(f"⚠ Could not load heroes index: {e}")
+    def _load_generation(self) -> IndexGeneration:
+        """
+        Load the published indexes: the snapshot when INDEX_SNAPSHOT_PATH is
+        set, else the active blue/green build or, without one, the
+        collections indexed in place.
+        """
+        snapshot = self._open_snapshot()
+        if snapshot is not None:
+            generation = IndexGeneration(
+                snapshot.index_version,
+                pinned=True,
+                entities=snapshot.entity_index(),
+                snapshot=snapshot
+            )
+            stats = generation.entities.stats()
+            print(f"✓ Loaded entity index from snapshot ({stats['heroes']} heroes, {stats['maps']} maps)")
+        else:
+            active = None if config.INDEX_SNAPSHOT_PATH else read_active_index()
+            generation = IndexGeneration(
+                active["version"] if active else read_index_version(),
+                pinned=active is not None,
+                collections=active["collections"] if active else None
+            )
+            if generation.entities.load():
+                stats = generation.entities.stats()
+                print(f"✓ Loaded entity index ({stats['heroes']} heroes, {stats['maps']} maps)")
         
+        for name in COLLECTIONS:
+            try:
+                vector_store = self._open_vector_store(name, generation)
+                generation.indexes[name] = VectorStoreIndex.from_vector_store(vector_store)
+                print(f"✓ Loaded {name} index ({vector_count(vector_store)} vectors)")
+            except Exception as e:
+                print(f"⚠ Could not load {name} index: {e}")
+        
+        if config.RAG_RETRIEVAL_MODE == "hybrid":
+            for name in COLLECTIONS:
+                if generation.snapshot is not None:
+                    lexical = generation.snapshot.lexical_index(name)
+                else:
+                    lexical = BM25Index.load(lexical_index_path(generation.collections.get(name, name)))
+                if lexical is None:
+                    print(f"⚠ No lexical index for {name}, using vector search only (re-run the indexer)")
+                    continue
+                generation.lexical_indexes[name] = lexical
+                print(f"✓ Loaded {name} lexical index ({len(lexical)} nodes)")
+        return generation
+    
+    def _open_snapshot(self) -> Optional[IndexSnapshot]:
+        """Map INDEX_SNAPSHOT_PATH, if set and built with the configured embedding model."""
+        path = config.INDEX_SNAPSHOT_PATH
+        if not path:
+            return None
         try:
-            # Load maps index
-            maps_collection = self.chroma_client.get_collection("maps")
-            maps_vector_store = ChromaVectorStore(chroma_collection=maps_collection)
-            self.maps_index = VectorStoreIndex.from_vector_store(maps_vector_store)
-            print(f"✓ Loaded maps index ({maps_collection.count()} vectors)")
-        except Exception as e:
-            print(f"⚠ Could not load maps index: {e}")
+            snapshot = IndexSnapshot.open(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Could not load index snapshot: {e}")
+            return None
+        
+        embed_model = self.embed_cache.model.model_name
+        if snapshot.embed_model != embed_model:
+            print(f"⚠ Ignoring index snapshot {path}: built with {snapshot.embed_model}, not {embed_model}")
+            return None
+        print(f"✓ Mapped index snapshot {path} (version {snapshot.index_version})")
+        return snapshot
+    
+    def _open_vector_store(self, name: str, generation: IndexGeneration) -> BasePydanticVectorStore:
+        """
+        A collection's store: from the generation's snapshot when
+        INDEX_SNAPSHOT_PATH is set (without falling back to local data), else
+        its physical collection from VECTOR_BACKEND.
+        """
+        if not config.INDEX_SNAPSHOT_PATH:
+            return open_vector_store(generation.collections.get(name, name), self.chroma_client)
+        if generation.snapshot is None:
+            raise ValueError("no usable index snapshot")
+        return generation.snapshot.vector_store(name)
+    
+    def published_version(self) -> str:
+        """
+        Version reload() would load now: the snapshot's (read from its
+        header), the active blue/green build's, or the in-place one's.
+        """
+        if config.INDEX_SNAPSHOT_PATH:
+            return read_snapshot_version(config.INDEX_SNAPSHOT_PATH) or UNVERSIONED
+        active = read_active_index()
+        return active["version"] if active else read_index_version()
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the published indexes as a new generation, warm it up and swap it in.
+        
+        The swap is a single reference assignment: requests already running
+        finish against the generation they started with. A generation missing
+        an index the current one has is discarded (and not retried until the
+        published version changes again).
+        
+        Args:
+            force: Reload even if the published version has not changed
+        
+        Returns:
+            True if a new generation was swapped in
+        """
+        with self._reload_lock:
+            current = self.generation
+            version = self.published_version()
+            if not force and version in (current.version, self._rejected_version):
+                return False
+            
+            start = time.perf_counter()
+            generation = self._load_generation()
+            missing = [name for name in current.indexes if name not in generation.indexes]
+            if missing:
+                self._rejected_version = version
+                print(f"⚠ Keeping index version {current.version}: no {', '.join(missing)} index in {version}")
+                return False
+            
+            # First queries pay for loading HNSW segments / paging in matrices
+            for name in generation.indexes:
+                self._retrieve(name, "warm up", 1, "reload", generation=generation)
+            
+            self.generation = generation
+            self._rejected_version = None
+            self.reloads += 1
+            print(f"✓ Swapped index version {current.version} -> {generation.version} "
+                  f"in {time.perf_counter() - start:.2f}s")
+            return True
+    
+    @property
+    def heroes_index(self) -> Optional[VectorStoreIndex]:
+        """Heroes index of the current generation (None if not loaded)."""
+        return self.generation.indexes.get("heroes")
+    
+    @property
+    def maps_index(self) -> Optional[VectorStoreIndex]:
+        """Maps index of the current generation (None if not loaded)."""
+        return self.generation.indexes.get("maps")
+    
+    @property
+    def lexical_indexes(self) -> Dict[str, BM25Index]:
+        """BM25 indexes of the current generation, by collection."""
+        return self.generation.lexical_indexes
+    
+    @lexical_indexes.setter
+    def lexical_indexes(self, lexical_indexes: Dict[str, BM25Index]):
+        self.generation.lexical_indexes = lexical_indexes
+    
+    @property
+    def entities(self) -> EntityIndex:
+        """Entity index of the current generation."""
+        return self.generation.entities
+    
+    @property
+    def snapshot(self) -> Optional[IndexSnapshot]:
+        """Snapshot the current generation is mapped from, if any."""
+        return self.generation.snapshot
+    
+    def index_counts(self) -> Dict[str, int]:
+        """Number of vectors in each collection (0 if missing)."""
+        generation = self.generation
+        counts = {}
+        for name in COLLECTIONS:
+            try:
+                if self.chroma_client is not None:
+                    counts[name] = self.chroma_client.get_collection(generation.collections.get(name, name)).count()
+                else:
+                    index = generation.indexes.get(name)
+                    counts[name] = vector_count(index.vector_store) if index else 0
+            except Exception:
+                counts[name] = 0
+        return counts
+    
+    def index_stats(self) -> Dict[str, Any]:
+        """Version and physical collections being served, and the number of reloads."""
+        generation = self.generation
+        return {
+            "version": self.index_version,
+            "collections": {name: generation.collections.get(name, name) for name in generation.indexes},
+            "snapshot": generation.snapshot.path if generation.snapshot else None,
+            "reloads": self.reloads,
+        }
+    
+    def retrieval_stats(self) -> Dict[str, Any]:
+        """Retrieval pool occupancy, and lookups shed or abandoned at the deadline."""
+        with self._inflight_lock:
+            return {
+                "workers": config.RETRIEVAL_WORKERS,
+                "capacity": self._capacity,
+                "inflight": self._inflight,
+                "shed": self._shed,
+                "timeouts": self._timeouts,
+                "abandoned": self._abandoned,
+            }
+    
+    def warm_up_embeddings(self):
+        """Run one query embedding so the model is loaded before real traffic."""
+        # Bypass the cache: a persisted entry would skip the model load
+        self.embed_cache.model.get_query_embedding("warm up")
+        self.embed_warm = True
+    
+    async def awarm_up_llm(self):
+        """Send a tiny prompt so the LLM is loaded (Ollama then keeps it for keep_alive)."""
+        await Settings.llm.acomplete("Reply with OK.")
+    
+    @property
+    def index_version(self) -> str:
+        """
+        Version of the indexes being served, as of the last (re)load.
+        
+        Collections indexed in place change on disk before their new version
+        is seen; reload() (the index watcher or POST /admin/reload) picks it
+        up, so answers cached in between are dropped with the old version.
+        """
+        return self.generation.version
+    
+    @property
+    def metric_labels(self) -> Dict[str, str]:
+        """Provider and model labels attached to every pipeline metric."""
+        return {"provider": self.provider, "model": self.llm_model}
+    
+    @contextmanager
+    def _stage(self, operation: str, stage: str, collection: str = "") -> Iterator[None]:
+        """Record latency (and errors) of one pipeline stage."""
+        with track_stage(operation=operation, collection=collection, stage=stage, **self.metric_labels):
+            yield
+    
+    def _cached(self, cache: Dict[Any, T], key: Any, build: Callable[[], T]) -> T:
+        """Return cache[key], building it once under the lock on a miss."""
+        component = cache.get(key)
+        if component is None:
+            with self._components_lock:
+                component = cache.get(key)
+                if component is None:
+                    component = cache[key] = build()
+        return component
+    
+    def _get_retriever(
+        self,
+        collection: str,
+        top_k: int,
+        filters: Optional[MetadataFilters] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> BaseRetriever:
+        """Shared top-k retriever for a collection and filters (stateless, safe across threads)."""
+        generation = generation or self.generation
+        index = generation.indexes[collection]
+        return self._cached(
+            generation.retrievers,
+            (collection, top_k, filters.model_dump_json() if filters else None),
+            lambda: index.as_retriever(similarity_top_k=top_k, filters=filters),
+        )
+    
+    def _get_synthesizer(self, response_mode: ResponseMode = ResponseMode.COMPACT) -> BaseSynthesizer:
+        """Shared response synthesizer for a response mode."""
+        return self._cached(
+            self._synthesizers,
+            str(response_mode),
+            lambda: get_response_synthesizer(response_mode=response_mode),
+        )
+    
+    def _retrieve(
+        self,
+        collection: str,
+        query: str,
+        top_k: int,
+        operation: str,
+        filters: Optional[MetadataFilters] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[NodeWithScore]:
+        """
+        Embed the query, then search one collection (each stage timed).
+        
+        With a lexical index loaded, the top HYBRID_CANDIDATES vector hits and
+        BM25 hits are merged by reciprocal rank fusion before cutting to top_k.
+        Metadata filters apply to both searches; if nothing passes them (e.g.
+        an index built before the metadata existed), the search is repeated
+        without them. Searches the current generation unless given one.
+        """
+        generation = generation or self.generation
+        lexical = generation.lexical_indexes.get(collection)
+        candidates = max(top_k, config.HYBRID_CANDIDATES) if lexical else top_k
+        
+        with self._stage(operation, "retrieve", collection):
+            with self._stage(operation, "embed", collection):
+                query_bundle = QueryBundle(query_str=query, embedding=Settings.embed_model.get_query_embedding(query))
+            self.embed_warm = True
+            
+            for search_filters in ([filters, None] if filters is not None else [None]):
+                with self._stage(operation, "search", collection):
+                    retriever = self._get_retriever(collection, candidates, search_filters, generation)
+                    nodes = retriever.retrieve(query_bundle)
+                if lexical:
+                    with self._stage(operation, "lexical_search", collection):
+                        lexical_nodes = lexical.search(query, candidates, search_filters)
+                    nodes = reciprocal_rank_fusion([nodes, lexical_nodes], top_k)
+                if nodes:
+                    break
+            return nodes
+    
+    def _start_retrievals(
+        self,
+        lookups: Dict[str, Tuple[str, int]],
+        operation: str,
+        filters: Optional[Dict[str, MetadataFilters]] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> Dict[str, Future]:
+        """
+        Submit one lookup per collection to the retrieval pool, all or none.
+        
+        Raises:
+            RetrievalOverloaded: Submitting them would exceed the pool's capacity
+        """
+        filters = filters or {}
+        generation = generation or self.generation
+        with self._inflight_lock:
+            if self._inflight + len(lookups) > self._capacity:
+                self._shed += 1
+                raise RetrievalOverloaded(self._inflight, self._capacity)
+            self._inflight += len(lookups)
+        futures = {}
+        for collection, (query, top_k) in lookups.items():
+            future = self._executor.submit(
+                self._retrieve, collection, query, top_k, operation, filters.get(collection), generation
+            )
+            future.add_done_callback(self._retrieval_done)
+            futures[collection] = future
+        return futures
+    
+    def _retrieval_done(self, future: Future):
+        """Release a lookup's slot once it has finished or been cancelled."""
+        with self._inflight_lock:
+            self._inflight -= 1
+    
+    def _timed_out(self, futures: Dict[str, Future], pending: Iterable[Future], timeout: float) -> RetrievalTimeout:
+        """
+        Give up on lookups still pending at the deadline.
+        
+        Queued ones are cancelled; running ones cannot be interrupted, so they
+        are abandoned and keep their slot in the in-flight count until they
+        return.
+        """
+        pending = set(pending)
+        abandoned = sum(1 for future in pending if not future.cancel())
+        with self._inflight_lock:
+            self._timeouts += 1
+            self._abandoned += abandoned
+        return RetrievalTimeout([c for c, f in futures.items() if f in pending], timeout)
+    
+    def _retrieve_many(
+        self,
+        lookups: Dict[str, Tuple[str, int]],
+        operation: str,
+        filters: Optional[Dict[str, MetadataFilters]] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> Dict[str, List[NodeWithScore]]:
+        """
+        Retrieve from several collections concurrently under one deadline.
+        
+        Each branch is timed as the "retrieve" stage of its collection and the
+        whole fan-out as "retrieve_all", so the latter tracks the slowest
+        branch rather than the sum.
+        
+        Args:
+            lookups: Collection name -> (query, top_k)
+            operation: Operation label for the stage metrics
+            filters: Collection name -> metadata filters for its search
+            generation: Indexes every branch searches (default: the current ones)
+        
+        Returns:
+            Collection name -> retrieved nodes
+        
+        Raises:
+            RetrievalOverloaded: The pool has no room for every branch
+            RetrievalTimeout: A branch was still running at the deadline
+        """
+        timeout = config.RETRIEVAL_TIMEOUT_SECONDS or None
+        with self._stage(operation, "retrieve_all"):
+            futures = self._start_retrievals(lookups, operation, filters, generation)
+            _, pending = wait(futures.values(), timeout=timeout)
+            if pending:
+                raise self._timed_out(futures, pending, timeout)
+            return {collection: future.result() for collection, future in futures.items()}
+    
+    def _synthesize(self, query: str, nodes: List[NodeWithScore], operation: str, collection: str) -> str:
+        """Answer the query from the retrieved nodes with the LLM."""
+        with self._stage(operation, "synthesize", collection):
+            response = self._get_synthesizer().synthesize(query, nodes)
+        return str(response)
     
     def query_heroes(self, query: str, top_k: int = 5) -> str:
         """Query heroes knowledge base."""
         if not self.heroes_index:
             return "Heroes index not loaded."
         
-        query_engine = self.heroes_index.as_query_engine(similarity_top_k=top_k)
-        response = query_engine.query(query)
-        return str(response)
+        nodes = self._retrieve("heroes", query, top_k, "query_heroes")
+        return self._synthesize(query, nodes, "query_heroes", "heroes")
+    
+    def query_heroes_with_sources(
+        self,
+        query: str,
+        top_k: int = 5,
+        operation: str = "query_heroes"
+    ) -> Tuple[str, List[str]]:
+        """Query heroes knowledge base and also return the source file names."""
+        if not self.heroes_index:
+            return "Heroes index not loaded.", []
+        
+        nodes = self._retrieve("heroes", query, top_k, operation)
+        answer = self._synthesize(query, nodes, operation, "heroes")
+        sources = sorted({node.node.metadata.get("file_name", "") for node in nodes} - {""})
+        return answer, sources
     
     def query_maps(self, query: str, top_k: int = 5) -> str:
         """Query maps knowledge base."""
         if not self.maps_index:
             return "Maps index not loaded."
         
-        query_engine = self.maps_index.as_query_engine(similarity_top_k=top_k)
-        response = query_engine.query(query)
-        return str(response)
+        nodes = self._retrieve("maps", query, top_k, "query_maps")
+        return self._synthesize(query, nodes, "query_maps", "maps")
     
-    def query_team_composition(
+    def _team_queries(self, context: Dict[str, Any]) -> Tuple[str, str]:
+        """Build the heroes and maps retrieval queries for a team context."""
+        map_name = context.get("map", "")
+        enemy_team = context.get("enemy_team", [])
+        
+        heroes_query = f"""Information about heroes that counter {', '.join(enemy_team)} on map {map_name}. 
+        Also information about {', '.join(enemy_team)} to understand their weaknesses.
+        Include abilities, synergies, and counter strategies."""
+        
+        maps_query = f"Information about {map_name} map: strategy, key positions, recommended heroes"
+        return heroes_query, maps_query
+    
+    def _hero_filters(self, context: Dict[str, Any], entities: EntityIndex) -> Optional[MetadataFilters]:
+        """
+        Metadata filters for the team composition's hero search.
+        
+        Story sections are left out, and once the current team has filled
+        some roles, only heroes of the still open roles are candidates
+        (e.g. only supports next to a tank and two damage heroes).
+        """
+        if not config.RAG_METADATA_FILTERS:
+            return None
+        
+        filters = [MetadataFilter(key="section", value="story", operator=FilterOperator.NE)]
+        open_roles = entities.open_roles(context.get("current_team", []))
+        if open_roles:
+            filters.append(MetadataFilter(key="role", value=open_roles, operator=FilterOperator.IN))
+        return MetadataFilters(filters=filters)
+    
+    def _plan_team_retrieval(
         self,
         context: Dict[str, Any],
-        top_k_heroes: int = 10,
-        top_k_maps: int = 3
-    ) -> str:
+        heroes_query: str,
+        maps_query: str,
+        top_k_heroes: int,
+        top_k_maps: int,
+        operation: str,
+        generation: IndexGeneration
+    ) -> Tuple[Dict[str, List[NodeWithScore]], Dict[str, Tuple[str, int]], Dict[str, MetadataFilters]]:
         """
-        Query for team composition suggestions based on context.
+        Split team retrieval into direct entity fetches and vector lookups.
         
-        Args:
-            context: Dictionary containing:
-                - map: Map name
-                - enemy_team: List of enemy hero names
-                - current_team: List of current team hero names (optional)
-                - difficulties: Description of difficulties faced (optional)
-            top_k_heroes: Number of hero documents to retrieve
-            top_k_maps: Number of map documents to retrieve
+        Named enemy/current heroes and a recognized map are fetched from the
+        generation's entity index by key. The heroes collection is still searched for
+        counter picks (restricted by _hero_filters); the maps collection only
+        when the map is unknown.
         
         Returns:
-            Composition suggestion from LLM
+            (collection -> fetched nodes, collection -> (query, top_k) to
+            search, collection -> metadata filters for that search)
         """
-        if not self.heroes_index or not self.maps_index:
-            return "Indexes not fully loaded."
+        direct: Dict[str, List[NodeWithScore]] = {"heroes": [], "maps": []}
+        if config.RAG_ENTITY_LOOKUP:
+            with self._stage(operation, "entity_lookup"):
+                heroes = list(context.get("enemy_team", [])) + list(context.get("current_team", []))
+                direct["heroes"] = generation.entities.fetch("heroes", heroes)
+                direct["maps"] = generation.entities.fetch("maps", [context.get("map", "")])
+        
+        lookups = {"heroes": (heroes_query, top_k_heroes)}
+        filters = {}
+        hero_filters = self._hero_filters(context, generation.entities)
+        if hero_filters is not None:
+            filters["heroes"] = hero_filters
+        if not direct["maps"]:
+            lookups["maps"] = (maps_query, top_k_maps)
+        return direct, lookups, filters
+    
+    @staticmethod
+    def _merge_nodes(direct: List[NodeWithScore], searched: List[NodeWithScore], top_k: int) -> List[NodeWithScore]:
+        """
+        Fetched documents first, then search hits from other files.
         
-        # Build query
+        Fetched documents are always kept; search hits fill the rest of top_k,
+        but never fewer than half of it so counter picks still make it in.
+        """
+        fetched = {node.node.metadata.get("file_name") for node in direct}
+        others = [node for node in searched if node.node.metadata.get("file_name") not in fetched]
+        budget = max(top_k - len(direct), (top_k + 1) // 2) if direct else top_k
+        return direct + others[:budget]
+    
+    @staticmethod
+    def _format_nodes(nodes: List[NodeWithScore]) -> str:
+        """Join retrieved nodes into a prompt-ready context block."""
+        if not nodes:
+            return "No relevant documents found."
+        
+        blocks = []
+        for node in nodes:
+            source = node.node.metadata.get("file_name", "")
+            content = node.node.get_content().strip()
+            blocks.append(f"[{source}]\n{content}" if source else content)
+        return "\n\n".join(blocks)
+    
+    @staticmethod
+    def _resolve_context_mode(context_mode: Optional[str]) -> str:
+        """Validate the requested context mode, falling back to the configured one."""
+        mode = context_mode or config.RAG_CONTEXT_MODE
+        if mode not in CONTEXT_MODES:
+            raise ValueError(f"Unknown context mode: {mode}. Choose from: {', '.join(CONTEXT_MODES)}")
+        return mode
+    
+    @staticmethod
+    def _resolve_output_format(output_format: Optional[str]) -> str:
+        """Validate the requested output format, falling back to the configured one."""
+        output_format = output_format or config.TEAM_OUTPUT_FORMAT
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}. Choose from: {', '.join(OUTPUT_FORMATS)}")
+        return output_format
+    
+    def _completion_kwargs(self, output_format: str) -> Dict[str, Any]:
+        """Provider options that constrain the final completion to JSON."""
+        if output_format != "json":
+            return {}
+        if self.provider == "ollama":
+            # Ollama structured outputs: decoding follows the JSON schema
+            return {"format": TeamCompositionJSON.model_json_schema()}
+        # OpenAI-compatible providers (openai, azure, github): JSON mode
+        return {"response_format": {"type": "json_object"}}
+    
+    def _build_team_prompt(
+        self,
+        context: Dict[str, Any],
+        heroes_context: str,
+        maps_context: str,
+        output_format: str = "text"
+    ) -> str:
+        """Build the final team composition prompt from retrieved knowledge."""
         map_name = context.get("map", "")
         enemy_team = context.get("enemy_team", [])
         current_team = context.get("current_team", [])
         difficulties = context.get("difficulties", "")
         
-        # Retrieve relevant heroes info
-        heroes_query = f"""Information about heroes that counter {', '.join(enemy_team)} on map {map_name}. 
-        Also information about {', '.join(enemy_team)} to understand their weaknesses.
-        Include abilities, synergies, and counter strategies."""
-        
-        heroes_engine = self.heroes_index.as_query_engine(similarity_top_k=top_k_heroes)
-        heroes_context = heroes_engine.query(heroes_query)
-        
-        # Retrieve map info
-        maps_query = f"Information about {map_name} map: strategy, key positions, recommended heroes"
-        maps_engine = self.maps_index.as_query_engine(similarity_top_k=top_k_maps)
-        maps_context = maps_engine.query(maps_query)
-        
-        # Build optimized prompt
-        prompt = f"""You are an expert Overwatch coach. Suggest an optimal 5-hero team composition.
+        return f"""You are an expert Overwatch coach. Suggest an optimal 5-hero team composition.
 
 **CONTEXT:**
 Map: {map_name}
@@ -124,30 +728,256 @@ Difficulties: {difficulties if difficulties else 'None specified'}
 
 Map Info: {maps_context}
 
-**YOUR RESPONSE MUST BE STRUCTURED AS:**
-
-1. RECOMMENDED TEAM (exactly 5 heroes):
-Tank: [Hero Name] - [One sentence why]
-Damage: [Hero Name] - [One sentence why]
-Damage: [Hero Name] - [One sentence why]
-Support: [Hero Name] - [One sentence why]
-Support: [Hero Name] - [One sentence why]
-
-2. COUNTER STRATEGY:
-[2-3 sentences explaining how this team counters the enemy]
-
-3. KEY SYNERGIES:
-[2-3 sentences about ability combos and team playstyle]
-
-4. ALTERNATIVES:
-[List 2-3 substitute heroes with brief reasons]
-
-Keep responses concise and actionable. Focus on current Overwatch meta.
+{JSON_RESPONSE_INSTRUCTIONS if output_format == "json" else TEXT_RESPONSE_INSTRUCTIONS}
 """
+    
+    def query_team_composition(
+        self,
+        context: Dict[str, Any],
+        top_k_heroes: Optional[int] = None,
+        top_k_maps: Optional[int] = None,
+        context_mode: Optional[ContextMode] = None,
+        output_format: Optional[OutputFormat] = None
+    ) -> str:
+        """
+        Query for team composition suggestions based on context.
+        
+        Args:
+            context: Dictionary containing:
+                - map: Map name
+                - enemy_team: List of enemy hero names
+                - current_team: List of current team hero names (optional)
+                - difficulties: Description of difficulties faced (optional)
+            top_k_heroes: Number of hero documents to retrieve (defaults to
+                config.TEAM_TOP_K_HEROES)
+            top_k_maps: Number of map documents to retrieve (defaults to
+                config.TEAM_TOP_K_MAPS)
+            context_mode: "synthesize" to summarize each collection with the
+                LLM first, "retrieve" to pass the raw top-k nodes straight into
+                the final prompt (defaults to config.RAG_CONTEXT_MODE)
+            output_format: "text" for the sectioned prose format, "json" to
+                have the provider return TeamCompositionJSON (defaults to
+                config.TEAM_OUTPUT_FORMAT)
+        
+        Returns:
+            Composition suggestion from LLM
+        """
+        # One generation for the whole request, even if a reload swaps it meanwhile
+        generation = self.generation
+        if "heroes" not in generation.indexes or "maps" not in generation.indexes:
+            return "Indexes not fully loaded."
+        
+        mode = self._resolve_context_mode(context_mode)
+        output_format = self._resolve_output_format(output_format)
+        top_k_heroes = top_k_heroes or config.TEAM_TOP_K_HEROES
+        top_k_maps = top_k_maps or config.TEAM_TOP_K_MAPS
+        heroes_query, maps_query = self._team_queries(context)
+        operation = "team_composition"
+        
+        # Fetch named heroes and the map directly, search (concurrently) for the rest
+        direct, lookups, filters = self._plan_team_retrieval(
+            context, heroes_query, maps_query, top_k_heroes, top_k_maps, operation, generation
+        )
+        nodes = self._retrieve_many(lookups, operation, filters, generation)
+        heroes_nodes = self._merge_nodes(direct["heroes"], nodes["heroes"], top_k_heroes)
+        maps_nodes = self._merge_nodes(direct["maps"], nodes.get("maps", []), top_k_maps)
+        
+        if mode == "retrieve":
+            # Raw nodes only: the final completion is the single LLM call
+            heroes_context = self._format_nodes(heroes_nodes)
+            maps_context = self._format_nodes(maps_nodes)
+        else:
+            heroes_context = self._synthesize(heroes_query, heroes_nodes, operation, "heroes")
+            maps_context = self._synthesize(maps_query, maps_nodes, operation, "maps")
+        
+        # Build optimized prompt
+        prompt = self._build_team_prompt(context, heroes_context, maps_context, output_format)
         
         # Query with full context
-        response = Settings.llm.complete(prompt)
+        with self._stage(operation, "llm"):
+            response = Settings.llm.complete(prompt, **self._completion_kwargs(output_format))
+        return str(response)
+    
+    # ------------------------------------------------------------------
+    # Async API (used by the FastAPI handlers)
+    # ------------------------------------------------------------------
+    
+    async def _aretrieve(
+        self,
+        collection: str,
+        query: str,
+        top_k: int,
+        operation: str,
+        filters: Optional[MetadataFilters] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[NodeWithScore]:
+        """Embed the query and search the collection on the retrieval pool."""
+        futures = self._start_retrievals(
+            {collection: (query, top_k)}, operation, {collection: filters}, generation
+        )
+        return await asyncio.wrap_future(futures[collection])
+    
+    async def _aretrieve_many(
+        self,
+        lookups: Dict[str, Tuple[str, int]],
+        operation: str,
+        filters: Optional[Dict[str, MetadataFilters]] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> Dict[str, List[NodeWithScore]]:
+        """Async version of _retrieve_many (branches run on the retrieval pool)."""
+        timeout = config.RETRIEVAL_TIMEOUT_SECONDS or None
+        futures = self._start_retrievals(lookups, operation, filters, generation)
+        tasks = {collection: asyncio.wrap_future(future) for collection, future in futures.items()}
+        try:
+            with self._stage(operation, "retrieve_all"):
+                _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+                if pending:
+                    raise self._timed_out(futures, [futures[c] for c, t in tasks.items() if t in pending], timeout)
+                return {collection: task.result() for collection, task in tasks.items()}
+        finally:
+            # No-op for finished branches; stops waiting on the rest
+            for task in tasks.values():
+                task.cancel()
+    
+    async def _asynthesize(
+        self,
+        query: str,
+        nodes: List[NodeWithScore],
+        operation: str,
+        collection: str
+    ) -> str:
+        """Answer the query from the retrieved nodes with the async LLM API."""
+        with self._stage(operation, "synthesize", collection):
+            response = await self._get_synthesizer().asynthesize(query, nodes)
+        return str(response)
+    
+    async def _aquery_collection(self, collection: str, query: str, top_k: int, operation: str) -> str:
+        """Retrieve off the event loop, then synthesize an answer asynchronously."""
+        nodes = await self._aretrieve(collection, query, top_k, operation)
+        return await self._asynthesize(query, nodes, operation, collection)
+    
+    async def aquery_heroes(self, query: str, top_k: int = 5) -> str:
+        """Async version of query_heroes."""
+        if not self.heroes_index:
+            return "Heroes index not loaded."
+        
+        return await self._aquery_collection("heroes", query, top_k, "query_heroes")
+    
+    async def aquery_maps(self, query: str, top_k: int = 5) -> str:
+        """Async version of query_maps."""
+        if not self.maps_index:
+            return "Maps index not loaded."
+        
+        return await self._aquery_collection("maps", query, top_k, "query_maps")
+    
+    async def _aprepare_team_prompt(
+        self,
+        context: Dict[str, Any],
+        top_k_heroes: Optional[int],
+        top_k_maps: Optional[int],
+        context_mode: Optional[ContextMode],
+        output_format: str,
+        generation: IndexGeneration
+    ) -> str:
+        """Retrieve hero and map knowledge from one generation and build the final prompt."""
+        mode = self._resolve_context_mode(context_mode)
+        top_k_heroes = top_k_heroes or config.TEAM_TOP_K_HEROES
+        top_k_maps = top_k_maps or config.TEAM_TOP_K_MAPS
+        heroes_query, maps_query = self._team_queries(context)
+        operation = "team_composition"
+        
+        direct, lookups, filters = self._plan_team_retrieval(
+            context, heroes_query, maps_query, top_k_heroes, top_k_maps, operation, generation
+        )
+        nodes = await self._aretrieve_many(lookups, operation, filters, generation)
+        heroes_nodes = self._merge_nodes(direct["heroes"], nodes["heroes"], top_k_heroes)
+        maps_nodes = self._merge_nodes(direct["maps"], nodes.get("maps", []), top_k_maps)
+        
+        if mode == "retrieve":
+            heroes_context = self._format_nodes(heroes_nodes)
+            maps_context = self._format_nodes(maps_nodes)
+        else:
+            heroes_context = await self._asynthesize(heroes_query, heroes_nodes, operation, "heroes")
+            maps_context = await self._asynthesize(maps_query, maps_nodes, operation, "maps")
+        
+        return self._build_team_prompt(context, heroes_context, maps_context, output_format)
+    
+    async def aquery_team_composition(
+        self,
+        context: Dict[str, Any],
+        top_k_heroes: Optional[int] = None,
+        top_k_maps: Optional[int] = None,
+        context_mode: Optional[ContextMode] = None,
+        output_format: Optional[OutputFormat] = None
+    ) -> str:
+        """
+        Async version of query_team_composition.
+        
+        Embedding and vector search run on a bounded thread pool, while
+        response synthesis and the final completion use the LLM's async API,
+        so the event loop stays free for other requests.
+        """
+        generation = self.generation
+        if "heroes" not in generation.indexes or "maps" not in generation.indexes:
+            return "Indexes not fully loaded."
+        
+        output_format = self._resolve_output_format(output_format)
+        prompt = await self._aprepare_team_prompt(
+            context, top_k_heroes, top_k_maps, context_mode, output_format, generation
+        )
+        
+        with self._stage("team_composition", "llm"):
+            response = await Settings.llm.acomplete(prompt, **self._completion_kwargs(output_format))
         return str(response)
+    
+    async def astream_team_composition(
+        self,
+        context: Dict[str, Any],
+        top_k_heroes: Optional[int] = None,
+        top_k_maps: Optional[int] = None,
+        context_mode: Optional[ContextMode] = None,
+        output_format: Optional[OutputFormat] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a team composition suggestion token by token.
+        
+        Retrieval runs exactly as in aquery_team_composition; the final
+        completion goes through the provider's streaming API and each text
+        delta is yielded as soon as it arrives.
+        """
+        generation = self.generation
+        if "heroes" not in generation.indexes or "maps" not in generation.indexes:
+            yield "Indexes not fully loaded."
+            return
+        
+        output_format = self._resolve_output_format(output_format)
+        prompt = await self._aprepare_team_prompt(
+            context, top_k_heroes, top_k_maps, context_mode, output_format, generation
+        )
+        
+        # "llm_first_token" is time to first delta, "llm" the whole generation
+        operation = "team_composition"
+        start = time.perf_counter()
+        first_token = True
+        with self._stage(operation, "llm"):
+            stream = await Settings.llm.astream_complete(prompt, **self._completion_kwargs(output_format))
+            async for chunk in stream:
+                if first_token and chunk.delta:
+                    first_token = False
+                    RAG_STAGE_SECONDS.observe(
+                        time.perf_counter() - start,
+                        operation=operation, collection="", stage="llm_first_token", **self.metric_labels
+                    )
+                if chunk.delta:
+                    yield chunk.delta
+    
+    def close(self):
+        """Release the retrieval thread pool and persist the embedding cache."""
+        self._executor.shutdown(wait=False)
+        try:
+            self.embed_cache.save()
+        except Exception as e:
+            print(f"⚠ Could not save embedding cache: {e}")
 
 
 def main():
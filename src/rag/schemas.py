@@ -0,0 +1,20 @@
+"""Structured output the LLM is asked to produce (shared with the API models)."""
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class HeroRecommendation(BaseModel):
+    """Model for a single hero recommendation."""
+    
+    name: str = Field(..., description="Hero name")
+    role: str = Field(..., description="Hero role (tank, damage, support)")
+    reasoning: str = Field(..., description="Why this hero is recommended")
+
+
+class TeamCompositionJSON(BaseModel):
+    """Schema the LLM fills in when asked for JSON output."""
+    
+    recommended_team: List[HeroRecommendation] = Field(..., min_length=1)
+    strategy: str
+    synergies: str
+    alternatives: List[str] = []
@@ -0,0 +1,318 @@
+"""
+Single-file snapshot of everything the retriever loads, built once and shipped.
+
+Layout (little-endian):
+    magic      8 bytes, b"OCSNAP\\0\\0"
+    length     uint64, size of the header
+    header     UTF-8 JSON: format version, index version, embedding model,
+               per-collection counts and the offset/length of every section
+    sections   each starting on a 64-byte boundary (offsets are relative to
+               the first one):
+               per collection, "vectors" (count x dim float32, L2-normalized),
+               "ids" (JSON list), "offsets" (count + 1 uint64) and "nodes"
+               (node JSON back to back, node i at offsets[i]:offsets[i + 1]),
+               "lexical" (BM25 terms as a JSON list, postings as int arrays,
+               sharing the ids and nodes); "entities" (JSON of the hero and
+               map markdown)
+
+IndexSnapshot.open() memory-maps the file: matrices are NumPy views of the
+mapping (no copy, and its pages are shared by every worker on the host) and
+BM25 postings are views too, and nodes are only decoded when first needed,
+so loading mostly costs parsing the ids and terms, whatever the size of the
+corpus text.
+
+Usage:
+    python -m src.rag.snapshot [path]    # what a snapshot holds, load time
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from src.rag.entities import EntityIndex
+from src.rag.index_version import UNVERSIONED
+from src.rag.lexical import BM25Index
+from src.rag.vector_stores import NumpyVectorStore, export_rows
+from src.utils.config import config
+
+SNAPSHOT_MAGIC = b"OCSNAP\x00\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_COLLECTIONS = ("heroes", "maps")
+
+# Magic and header length
+_PREFIX = struct.Struct("<8sQ")
+_ALIGNMENT = 64
+# BM25Index.arrays() -> stored dtype
+_LEXICAL_DTYPES = {"starts": "<i8", "rows": "<i4", "freqs": "<i4", "doc_lengths": "<i4"}
+
+
+def default_snapshot_path() -> str:
+    """INDEX_SNAPSHOT_PATH, or index.snapshot next to the vector stores."""
+    return config.INDEX_SNAPSHOT_PATH or os.path.join(config.CHROMA_DB_PATH, "index.snapshot")
+
+
+def read_snapshot_version(path: str) -> Optional[str]:
+    """Index version in a snapshot's header, read without mapping the file (None if unreadable)."""
+    try:
+        with open(path, "rb") as f:
+            magic, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != SNAPSHOT_MAGIC:
+                return None
+            return json.loads(f.read(header_length)).get("index_version")
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _json_bytes(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_snapshot(
+    path: str,
+    stores: Dict[str, BasePydanticVectorStore],
+    entity_documents: Dict[str, Dict[str, str]],
+    embed_model: str,
+    fingerprints: Optional[Dict[str, str]] = None,
+    index_version: str = UNVERSIONED
+) -> Dict[str, Any]:
+    """
+    Write a snapshot atomically.
+    
+    The lexical index of each collection is rebuilt over the store's own
+    rows, so it always matches the vectors it is fused with.
+    
+    Args:
+        path: Snapshot file to write
+        stores: Collection name -> vector store (either backend)
+        entity_documents: EntityIndex.read_documents() output
+        embed_model: Name of the model that produced the vectors
+        fingerprints: Collection name -> indexing pipeline fingerprint
+        index_version: Index version the snapshot is taken at
+    
+    Returns:
+        The snapshot header
+    """
+    sections: List[Tuple[Dict[str, int], bytes]] = []
+    
+    def section(payload: bytes) -> Dict[str, int]:
+        ref = {"offset": 0, "length": len(payload)}
+        sections.append((ref, payload))
+        return ref
+    
+    collections = {}
+    for name, store in stores.items():
+        ids, nodes, matrix = export_rows(store)
+        encoded = [_json_bytes(node) for node in nodes]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(node) for node in encoded], dtype=np.uint64)
+        lexical = BM25Index.from_nodes([metadata_dict_to_node(node) for node in nodes])
+        collections[name] = {
+            "count": len(ids),
+            "dimensions": int(matrix.shape[1]) if len(ids) else 0,
+            "fingerprint": (fingerprints or {}).get(name, ""),
+            "vectors": section(np.ascontiguousarray(matrix, dtype="<f4").tobytes()),
+            "ids": section(_json_bytes(ids)),
+            "offsets": section(offsets.tobytes()),
+            "nodes": section(b"".join(encoded)),
+            "lexical": {
+                "k1": lexical.k1,
+                "b": lexical.b,
+                "terms": section(_json_bytes(lexical.terms())),
+                **{
+                    key: section(np.ascontiguousarray(array, dtype=_LEXICAL_DTYPES[key]).tobytes())
+                    for key, array in lexical.arrays().items()
+                },
+            },
+        }
+    entities = section(_json_bytes(entity_documents))
+    
+    position = 0
+    for ref, payload in sections:
+        ref["offset"] = position = _align(position)
+        position += len(payload)
+    header = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.time(),
+        "index_version": index_version,
+        "embed_model": embed_model,
+        "collections": collections,
+        "entities": entities,
+        "data_length": position,
+    }
+    header_bytes = _json_bytes(header)
+    base = _align(_PREFIX.size + len(header_bytes))
+    
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(SNAPSHOT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        for ref, payload in sections:
+            f.seek(base + ref["offset"])
+            f.write(payload)
+        f.truncate(base + position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return header
+
+
+class _NodeTable(Sequence):
+    """Node dicts of one collection, each decoded from the mapping on first access."""
+    
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+        self._decoded: List[Optional[Dict[str, Any]]] = [None] * (len(offsets) - 1)
+    
+    def __len__(self) -> int:
+        return len(self._decoded)
+    
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        node = self._decoded[row]
+        if node is None:
+            start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+            node = self._decoded[row] = json.loads(bytes(self._blob[start:end]))
+        return node
+
+
+class IndexSnapshot:
+    """
+    A memory-mapped snapshot file.
+    
+    The vector stores, lexical indexes and entity index built from it read
+    the mapping directly; it stays mapped as long as any of them is in use.
+    """
+    
+    def __init__(self, path: str, buffer: mmap.mmap, header: Dict[str, Any], base: int):
+        self.path = path
+        self.header = header
+        self._buffer = buffer
+        self._base = base
+        # Collection -> (ids, nodes), shared by its vector store and lexical index
+        self._rows: Dict[str, Tuple[List[str], _NodeTable]] = {}
+    
+    @classmethod
+    def open(cls, path: str) -> "IndexSnapshot":
+        """
+        Map a snapshot file and check its header.
+        
+        Raises:
+            OSError: The file can't be read
+            ValueError: Not a snapshot, another format version, or truncated
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _PREFIX.size:
+                raise ValueError(f"{path} is not an index snapshot")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, header_length = _PREFIX.unpack_from(buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not an index snapshot")
+        header = json.loads(buffer[_PREFIX.size:_PREFIX.size + header_length])
+        if header.get("version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported index snapshot format in {path}")
+        base = _align(_PREFIX.size + header_length)
+        if len(buffer) < base + header["data_length"]:
+            raise ValueError(f"{path} is truncated")
+        return cls(path, buffer, header, base)
+    
+    @property
+    def index_version(self) -> str:
+        """Index version the snapshot was taken at."""
+        return self.header["index_version"]
+    
+    @property
+    def embed_model(self) -> str:
+        """Embedding model that produced the vectors."""
+        return self.header["embed_model"]
+    
+    def _section(self, ref: Dict[str, int]) -> memoryview:
+        start = self._base + ref["offset"]
+        return memoryview(self._buffer)[start:start + ref["length"]]
+    
+    def _collection(self, name: str) -> Dict[str, Any]:
+        collection = self.header["collections"].get(name)
+        if collection is None:
+            raise ValueError(f"No {name} collection in {self.path}")
+        return collection
+    
+    def _collection_rows(self, name: str) -> Tuple[List[str], _NodeTable]:
+        rows = self._rows.get(name)
+        if rows is None:
+            collection = self._collection(name)
+            ids = json.loads(bytes(self._section(collection["ids"])))
+            offsets = np.frombuffer(self._section(collection["offsets"]), dtype="<u8")
+            rows = self._rows[name] = (ids, _NodeTable(offsets, self._section(collection["nodes"])))
+        return rows
+    
+    def vector_store(self, name: str) -> NumpyVectorStore:
+        """Read-only store over the collection's vectors (a view of the mapping)."""
+        collection = self._collection(name)
+        ids, nodes = self._collection_rows(name)
+        matrix = np.frombuffer(self._section(collection["vectors"]), dtype="<f4")
+        return NumpyVectorStore(
+            ids=list(ids),
+            nodes=nodes,
+            matrix=matrix.reshape(collection["count"], collection["dimensions"]),
+        )
+    
+    def lexical_index(self, name: str) -> BM25Index:
+        """BM25 index over the same rows as vector_store(name)."""
+        ids, nodes = self._collection_rows(name)
+        lexical = self._collection(name)["lexical"]
+        arrays = {
+            key: np.frombuffer(self._section(lexical[key]), dtype=dtype)
+            for key, dtype in _LEXICAL_DTYPES.items()
+        }
+        terms = json.loads(bytes(self._section(lexical["terms"])))
+        return BM25Index.from_arrays(ids, nodes, terms, arrays, k1=lexical["k1"], b=lexical["b"])
+    
+    def entity_index(self) -> EntityIndex:
+        """Entity index over the hero and map documents in the snapshot."""
+        return EntityIndex.from_documents(json.loads(bytes(self._section(self.header["entities"]))))
+
+
+def main():
+    """Print what a snapshot holds and how long loading it takes."""
+    parser = argparse.ArgumentParser(description="Inspect an index snapshot")
+    parser.add_argument("path", nargs="?", default=default_snapshot_path())
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    snapshot = IndexSnapshot.open(args.path)
+    stores = {name: snapshot.vector_store(name) for name in snapshot.header["collections"]}
+    lexical = {name: snapshot.lexical_index(name) for name in snapshot.header["collections"]}
+    entities = snapshot.entity_index().stats()
+    elapsed = time.perf_counter() - start
+    
+    header = snapshot.header
+    print(f"Snapshot: {args.path} ({os.path.getsize(args.path) / 1024 / 1024:.1f} MB)")
+    print(f"Index version: {header['index_version']}")
+    print(f"Created: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created_at']))}")
+    print(f"Embedding model: {header['embed_model']}")
+    for name, store in stores.items():
+        collection = header["collections"][name]
+        print(f"{name.capitalize()}: {store.count()} vectors x {collection['dimensions']} dims, "
+              f"{len(lexical[name])} lexical nodes, fingerprint {collection['fingerprint'] or '-'}")
+    print(f"Entities: {entities['heroes']} heroes, {entities['maps']} maps")
+    print(f"Loaded in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Vector store backends for the heroes and maps collections."""
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+from src.utils.config import config
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+STORE_FORMAT_VERSION = 1
+
+
+def numpy_store_path(name: str) -> str:
+    """Path prefix of a collection's .npy/.json pair."""
+    return str(Path(config.NUMPY_STORE_PATH) / name)
+
+
+def numpy_store_files(persist_path: str) -> List[Path]:
+    """Every file of a persisted store: the .json and each matrix generation."""
+    path = Path(persist_path)
+    files = list(path.parent.glob(f"{path.name}.*.npy"))
+    return files + [Path(f"{persist_path}.json"), Path(f"{persist_path}.npy")]
+
+
+def metadata_matches(metadata: Dict[str, Any], filters: MetadataFilters) -> bool:
+    """
+    Whether node metadata passes the filters (EQ, NE, IN and NIN, nested
+    with AND/OR). A missing key only passes NE and NIN.
+    
+    Raises:
+        NotImplementedError: Another operator or condition is used
+    """
+    results = []
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            results.append(metadata_matches(metadata, metadata_filter))
+            continue
+        value = metadata.get(metadata_filter.key)
+        operator = metadata_filter.operator
+        if operator == FilterOperator.EQ:
+            results.append(value == metadata_filter.value)
+        elif operator == FilterOperator.NE:
+            results.append(value != metadata_filter.value)
+        elif operator == FilterOperator.IN:
+            results.append(value in metadata_filter.value)
+        elif operator == FilterOperator.NIN:
+            results.append(value not in metadata_filter.value)
+        else:
+            raise NotImplementedError(f"Unsupported metadata filter operator: {operator}")
+    
+    if filters.condition == FilterCondition.OR:
+        return any(results)
+    if filters.condition in (FilterCondition.AND, None):
+        return all(results)
+    raise NotImplementedError(f"Unsupported metadata filter condition: {filters.condition}")
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """
+    Exact top-k search over an in-process NumPy matrix.
+    
+    Embeddings are L2-normalized and stacked into one contiguous float32
+    matrix, so a query is a single matrix-vector product (cosine similarity)
+    and a batch of queries a single matrix product. Nodes are kept alongside
+    as the same metadata dicts Chroma stores. persist() writes the matrix
+    to a new <path>.<generation>.npy, then swaps in <path>.json (ids, nodes
+    and the matrix file name), so a reader always sees a matching pair;
+    from_persist_path() memory-maps the matrix, so forked workers share it.
+    """
+    
+    stores_text: bool = True
+    flat_metadata: bool = False
+    
+    _ids: List[str] = PrivateAttr()
+    _nodes: List[Dict[str, Any]] = PrivateAttr()
+    _node_objects: List[Optional[BaseNode]] = PrivateAttr()
+    _matrix: np.ndarray = PrivateAttr()
+    # Filters (as JSON) -> boolean row mask, reset whenever rows change
+    _filter_masks: Dict[str, np.ndarray] = PrivateAttr(default_factory=dict)
+    
+    def __init__(
+        self,
+        ids: Optional[List[str]] = None,
+        nodes: Optional[List[Dict[str, Any]]] = None,
+        matrix: Optional[np.ndarray] = None
+    ):
+        super().__init__()
+        self._ids = ids or []
+        self._nodes = nodes or []
+        self._node_objects = [None] * len(self._nodes)
+        self._matrix = matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32)
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+    
+    @property
+    def client(self) -> None:
+        return None
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """The (count, dim) matrix of normalized embeddings."""
+        return self._matrix
+    
+    def count(self) -> int:
+        """Number of stored vectors."""
+        return len(self._ids)
+    
+    def rows(self) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray]:
+        """Ids, node dicts and normalized matrix, in row order."""
+        return list(self._ids), list(self._nodes), self._matrix
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+    
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        """Append nodes (which must carry embeddings) to the matrix."""
+        if not nodes:
+            return []
+        vectors = self._normalize(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        
+        self._matrix = vectors if not self._ids else np.vstack([self._matrix, vectors])
+        self._ids.extend(node.node_id for node in nodes)
+        self._nodes.extend(
+            node_to_metadata_dict(node, remove_text=False, flat_metadata=self.flat_metadata)
+            for node in nodes
+        )
+        self._node_objects.extend([None] * len(nodes))
+        self._filter_masks = {}
+        return [node.node_id for node in nodes]
+    
+    def _keep(self, keep: np.ndarray):
+        self._matrix = self._matrix[keep]
+        self._ids = [node_id for node_id, kept in zip(self._ids, keep) if kept]
+        self._nodes = [node for node, kept in zip(self._nodes, keep) if kept]
+        self._node_objects = [node for node, kept in zip(self._node_objects, keep) if kept]
+        self._filter_masks = {}
+    
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """Remove every node of a source document."""
+        keep = np.array([node.get("ref_doc_id") != ref_doc_id for node in self._nodes], dtype=bool)
+        self._keep(keep)
+    
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any
+    ) -> None:
+        """Remove nodes by id and/or matching metadata filters."""
+        doomed = np.zeros(len(self._ids), dtype=bool)
+        if node_ids:
+            ids = set(node_ids)
+            doomed |= np.array([node_id in ids for node_id in self._ids], dtype=bool)
+        if filters is not None:
+            doomed |= self._filter_mask(filters)
+        self._keep(~doomed)
+    
+    def clear(self) -> None:
+        """Remove every node."""
+        self._ids, self._nodes, self._node_objects = [], [], []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._filter_masks = {}
+    
+    def _filter_mask(self, filters: MetadataFilters) -> np.ndarray:
+        """Boolean mask of the rows whose metadata passes the filters (memoized)."""
+        key = filters.model_dump_json()
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.array([metadata_matches(node, filters) for node in self._nodes], dtype=bool)
+            self._filter_masks[key] = mask
+        return mask
+    
+    def _top_k(self, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Row indices of the top_k scores, best first."""
+        top_k = min(top_k, scores.shape[-1])
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        return candidates[np.argsort(-scores[candidates])]
+    
+    def _node(self, row: int) -> BaseNode:
+        """Node of a row, deserialized on first use (callers get a copy)."""
+        node = self._node_objects[row]
+        if node is None:
+            node = self._node_objects[row] = metadata_dict_to_node(self._nodes[row])
+        return node.model_copy()
+    
+    def _result(self, scores: np.ndarray, rows: np.ndarray) -> VectorStoreQueryResult:
+        nodes = [self._node(row) for row in rows]
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=[float(scores[row]) for row in rows],
+            ids=[self._ids[row] for row in rows],
+        )
+    
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Exact cosine top-k for one query embedding, optionally filtered by metadata."""
+        if not self._ids or query.query_embedding is None:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+        
+        vector = self._normalize(np.asarray(query.query_embedding, dtype=np.float32))
+        scores = self._matrix @ vector
+        if query.node_ids:
+            # Restrict the search to the given nodes
+            allowed = set(query.node_ids)
+            scores = np.where([node_id in allowed for node_id in self._ids], scores, -np.inf)
+        if query.filters is not None:
+            scores = np.where(self._filter_mask(query.filters), scores, -np.inf)
+        rows = self._top_k(scores, query.similarity_top_k)
+        # Excluded rows can only come up when fewer rows are allowed than top_k
+        return self._result(scores, rows[np.isfinite(scores[rows])])
+    
+    def query_many(self, query_embeddings: Sequence[Sequence[float]], similarity_top_k: int) -> List[VectorStoreQueryResult]:
+        """Exact cosine top-k for a batch of query embeddings in one matrix product."""
+        if not self._ids or not len(query_embeddings):
+            return [VectorStoreQueryResult(nodes=[], similarities=[], ids=[]) for _ in query_embeddings]
+        
+        vectors = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+        scores = vectors @ self._matrix.T
+        return [self._result(row_scores, self._top_k(row_scores, similarity_top_k)) for row_scores in scores]
+    
+    def persist(self, persist_path: str, fs=None) -> None:
+        """
+        Write a new matrix generation, then point <persist_path>.json at it.
+        
+        The .json replace is the only step readers can observe, so the
+        matrix and nodes always change together. Older generations are
+        removed afterwards (readers that already mapped them keep them open).
+        """
+        Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+        matrix_path = Path(f"{persist_path}.{uuid.uuid4().hex[:12]}.npy")
+        nodes_path = f"{persist_path}.json"
+        
+        with open(matrix_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(self._matrix, dtype=np.float32))
+        with open(f"{nodes_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": STORE_FORMAT_VERSION, "matrix": matrix_path.name, "ids": self._ids, "nodes": self._nodes},
+                f,
+                ensure_ascii=False
+            )
+        os.replace(f"{nodes_path}.tmp", nodes_path)
+        
+        for path in numpy_store_files(persist_path):
+            if path.suffix == ".npy" and path != matrix_path:
+                path.unlink(missing_ok=True)
+    
+    @classmethod
+    def from_persist_path(cls, persist_path: str, fs=None, mmap: bool = True) -> "NumpyVectorStore":
+        """Load a persisted store, memory-mapping the matrix by default."""
+        for attempt in range(2):
+            with open(f"{persist_path}.json", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != STORE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported vector store format in {persist_path}.json")
+            
+            # Stores written before matrix generations use a fixed name
+            matrix_path = Path(persist_path).parent / data.get("matrix", f"{Path(persist_path).name}.npy")
+            try:
+                matrix = np.load(matrix_path, mmap_mode="r" if mmap else None)
+                break
+            except FileNotFoundError:
+                # Replaced by a concurrent persist() between the two reads
+                if attempt:
+                    raise
+        
+        if matrix.shape[0] != len(data["ids"]):
+            raise ValueError(f"{matrix_path} has {matrix.shape[0]} rows for {len(data['ids'])} ids")
+        return cls(ids=data["ids"], nodes=data["nodes"], matrix=matrix)
+
+
+def open_vector_store(name: str, chroma_client=None) -> BasePydanticVectorStore:
+    """
+    Open an existing collection with the configured backend.
+    
+    Raises:
+        Exception: The collection has not been indexed yet
+    """
+    if config.VECTOR_BACKEND == "numpy":
+        return NumpyVectorStore.from_persist_path(numpy_store_path(name))
+    
+    from llama_index.vector_stores.chroma import ChromaVectorStore
+    
+    return ChromaVectorStore(chroma_collection=chroma_client.get_collection(name))
+
+
+def export_rows(store: BasePydanticVectorStore) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray]:
+    """
+    Every node of a store of either backend, as NumpyVectorStore holds them.
+    
+    Returns:
+        (ids, node dicts with their text, (count, dim) float32 matrix of
+        L2-normalized embeddings), in the same row order
+    """
+    if isinstance(store, NumpyVectorStore):
+        return store.rows()
+    
+    data = store.client.get(include=["embeddings", "metadatas", "documents"])
+    nodes = [
+        node_to_metadata_dict(metadata_dict_to_node(metadata, text=text), remove_text=False, flat_metadata=False)
+        for metadata, text in zip(data["metadatas"], data["documents"])
+    ]
+    matrix = np.asarray(data["embeddings"], dtype=np.float32).reshape(len(nodes), -1)
+    return list(data["ids"]), nodes, NumpyVectorStore._normalize(matrix)
+
+
+def vector_count(store: BasePydanticVectorStore) -> int:
+    """Number of vectors in a store of either backend."""
+    if isinstance(store, NumpyVectorStore):
+        return store.count()
+    return store.client.count()
@@ -11,13 +11,115 @@ class Config:
     # Ollama
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral:7b")
+    # How long Ollama keeps the LLM and embedding models loaded after a request
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
     
     # OverFast API
     OVERFAST_API_URL = os.getenv("OVERFAST_API_URL", "https://overfast-api.tekrop.fr")
     
+    # Hero/map catalog served by /heroes and /maps
+    # Rescan interval for data/raw (0 = load once at startup)
+    CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "0"))
+    # Fetch listings from OverFast when nothing has been ingested yet
+    CATALOG_OVERFAST_FALLBACK = os.getenv("CATALOG_OVERFAST_FALLBACK", "true").lower() == "true"
+    
     # ChromaDB
     CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
     
+    # Vector store backend: "chroma" (ChromaDB) or "numpy" (in-process matrix,
+    # persisted as memory-mapped .npy files under NUMPY_STORE_PATH)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    NUMPY_STORE_PATH = os.getenv("NUMPY_STORE_PATH", os.path.join(CHROMA_DB_PATH, "numpy"))
+    
+    # Index snapshot: one file with both collections, their lexical indexes
+    # and the entity documents, written by `python -m src.rag.indexer
+    # --snapshot`. When set, the API serves from it (memory-mapped) instead
+    # of VECTOR_BACKEND and data/.
+    INDEX_SNAPSHOT_PATH = os.getenv("INDEX_SNAPSHOT_PATH", "")
+    
+    # Poll interval for newly published indexes (blue/green builds via
+    # `python -m src.rag.indexer --blue-green`, a replaced snapshot, or an
+    # in-place re-index), swapped in without a restart (0 = only on
+    # POST /admin/reload)
+    INDEX_RELOAD_POLL_SECONDS = float(os.getenv("INDEX_RELOAD_POLL_SECONDS", "5"))
+    
+    # Bearer token for the /admin endpoints (empty = admin endpoints disabled)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    
+    # Precomputed /counter answers, built by `python -m src.rag.counters`
+    COUNTER_TABLE_PATH = os.getenv("COUNTER_TABLE_PATH", os.path.join(CHROMA_DB_PATH, "counters.json"))
+    
+    # Embedding model: "torch" (sentence-transformers), "onnx" (ONNX Runtime
+    # on CPU, e.g. an int8 export of EMBED_MODEL) or "ollama" (remote embed
+    # endpoint). Vectors from another model need a re-index.
+    EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+    EMBED_MODEL = os.getenv("EMBED_MODEL", "BAAI/bge-small-en-v1.5")
+    # Hugging Face repo (or local directory) with tokenizer.json and the ONNX file
+    EMBED_ONNX_MODEL = os.getenv("EMBED_ONNX_MODEL", "Xenova/bge-small-en-v1.5")
+    EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_quantized.onnx")
+    OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    # Prefixes for queries/documents (unset = the model's own, if known)
+    EMBED_QUERY_INSTRUCTION = os.getenv("EMBED_QUERY_INSTRUCTION")
+    EMBED_TEXT_INSTRUCTION = os.getenv("EMBED_TEXT_INSTRUCTION")
+    # Inference threads for the torch/onnx backends (0 = library default)
+    EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+    
+    # Indexing
+    # Embedding processes (0 = one per available core, 1 = in-process)
+    INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", "0"))
+    # Below this many nodes to embed, skip the pool (each worker loads a model)
+    INDEX_PARALLEL_MIN_NODES = int(os.getenv("INDEX_PARALLEL_MIN_NODES", "512"))
+    # Nodes per embedding call, and per bulk write to the vector store
+    INDEX_EMBED_BATCH_SIZE = int(os.getenv("INDEX_EMBED_BATCH_SIZE", "64"))
+    INDEX_INSERT_BATCH_SIZE = int(os.getenv("INDEX_INSERT_BATCH_SIZE", "1024"))
+    
+    # Retrieval
+    # Thread pool size for CPU-bound query embedding and vector search
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+    # Lookups allowed to wait for a busy worker; beyond that requests get a 503
+    RETRIEVAL_QUEUE_DEPTH = int(os.getenv("RETRIEVAL_QUEUE_DEPTH", "8"))
+    # "hybrid" fuses vector hits with the BM25 index built by the indexer
+    # (falls back to vector-only when it is missing); "vector" disables it
+    RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+    LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", os.path.join(CHROMA_DB_PATH, "lexical"))
+    # Candidates taken from each ranking before fusion
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    # Documents per collection in the team composition prompt
+    TEAM_TOP_K_HEROES = int(os.getenv("TEAM_TOP_K_HEROES", "10"))
+    TEAM_TOP_K_MAPS = int(os.getenv("TEAM_TOP_K_MAPS", "3"))
+    # Shared deadline for the concurrent per-collection lookups (0 = none)
+    RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", "15"))
+    # Query embeddings memoized by exact text (empty dir = in-memory only)
+    EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+    EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "")
+    # How hero/map knowledge reaches the final prompt:
+    #   "synthesize" - LLM summary per collection (two extra LLM calls)
+    #   "retrieve"   - raw top-k node text, single LLM call
+    RAG_CONTEXT_MODE = os.getenv("RAG_CONTEXT_MODE", "synthesize")
+    # Restrict the team composition's hero search by section/role metadata
+    RAG_METADATA_FILTERS = os.getenv("RAG_METADATA_FILTERS", "true").lower() == "true"
+    # Fetch named heroes and maps by key instead of searching for them
+    RAG_ENTITY_LOOKUP = os.getenv("RAG_ENTITY_LOOKUP", "true").lower() == "true"
+    # Final answer format: "text" (sectioned prose) or "json" (schema-constrained)
+    TEAM_OUTPUT_FORMAT = os.getenv("TEAM_OUTPUT_FORMAT", "text")
+    
+    # Send a tiny prompt at startup so the first request doesn't pay for model load
+    LLM_WARMUP = os.getenv("LLM_WARMUP", "true").lower() == "true"
+    
+    # LLM admission control
+    # Concurrent generations: a number, or per provider as "provider=n,..."
+    LLM_MAX_CONCURRENCY = os.getenv("LLM_MAX_CONCURRENCY", "ollama=2,openai=8,azure=8")
+    # Requests allowed to wait for a slot before new ones get 429
+    LLM_QUEUE_DEPTH = int(os.getenv("LLM_QUEUE_DEPTH", "8"))
+    
+    # Interval of the background dependency check served by /health
+    HEALTH_REFRESH_SECONDS = float(os.getenv("HEALTH_REFRESH_SECONDS", "5"))
+    
+    # Response cache for /suggest (empty path = in-memory only)
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "")
+    
     # Data paths
     DATA_HEROES_PATH = "./data/heroes"
     DATA_MAPS_PATH = "./data/maps"
@@ -1,10 +1,11 @@
 """Configuration for different LLM providers."""
 from typing import Literal
-from llama_index.llms.ollama import Ollama
-from llama_index.llms.openai import OpenAI
-from llama_index.llms.azure_openai import AzureOpenAI
 from llama_index.core import Settings
 import os
+from src.utils.config import config
+
+# Provider SDKs are imported inside configure_llm so that startup only pays
+# for the one that is actually selected.
 
 LLMProvider = Literal["ollama", "openai", "azure", "github"]
 
@@ -20,6 +21,8 @@ def configure_llm(provider: LLMProvider = "ollama"):
         Ollama:
             - OLLAMA_BASE_URL (default: http://localhost:11434)
             - OLLAMA_MODEL (default: mistral:7b)
+            - OLLAMA_KEEP_ALIVE (default: 30m) - how long Ollama keeps
+              the model loaded after the last request
         
         OpenAI:
             - OPENAI_API_KEY
@@ -38,18 +41,23 @@ def configure_llm(provider: LLMProvider = "ollama"):
     
     if provider == "ollama":
         # Local Ollama
+        from llama_index.llms.ollama import Ollama
+        
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         model = os.getenv("OLLAMA_MODEL", "mistral:7b")
         
         Settings.llm = Ollama(
             model=model,
             base_url=base_url,
-            request_timeout=120.0
+            request_timeout=120.0,
+            keep_alive=config.OLLAMA_KEEP_ALIVE
         )
         print(f"✓ LLM configured: Ollama ({model})")
     
     elif provider == "openai":
         # OpenAI API
+        from llama_index.llms.openai import OpenAI
+        
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable required")
@@ -66,6 +74,8 @@ def configure_llm(provider: LLMProvider = "ollama"):
     
     elif provider == "azure":
         # Azure OpenAI
+        from llama_index.llms.azure_openai import AzureOpenAI
+        
         api_key = os.getenv("AZURE_OPENAI_API_KEY")
         endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
         deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
@@ -87,6 +97,8 @@ def configure_llm(provider: LLMProvider = "ollama"):
     
     elif provider == "github":
         # GitHub Models API (compatible with OpenAI API)
+        from llama_index.llms.openai import OpenAI
+        
         github_token = os.getenv("GITHUB_TOKEN")
         if not github_token:
             raise ValueError("GITHUB_TOKEN environment variable required")
@@ -0,0 +1,57 @@
+"""Per-process memory figures from /proc (Linux)."""
+from pathlib import Path
+from typing import Dict, List, Union
+
+# smaps_rollup fields (kB) -> reported name
+_ROLLUP_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+
+def process_memory(pid: Union[int, str] = "self") -> Dict[str, int]:
+    """
+    Memory of a process in bytes.
+    
+    Args:
+        pid: Process id, or "self" for the current process
+    
+    Returns:
+        rss, pss (RSS with shared pages split between the processes sharing
+        them), shared and private bytes. Only rss is available without
+        smaps_rollup; empty dict when /proc is unavailable.
+    """
+    proc = Path("/proc") / str(pid)
+    memory = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    try:
+        with open(proc / "smaps_rollup") as f:
+            for line in f:
+                field, _, rest = line.partition(":")
+                name = _ROLLUP_FIELDS.get(field)
+                if name:
+                    memory[name] += int(rest.split()[0]) * 1024
+        return memory
+    except (OSError, ValueError, IndexError):
+        pass
+    
+    try:
+        with open(proc / "status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return {"rss": int(line.split()[1]) * 1024}
+    except (OSError, ValueError, IndexError):
+        pass
+    return {}
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (used to find gunicorn workers)."""
+    children = Path("/proc") / str(pid) / "task" / str(pid) / "children"
+    try:
+        return [int(child) for child in children.read_text().split()]
+    except OSError:
+        return []
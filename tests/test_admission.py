@@ -0,0 +1,117 @@
+"""
+Tests for LLM admission control
+"""
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.admission import (
+    PRIORITY_COUNTER,
+    PRIORITY_SUGGEST,
+    AdmissionController,
+    AdmissionRejected,
+    concurrency_for,
+)
+
+
+class TestAdmissionController:
+    """Test the bounded priority queue in front of the LLM"""
+    
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency requests run at once"""
+        admission = AdmissionController(max_concurrency=2, max_queue=10)
+        running = []
+        peak = []
+        
+        async def work():
+            async with admission.slot():
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+        
+        async def run():
+            await asyncio.gather(*[work() for _ in range(6)])
+        
+        asyncio.run(run())
+        
+        assert max(peak) == 2
+        assert admission.stats()["admitted"] == 6
+        assert admission.stats()["active"] == 0
+    
+    def test_full_queue_rejects_with_retry_after(self):
+        """Test requests beyond the queue depth are rejected immediately"""
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        
+        async def work():
+            async with admission.slot():
+                await asyncio.sleep(0.05)
+        
+        async def run():
+            return await asyncio.gather(*[work() for _ in range(3)], return_exceptions=True)
+        
+        results = asyncio.run(run())
+        rejected = [result for result in results if isinstance(result, AdmissionRejected)]
+        
+        assert len(rejected) == 1
+        assert rejected[0].retry_after >= 1
+        assert admission.stats()["rejected"] == 1
+    
+    def test_counter_requests_jump_the_queue(self):
+        """Test higher-priority waiters get the next free slot"""
+        admission = AdmissionController(max_concurrency=1, max_queue=10)
+        order = []
+        
+        async def work(name, priority):
+            async with admission.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+        
+        async def run():
+            first = asyncio.create_task(work("first", PRIORITY_SUGGEST))
+            await asyncio.sleep(0)
+            queued = [
+                asyncio.create_task(work("suggest", PRIORITY_SUGGEST)),
+                asyncio.create_task(work("counter", PRIORITY_COUNTER)),
+            ]
+            await asyncio.gather(first, *queued)
+        
+        asyncio.run(run())
+        
+        assert order == ["first", "counter", "suggest"]
+    
+    def test_cancelled_waiter_frees_queue_space(self):
+        """Test a client going away while queued does not leak a slot"""
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        
+        async def run():
+            holder = asyncio.create_task(admission.acquire())
+            await holder
+            waiter = asyncio.create_task(admission.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            admission.release()
+            
+            await asyncio.wait_for(admission.acquire(), timeout=1)
+            admission.release()
+        
+        asyncio.run(run())
+        
+        assert admission.stats()["queued"] == 0
+        assert admission.stats()["active"] == 0
+    
+    def test_concurrency_for_provider(self):
+        """Test per-provider limits and a single global number"""
+        assert concurrency_for("ollama", "ollama=2,openai=8") == 2
+        assert concurrency_for("openai", "ollama=2,openai=8") == 8
+        assert concurrency_for("azure", "ollama=2", default=3) == 3
+        assert concurrency_for("openai", "4") == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
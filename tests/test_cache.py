@@ -0,0 +1,154 @@
+"""
+Tests for the team composition response cache
+"""
+import asyncio
+import pytest
+from pathlib import Path
+import sys
+import time
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.cache import ResponseCache, canonical_request, request_cache_key
+from src.api.models import TeamCompositionRequest
+
+
+class TestCacheKey:
+    """Test request canonicalization"""
+    
+    def test_equivalent_requests_share_key(self):
+        """Test case, hero order, quotes and whitespace don't change the key"""
+        first = TeamCompositionRequest(
+            map_name="King's Row",
+            enemy_team=["Reinhardt", "Bastion", "Mercy"],
+            difficulties="Enemy has strong  bunker defense.",
+        )
+        second = TeamCompositionRequest(
+            map_name="  king’s row ",
+            enemy_team=["mercy", "BASTION", "Reinhardt"],
+            difficulties="enemy has strong bunker defense",
+        )
+        
+        assert canonical_request(first) == canonical_request(second)
+        assert request_cache_key(first) == request_cache_key(second)
+    
+    def test_different_requests_differ(self):
+        """Test enemy vs current team and namespace are part of the key"""
+        enemy = TeamCompositionRequest(map_name="Dorado", enemy_team=["Genji"])
+        current = TeamCompositionRequest(map_name="Dorado", current_team=["Genji"])
+        
+        assert request_cache_key(enemy) != request_cache_key(current)
+        assert request_cache_key(enemy, "ollama:mistral") != request_cache_key(enemy, "openai:gpt-4o")
+
+
+class TestResponseCache:
+    """Test LRU, TTL, versioning and persistence"""
+    
+    def test_hit_and_miss_counters(self):
+        """Test counters track lookups"""
+        cache = ResponseCache(max_entries=4)
+        assert cache.get("a", "v1") is None
+        cache.set("a", "v1", {"answer": 1})
+        
+        assert cache.get("a", "v1") == {"answer": 1}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted first"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "v1", {"answer": "a"})
+        cache.set("b", "v1", {"answer": "b"})
+        cache.get("a", "v1")
+        cache.set("c", "v1", {"answer": "c"})
+        
+        assert cache.get("b", "v1") is None
+        assert cache.get("a", "v1") is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_index_version_invalidates(self):
+        """Test entries computed against an older index are dropped"""
+        cache = ResponseCache()
+        cache.set("a", "v1", {"answer": 1})
+        
+        assert cache.get("a", "v2") is None
+        assert cache.get("a", "v1") is None
+        assert cache.stats()["invalidations"] == 1
+    
+    def test_drop_stale(self, tmp_path):
+        """Test a reload drops entries of other index versions, on disk too"""
+        cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+        cache.set("a", "v1", {"answer": 1})
+        cache.set("b", "v2", {"answer": 2})
+        
+        assert cache.drop_stale("v2") == 1
+        assert cache.get("b", "v2") == {"answer": 2}
+        assert cache.stats()["entries"] == 1
+        assert cache._load_from_db("a") is None
+        cache.close()
+    
+    def test_disk_table_trimmed(self, tmp_path):
+        """Test writes reach the database in the background and the table stays bounded"""
+        path = str(tmp_path / "responses.sqlite3")
+        cache = ResponseCache(max_entries=2, path=path)
+        for key in "abc":
+            cache.set(key, "v1", {"answer": key})
+        cache.flush()
+        assert cache._load_from_db("a")[1:] == ("v1", {"answer": "a"})
+        cache.close()
+        
+        reopened = ResponseCache(max_entries=2, path=path)
+        assert reopened.get("a", "v1") is None
+        assert reopened.get("c", "v1") == {"answer": "c"}
+        reopened.close()
+    
+    def test_failed_write_does_not_stop_the_writer(self, tmp_path):
+        """Test a failing queued write is dropped and later writes and flushes still complete"""
+        cache = ResponseCache(path=str(tmp_path / "responses.sqlite3"))
+        cache._write("INSERT INTO missing_table VALUES (?)", (1,))
+        cache.flush()
+        
+        cache.set("a", "v1", {"answer": 1})
+        cache.set("b", "v2", {"answer": 2})
+        assert cache.drop_stale("v2") == 1
+        assert cache._load_from_db("b")[1:] == ("v2", {"answer": 2})
+        assert cache._writer.is_alive()
+        cache.close()
+    
+    def test_aget_reads_disk_off_the_loop(self, tmp_path):
+        """Test aget() finds entries that are only on disk"""
+        path = str(tmp_path / "responses.sqlite3")
+        cache = ResponseCache(path=path)
+        cache.set("a", "v1", {"answer": 1})
+        cache.close()
+        
+        reopened = ResponseCache(path=path)
+        assert asyncio.run(reopened.aget("a", "v1")) == {"answer": 1}
+        assert asyncio.run(reopened.aget("a", "v1")) == {"answer": 1}
+        assert reopened.stats()["hits"] == 2
+        reopened.close()
+    
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL"""
+        cache = ResponseCache(ttl_seconds=0.01)
+        cache.set("a", "v1", {"answer": 1})
+        time.sleep(0.02)
+        
+        assert cache.get("a", "v1") is None
+    
+    def test_disk_persistence(self, tmp_path):
+        """Test entries survive a new cache instance on the same file"""
+        path = str(tmp_path / "responses.sqlite3")
+        cache = ResponseCache(path=path)
+        cache.set("a", "v1", {"answer": 1})
+        cache.close()
+        
+        reopened = ResponseCache(path=path)
+        assert reopened.get("a", "v1") == {"answer": 1}
+        reopened.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+"""
+Tests for the precomputed hero counter table
+"""
+import pytest
+import time
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.counters import CounterTable, hero_lookup_key
+
+
+class StubRetriever:
+    """Answers counter questions without an index or LLM, recording calls"""
+    
+    llm_model = "test-model"
+    
+    def __init__(self):
+        self.queries = []
+    
+    def query_heroes_with_sources(self, query, top_k=5, operation="query_heroes"):
+        self.queries.append(query)
+        return f"Answer to: {query}", ["ana.md"]
+
+
+@pytest.fixture
+def heroes_dir(tmp_path):
+    heroes = tmp_path / "heroes"
+    heroes.mkdir()
+    (heroes / "ana.md").write_text("# Ana\n\nSupport sniper.\n", encoding="utf-8")
+    (heroes / "soldier-76.md").write_text("# Soldier: 76\n\nHitscan.\n", encoding="utf-8")
+    return heroes
+
+
+class TestCounterTable:
+    """Test building, incremental refresh and lookup"""
+    
+    def test_lookup_key_normalization(self):
+        """Test common spellings map to the same key"""
+        assert hero_lookup_key("Soldier: 76") == hero_lookup_key("soldier-76") == hero_lookup_key("Soldier 76")
+        assert hero_lookup_key("Lúcio") == hero_lookup_key("lucio")
+        assert hero_lookup_key("D.Va") == hero_lookup_key("dva")
+    
+    def test_build_and_lookup(self, heroes_dir, tmp_path):
+        """Test every hero gets an entry that survives a reload"""
+        table = CounterTable(str(tmp_path / "counters.json"))
+        summary = table.build(StubRetriever(), heroes_path=str(heroes_dir))
+        
+        assert summary == {"generated": 2, "reused": 0, "removed": 0}
+        
+        reloaded = CounterTable(str(tmp_path / "counters.json"))
+        assert reloaded.get("soldier 76")["hero"] == "Soldier: 76"
+        assert "Ana" in reloaded.get("ANA")["counters"]
+        assert reloaded.get("Nobody") is None
+    
+    def test_only_changed_sources_are_regenerated(self, heroes_dir, tmp_path):
+        """Test a rebuild reuses entries whose source documents are unchanged"""
+        table = CounterTable(str(tmp_path / "counters.json"))
+        table.build(StubRetriever(), heroes_path=str(heroes_dir))
+        
+        retriever = StubRetriever()
+        assert table.build(retriever, heroes_path=str(heroes_dir))["reused"] == 2
+        assert retriever.queries == []
+        
+        # Every stub answer cites ana.md, Soldier's entry also cites its own file
+        (heroes_dir / "soldier-76.md").write_text("# Soldier: 76\n\nUpdated.\n", encoding="utf-8")
+        summary = table.build(retriever, heroes_path=str(heroes_dir))
+        
+        assert summary == {"generated": 1, "reused": 1, "removed": 0}
+        assert retriever.queries == [table.get("Soldier: 76")["query"]]
+    
+    def test_force_and_removed_heroes(self, heroes_dir, tmp_path):
+        """Test force regenerates all entries and deleted heroes are dropped"""
+        table = CounterTable(str(tmp_path / "counters.json"))
+        table.build(StubRetriever(), heroes_path=str(heroes_dir))
+        (heroes_dir / "ana.md").unlink()
+        
+        summary = table.build(StubRetriever(), heroes_path=str(heroes_dir), force=True)
+        
+        assert summary == {"generated": 1, "reused": 0, "removed": 1}
+        assert table.get("Ana") is None
+    
+    def test_rebuild_picked_up_after_check_interval(self, heroes_dir, tmp_path):
+        """Test lookups only look at the file again once check_interval has passed"""
+        path = str(tmp_path / "counters.json")
+        CounterTable(path).build(StubRetriever(), heroes_path=str(heroes_dir))
+        served = CounterTable(path, check_interval=0.2)
+        assert served.get("Ana") is not None
+        
+        (heroes_dir / "ana.md").unlink()
+        CounterTable(path).build(StubRetriever(), heroes_path=str(heroes_dir))
+        assert served.get("Ana") is not None
+        
+        time.sleep(0.25)
+        assert served.get("Ana") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
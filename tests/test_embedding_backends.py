@@ -0,0 +1,55 @@
+"""
+Tests for the configurable embedding backends
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.embeddings import OllamaEmbedding, create_embed_model
+
+
+class RecordingClient:
+    """Stands in for ollama.Client, returning one vector per input"""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def embed(self, model, input, keep_alive=None):
+        self.requests.append((model, list(input)))
+        return {"embeddings": [[float(len(text)), 1.0] for text in input]}
+
+
+class TestEmbeddingBackends:
+    """Test backend selection and the remote Ollama backend"""
+    
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected"""
+        with pytest.raises(ValueError, match="Unknown embedding backend"):
+            create_embed_model("tensorflow")
+    
+    def test_ollama_batches_and_instructions(self):
+        """Test documents go out in one request and queries get their prefix"""
+        model = OllamaEmbedding(
+            model_name="nomic-embed-text",
+            base_url="http://localhost:11434",
+            query_instruction="search_query: ",
+            text_instruction="search_document: ",
+        )
+        client = model._client = RecordingClient()
+        
+        vectors = model.get_text_embedding_batch(["Ana", "Genji"])
+        query_vector = model.get_query_embedding("heal")
+        
+        assert vectors == [[20.0, 1.0], [22.0, 1.0]]
+        assert query_vector == [18.0, 1.0]
+        assert client.requests == [
+            ("nomic-embed-text", ["search_document: Ana", "search_document: Genji"]),
+            ("nomic-embed-text", ["search_query: heal"]),
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
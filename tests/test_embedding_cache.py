@@ -0,0 +1,92 @@
+"""
+Tests for the query embedding cache
+"""
+import pytest
+from pathlib import Path
+import sys
+from typing import List
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core.embeddings import BaseEmbedding
+
+from src.rag.embeddings import CachedEmbedding, embedding_cache_file
+
+
+class CountingEmbedding(BaseEmbedding):
+    """Deterministic embedding that counts model calls"""
+    
+    calls: int = 0
+    
+    def _get_query_embedding(self, query: str) -> List[float]:
+        self.calls += 1
+        return [float(len(query)), float(sum(map(ord, query)) % 97)]
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+    
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_query_embedding(text)
+
+
+class TestCachedEmbedding:
+    """Test memoization, eviction and persistence"""
+    
+    def test_repeated_query_skips_model(self):
+        """Test an exact repeat is served from the cache"""
+        model = CountingEmbedding(model_name="counting")
+        cache = CachedEmbedding(model)
+        
+        first = cache.get_query_embedding("counters for Bastion")
+        second = cache.get_query_embedding("counters for Bastion")
+        
+        assert first == second
+        assert model.calls == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+    
+    def test_text_embeddings_not_cached(self):
+        """Test document embeddings always go to the model"""
+        model = CountingEmbedding(model_name="counting")
+        cache = CachedEmbedding(model)
+        
+        cache.get_text_embedding("doc")
+        cache.get_text_embedding("doc")
+        
+        assert model.calls == 2
+        assert cache.stats()["entries"] == 0
+    
+    def test_lru_eviction(self):
+        """Test the least recently used query is evicted first"""
+        cache = CachedEmbedding(CountingEmbedding(model_name="counting"), max_entries=2)
+        
+        cache.get_query_embedding("a")
+        cache.get_query_embedding("b")
+        cache.get_query_embedding("a")
+        cache.get_query_embedding("c")
+        
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        cache.get_query_embedding("a")
+        assert cache.stats()["hits"] == 2
+    
+    def test_persistence_round_trip(self, tmp_path):
+        """Test a saved cache is reloaded for the same model only"""
+        path = embedding_cache_file(str(tmp_path), "BAAI/bge-small-en-v1.5")
+        original = CachedEmbedding(CountingEmbedding(model_name="BAAI/bge-small-en-v1.5"), path=path)
+        embedding = original.get_query_embedding("Dorado")
+        original.save()
+        
+        model = CountingEmbedding(model_name="BAAI/bge-small-en-v1.5")
+        reloaded = CachedEmbedding(model, path=path)
+        assert reloaded.get_query_embedding("Dorado") == pytest.approx(embedding)
+        assert model.calls == 0
+        
+        other = CachedEmbedding(CountingEmbedding(model_name="other-model"), path=path)
+        assert other.stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
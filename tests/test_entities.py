@@ -0,0 +1,101 @@
+"""
+Tests for the hero and map entity index
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from src.rag.entities import EntityIndex
+from src.rag.retriever import RAGRetriever
+
+
+@pytest.fixture
+def entities(tmp_path):
+    """Entity index over a few generated-style markdown files"""
+    heroes = tmp_path / "heroes"
+    maps = tmp_path / "maps"
+    heroes.mkdir()
+    maps.mkdir()
+    for key, name in [("dva", "D.Va"), ("soldier-76", "Soldier: 76"), ("lucio", "Lúcio"), ("mercy", "Mercy")]:
+        (heroes / f"{key}.md").write_text(f"# {name}\n\n{name} document.\n", encoding="utf-8")
+    (maps / "kings-row.md").write_text("# King's Row\n\nKing's Row document.\n", encoding="utf-8")
+    
+    index = EntityIndex(heroes_path=str(heroes), maps_path=str(maps))
+    index.load()
+    return index
+
+
+def _node(file_name: str) -> NodeWithScore:
+    return NodeWithScore(node=TextNode(text=file_name, metadata={"file_name": file_name}), score=0.5)
+
+
+class TestEntityIndex:
+    """Test name resolution and direct fetches"""
+    
+    def test_names_and_aliases_resolve(self, entities):
+        """Test keys, display names, spelling variants and nicknames"""
+        for name in ["dva", "D.Va", "d va"]:
+            assert entities.resolve("heroes", name) == "dva"
+        for name in ["Soldier: 76", "soldier 76", "76", "soldier"]:
+            assert entities.resolve("heroes", name) == "soldier-76"
+        assert entities.resolve("heroes", "lucio") == "lucio"
+        assert entities.resolve("maps", "kings row") == "kings-row"
+        assert entities.resolve("heroes", "Genji") is None
+    
+    def test_fetch_dedupes_and_skips_unknown(self, entities):
+        """Test each known entity is fetched once, in request order"""
+        nodes = entities.fetch("heroes", ["Mercy", "Genji", "dva", "D.Va"])
+        
+        assert [node.node.metadata["file_name"] for node in nodes] == ["mercy.md", "dva.md"]
+        assert "Mercy document." in nodes[0].node.get_content()
+        assert entities.stats()["misses"] == 1
+    
+    def test_reload_only_on_change(self, entities):
+        """Test load() is a no-op until a document changes"""
+        assert entities.load() is False
+        
+        (entities.paths["heroes"] / "ana.md").write_text("# Ana\n", encoding="utf-8")
+        assert entities.load() is True
+        assert entities.resolve("heroes", "Ana") == "ana"
+    
+    def test_open_roles(self, tmp_path):
+        """Test roles already filled by the current team are closed"""
+        heroes = tmp_path / "heroes"
+        heroes.mkdir()
+        for key, role in [("winston", "Tank"), ("genji", "Damage"), ("widowmaker", "Damage"), ("ana", "Support")]:
+            (heroes / f"{key}.md").write_text(f"# {key}\n\n- **Key**: {key}\n- **Role**: {role}\n", encoding="utf-8")
+        index = EntityIndex(heroes_path=str(heroes), maps_path=str(tmp_path / "maps"))
+        index.load()
+        
+        assert index.open_roles(["Winston", "genji", "Widowmaker"]) == ["support"]
+        assert index.open_roles(["winston", "ana"]) == ["damage", "support"]
+        assert index.open_roles(["Moira"]) is None
+
+
+class TestMergeNodes:
+    """Test combining fetched documents with search hits"""
+    
+    def test_search_hits_for_fetched_files_are_dropped(self):
+        """Test fetched documents come first and aren't repeated"""
+        direct = [_node("mercy.md")]
+        searched = [_node("mercy.md"), _node("ana.md"), _node("genji.md")]
+        
+        merged = RAGRetriever._merge_nodes(direct, searched, top_k=3)
+        assert [node.node.metadata["file_name"] for node in merged] == ["mercy.md", "ana.md", "genji.md"]
+    
+    def test_search_keeps_half_the_budget(self):
+        """Test many named heroes don't crowd out counter picks"""
+        direct = [_node(f"named{i}.md") for i in range(5)]
+        searched = [_node(f"hit{i}.md") for i in range(5)]
+        
+        merged = RAGRetriever._merge_nodes(direct, searched, top_k=4)
+        assert len(merged) == 5 + 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
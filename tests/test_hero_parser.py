@@ -0,0 +1,82 @@
+"""
+Tests for the section-aware hero markdown parser
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core import Document
+from llama_index.core.schema import MetadataMode
+
+from src.rag.hero_parser import HeroMarkdownNodeParser, section_key
+
+
+HERO_MARKDOWN = """# Ana
+
+## Basic Information
+
+- **Key**: ana
+- **Name**: Ana
+- **Role**: Support
+
+## Story
+
+Ana was a founding member of Overwatch.
+
+## Abilities
+
+### Biotic Rifle
+
+![Biotic Rifle](https://example.com/ana/0.png)
+
+Heals allies and damages enemies.
+
+### Sleep Dart
+
+![Sleep Dart](https://example.com/ana/1.png)
+
+Puts an enemy to sleep.
+"""
+
+
+@pytest.fixture
+def nodes():
+    """Nodes parsed from one hero document"""
+    document = Document(text=HERO_MARKDOWN, id_="heroes/ana.md", metadata={"file_name": "ana.md"})
+    parser = HeroMarkdownNodeParser(id_func=lambda i, doc: f"{doc.doc_id}#{i}")
+    return parser.get_nodes_from_documents([document])
+
+
+class TestHeroMarkdownNodeParser:
+    """Test section splitting and node metadata"""
+    
+    def test_section_key(self):
+        """Test headings become metadata values"""
+        assert section_key("Basic Information") == "basic_information"
+        assert section_key("Abilities") == "abilities"
+    
+    def test_one_node_per_section_and_ability(self, nodes):
+        """Test sections and abilities are split, with deterministic ids"""
+        assert [node.node_id for node in nodes] == [f"heroes/ana.md#{i}" for i in range(4)]
+        assert [node.metadata["section"] for node in nodes] == [
+            "basic_information", "story", "abilities", "abilities",
+        ]
+        assert [node.metadata.get("ability") for node in nodes] == [None, None, "Biotic Rifle", "Sleep Dart"]
+        assert all(node.metadata["hero"] == "ana" and node.metadata["role"] == "support" for node in nodes)
+        assert all(node.metadata["file_name"] == "ana.md" for node in nodes)
+    
+    def test_node_text_is_self_contained(self, nodes):
+        """Test each node names its hero and headings, without icon lines"""
+        text = nodes[3].get_content()
+        
+        assert text.startswith("# Ana (support)\n## Abilities\n### Sleep Dart")
+        assert "Puts an enemy to sleep." in text
+        assert "https://" not in text
+        assert "section:" not in nodes[3].get_content(metadata_mode=MetadataMode.EMBED)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
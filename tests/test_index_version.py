@@ -0,0 +1,59 @@
+"""
+Tests for the index version marker and the active blue/green index pointer
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.index_version import (
+    UNVERSIONED,
+    active_collection_name,
+    collection_name,
+    read_active_index,
+    read_index_version,
+    write_active_index,
+    write_index_version,
+)
+from src.utils.config import config
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    """Point CHROMA_DB_PATH at an empty directory"""
+    monkeypatch.setattr(config, "CHROMA_DB_PATH", str(tmp_path))
+    return tmp_path
+
+
+class TestIndexVersion:
+    """Test version markers and the blue/green pointer"""
+    
+    def test_version_round_trip(self):
+        """Test a recorded version is read back, new or explicit"""
+        assert read_index_version() == UNVERSIONED
+        version = write_index_version()
+        assert read_index_version() == version
+        assert write_index_version("v2") == "v2"
+        assert read_index_version() == "v2"
+    
+    def test_active_index(self):
+        """Test collections resolve to the published build, or in place without one"""
+        assert read_active_index() is None
+        assert active_collection_name("heroes") == "heroes"
+        
+        write_active_index("v1", {name: collection_name(name, "v1") for name in ("heroes", "maps")})
+        assert read_active_index()["version"] == "v1"
+        assert active_collection_name("heroes") == "heroes-v1"
+        assert active_collection_name("other") == "other"
+    
+    def test_unreadable_pointer(self, index_dir):
+        """Test a corrupt pointer falls back to the in-place collections"""
+        (index_dir / "active_index.json").write_text("{not json", encoding="utf-8")
+        assert read_active_index() is None
+        assert active_collection_name("maps") == "maps"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
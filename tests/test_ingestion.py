@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.ingestion.overfast_client import OverFastClient
 from src.ingestion.markdown_gen import MarkdownGenerator
+from src.ingestion.catalog import Catalog
 
 
 class TestOverFastClient:
@@ -160,5 +161,47 @@ class TestDataFiles:
                     assert isinstance(data, dict), "JSON file should contain a dict"
 
 
+class TestCatalog:
+    """Test the in-memory hero and map catalog"""
+    
+    @pytest.fixture
+    def raw_dir(self, tmp_path):
+        (tmp_path / "hero_reinhardt.json").write_text(json.dumps({"name": "Reinhardt", "role": "tank"}))
+        (tmp_path / "hero_ana.json").write_text(json.dumps({"name": "Ana", "role": "support"}))
+        (tmp_path / "map_kings-row.json").write_text(json.dumps({
+            "name": "King's Row",
+            "gamemodes": ["hybrid"],
+            "location": "London, England"
+        }))
+        return tmp_path
+    
+    def test_load_from_raw_json(self, raw_dir):
+        """Test listings are built from raw JSON files"""
+        catalog = Catalog(raw_path=str(raw_dir))
+        assert catalog.load()
+        
+        assert catalog.heroes == [
+            {"key": "ana", "name": "Ana", "role": "support"},
+            {"key": "reinhardt", "name": "Reinhardt", "role": "tank"},
+        ]
+        assert catalog.maps[0]["name"] == "King's Row"
+        
+        body, etag = catalog.heroes_payload
+        assert json.loads(body) == catalog.heroes
+        assert etag.startswith('"')
+    
+    def test_reload_only_on_change(self, raw_dir):
+        """Test unchanged files are not re-read and changes update the ETag"""
+        catalog = Catalog(raw_path=str(raw_dir))
+        catalog.load()
+        _, etag = catalog.heroes_payload
+        assert not catalog.load()
+        
+        (raw_dir / "hero_genji.json").write_text(json.dumps({"name": "Genji", "role": "damage"}))
+        assert catalog.load()
+        assert len(catalog.heroes) == 3
+        assert catalog.heroes_payload[1] != etag
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
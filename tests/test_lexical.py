@@ -0,0 +1,76 @@
+"""
+Tests for the BM25 lexical index and rank fusion
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
+
+from src.rag.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture
+def index():
+    """BM25 index over three small hero documents"""
+    nodes = [
+        TextNode(id_="genji", text="# Genji\n\n### Deflect\n\nGenji deflects projectiles.", metadata={"file_name": "genji.md"}),
+        TextNode(id_="ana", text="# Ana\n\n### Biotic Grenade\n\nAna heals allies.", metadata={"file_name": "ana.md"}),
+        TextNode(id_="mercy", text="# Mercy\n\n### Caduceus Staff\n\nMercy heals allies.", metadata={"file_name": "mercy.md"}),
+    ]
+    return BM25Index.from_nodes(nodes)
+
+
+def _ranked(*node_ids: str):
+    return [NodeWithScore(node=TextNode(id_=node_id, text=node_id), score=1.0) for node_id in node_ids]
+
+
+class TestBM25Index:
+    """Test tokenization, ranking and persistence"""
+    
+    def test_tokenize(self):
+        """Test case, accents, stopwords and plurals are folded"""
+        assert tokenize("The Lúcio counters") == ["lucio", "counter"]
+    
+    def test_exact_term_ranks_first(self, index):
+        """Test a rare ability name finds its hero"""
+        results = index.search("Biotic Grenade", top_k=2)
+        
+        assert results[0].node.node_id == "ana"
+        assert results[0].node.metadata["file_name"] == "ana.md"
+        assert len(results) == 1
+    
+    def test_metadata_filters(self, index):
+        """Test filtered searches skip non-matching nodes"""
+        filters = MetadataFilters(filters=[MetadataFilter(key="file_name", value="mercy.md")])
+        results = index.search("heals allies", top_k=3, filters=filters)
+        
+        assert [result.node.node_id for result in results] == ["mercy"]
+    
+    def test_round_trip(self, index, tmp_path):
+        """Test a saved index scores identically after loading"""
+        path = str(tmp_path / "heroes.json")
+        index.save(path)
+        loaded = BM25Index.load(path)
+        
+        assert loaded.scores("deflect heals") == pytest.approx(index.scores("deflect heals"))
+        assert BM25Index.load(str(tmp_path / "missing.json")) is None
+
+
+class TestReciprocalRankFusion:
+    """Test merging vector and lexical rankings"""
+    
+    def test_agreement_beats_single_list(self):
+        """Test a node ranked well by both lists wins over one list's top hit"""
+        fused = reciprocal_rank_fusion([_ranked("a", "b", "c"), _ranked("b", "d")], top_k=3)
+        
+        assert [node.node.node_id for node in fused] == ["b", "a", "d"]
+        assert fused[0].score > fused[1].score
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
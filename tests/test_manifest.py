@@ -0,0 +1,50 @@
+"""
+Tests for the incremental indexing manifest
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag.manifest import IndexManifest, content_hash
+
+
+class TestIndexManifest:
+    """Test change detection and persistence"""
+    
+    def test_plan(self, tmp_path):
+        """Test documents are classified against the indexed hashes"""
+        manifest = IndexManifest(str(tmp_path / "heroes.json"), documents={
+            "heroes/ana.md": content_hash("Ana"),
+            "heroes/genji.md": content_hash("Genji"),
+            "heroes/mei.md": content_hash("Mei"),
+        })
+        
+        plan = manifest.plan({
+            "heroes/ana.md": content_hash("Ana"),
+            "heroes/genji.md": content_hash("Genji, rebalanced"),
+            "heroes/juno.md": content_hash("Juno"),
+        })
+        
+        assert plan == {
+            "added": ["heroes/juno.md"],
+            "updated": ["heroes/genji.md"],
+            "skipped": ["heroes/ana.md"],
+            "removed": ["heroes/mei.md"],
+        }
+    
+    def test_round_trip(self, tmp_path):
+        """Test a saved manifest reloads, and a missing one is empty"""
+        path = str(tmp_path / "manifests" / "maps.json")
+        IndexManifest(path, fingerprint="abc", documents={"maps/ilios.md": "123"}).save()
+        
+        loaded = IndexManifest.load(path)
+        assert loaded.fingerprint == "abc"
+        assert loaded.documents == {"maps/ilios.md": "123"}
+        assert IndexManifest.load(str(tmp_path / "missing.json")).documents == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
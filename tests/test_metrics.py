@@ -0,0 +1,50 @@
+"""Tests for the Prometheus metrics registry."""
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.metrics import MetricsRegistry
+
+
+class TestMetrics:
+    """Test metric types and text exposition."""
+    
+    def test_counter_render(self):
+        """Test counters are rendered per label set."""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_requests_total", "Requests", ["endpoint"])
+        counter.inc(endpoint="suggest")
+        counter.inc(2, endpoint="suggest")
+        
+        text = registry.render()
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{endpoint="suggest"} 3' in text
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="embed")
+        histogram.observe(0.5, stage="embed")
+        histogram.observe(5.0, stage="embed")
+        
+        text = registry.render()
+        assert 'test_seconds_bucket{stage="embed",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="embed",le="1"} 2' in text
+        assert 'test_seconds_bucket{stage="embed",le="+Inf"} 3' in text
+        assert 'test_seconds_count{stage="embed"} 3' in text
+    
+    def test_label_values_are_escaped(self):
+        """Test quotes in label values do not break the output."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("test_gauge", "Gauge", ["model"])
+        gauge.set(1, model='a"b')
+        
+        assert 'test_gauge{model="a\\"b"} 1' in registry.render()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+"""
+Tests for the team composition response parser
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json
+
+from src.api.parsing import TeamCompositionParser, is_parsed, parse_team_composition
+
+
+SAMPLE_RESPONSE = """1. RECOMMENDED TEAM (exactly 5 heroes):
+Tank: Winston - Dives past the Reinhardt shield.
+Damage: Genji - Flanks Bastion.
+Damage: Widowmaker - Picks Mercy from range.
+Support: Ana – Sleep Dart stops Reinhardt charge.
+Support: Lúcio - Speed to engage and disengage.
+
+2. COUNTER STRATEGY:
+Dive the back line and avoid the shield.
+Focus Mercy first.
+
+3. KEY SYNERGIES:
+Winston and Genji dive together.
+
+4. ALTERNATIVES:
+- D.Va (Tank): Eats Bastion damage
+- Damage: Soldier 76 - Consistent damage
+"""
+
+
+class TestParseTeamComposition:
+    """Test parsing of structured LLM responses"""
+    
+    @pytest.fixture
+    def parsed(self):
+        return parse_team_composition(SAMPLE_RESPONSE)
+    
+    def test_recommended_team(self, parsed):
+        """Test heroes, roles and reasoning are extracted"""
+        names = [hero.name for hero in parsed.recommended_team]
+        roles = [hero.role for hero in parsed.recommended_team]
+        
+        assert names == ["Winston", "Genji", "Widowmaker", "Ana", "Lúcio"]
+        assert roles == ["tank", "damage", "damage", "support", "support"]
+        assert parsed.recommended_team[3].reasoning == "Sleep Dart stops Reinhardt charge."
+    
+    def test_strategy_and_synergies(self, parsed):
+        """Test multi-line sections are joined"""
+        assert parsed.strategy == "Dive the back line and avoid the shield. Focus Mercy first."
+        assert parsed.synergies == "Winston and Genji dive together."
+    
+    def test_alternatives(self, parsed):
+        """Test both alternative formats are recognized"""
+        assert parsed.alternatives == ["D.Va", "Soldier 76"]
+    
+    def test_raw_response_kept(self, parsed):
+        """Test the full text is returned unchanged"""
+        assert parsed.raw_response == SAMPLE_RESPONSE
+    
+    def test_fallback_on_unstructured_text(self):
+        """Test placeholders when the response has no known sections"""
+        parsed = parse_team_composition("I think you should play whatever you like.")
+        
+        assert parsed.recommended_team[0].name == "Parsing failed - see raw_response"
+        assert parsed.strategy == "Check raw_response for detailed strategy"
+        assert parsed.synergies == "Check raw_response for team synergies"
+        assert parsed.alternatives == []
+
+
+class TestIncrementalParser:
+    """Test incremental parsing of streamed responses"""
+    
+    def test_events_in_order(self):
+        """Test events are emitted as each section completes"""
+        parser = TeamCompositionParser()
+        events = []
+        # Feed a few characters at a time, like streamed tokens
+        for i in range(0, len(SAMPLE_RESPONSE), 3):
+            events.extend(parser.feed(SAMPLE_RESPONSE[i:i + 3]))
+        events.extend(parser.close())
+        
+        names = [name for name, _ in events]
+        assert names == ["hero"] * 5 + ["strategy", "synergies", "alternative", "alternative"]
+        assert events[0][1] == {
+            "name": "Winston",
+            "role": "tank",
+            "reasoning": "Dives past the Reinhardt shield."
+        }
+        assert events[5][1]["text"] == "Dive the back line and avoid the shield. Focus Mercy first."
+    
+    def test_hero_emitted_before_response_ends(self):
+        """Test a hero event is available once its line is complete"""
+        parser = TeamCompositionParser()
+        parser.feed("1. RECOMMENDED TEAM:\nTank: Winston - Dive")
+        
+        assert parser.feed(" the backline.\n") == [
+            ("hero", {"name": "Winston", "role": "tank", "reasoning": "Dive the backline."})
+        ]
+    
+    def test_result_matches_batch_parser(self):
+        """Test streamed parsing builds the same response as batch parsing"""
+        parser = TeamCompositionParser()
+        for token in SAMPLE_RESPONSE.split(" "):
+            parser.feed(token + " ")
+        parser.close()
+        
+        streamed = parser.result(SAMPLE_RESPONSE)
+        assert streamed == parse_team_composition(SAMPLE_RESPONSE)
+
+
+class TestJSONOutput:
+    """Test parsing of JSON output mode responses"""
+    
+    JSON_RESPONSE = json.dumps({
+        "recommended_team": [
+            {"name": "Winston", "role": "Tank", "reasoning": "Dives past the shield."},
+            {"name": "Genji", "role": "damage", "reasoning": "Flanks Bastion."},
+        ],
+        "strategy": "Dive the back line. ",
+        "synergies": "Winston and Genji dive together.",
+        "alternatives": ["D.Va"],
+    })
+    
+    def test_valid_json_is_validated_directly(self):
+        """Test a schema-conforming answer maps straight onto the response"""
+        result = parse_team_composition(self.JSON_RESPONSE, output_format="json")
+        
+        assert is_parsed(result)
+        assert result.recommended_team[0].name == "Winston"
+        assert result.recommended_team[0].role == "tank"
+        assert result.strategy == "Dive the back line."
+        assert result.alternatives == ["D.Va"]
+        assert result.raw_response == self.JSON_RESPONSE
+    
+    def test_code_fence_is_stripped(self):
+        """Test JSON wrapped in a markdown code fence still parses"""
+        fenced = f"```json\n{self.JSON_RESPONSE}\n```"
+        
+        assert is_parsed(parse_team_composition(fenced, output_format="json"))
+    
+    def test_invalid_json_falls_back_to_text_parser(self):
+        """Test a prose answer in JSON mode is still parsed as text"""
+        result = parse_team_composition(SAMPLE_RESPONSE, output_format="json")
+        
+        assert result == parse_team_composition(SAMPLE_RESPONSE)
+    
+    def test_missing_fields_fail_cleanly(self):
+        """Test JSON missing required fields falls back to placeholders"""
+        result = parse_team_composition('{"strategy": "Dive."}', output_format="json")
+        
+        assert not is_parsed(result)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -2,13 +2,16 @@
 Tests for RAG module
 """
 import pytest
+import asyncio
+import threading
 from pathlib import Path
 import sys
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.rag.retriever import RAGRetriever
+from src.rag.retriever import RAGRetriever, RetrievalOverloaded, RetrievalTimeout
+from src.utils.config import config
 
 
 class TestRAGRetrieval:
@@ -80,6 +83,26 @@ class TestRAGRetrieval:
         response_lower = response.lower()
         assert any(word in response_lower for word in ["team", "hero", "composition", "strategy", "tank", "damage", "support"])
     
+    def test_async_query_heroes(self, rag):
+        """Test the async hero query path used by the API"""
+        response = asyncio.run(rag.aquery_heroes("What are Genji's abilities?", top_k=3))
+        
+        assert response is not None
+        assert len(response) > 0
+    
+    def test_async_team_composition(self, rag):
+        """Test the async team composition path used by the API"""
+        context = {
+            "map": "King's Row",
+            "enemy_team": ["Reinhardt", "Bastion", "Mercy"],
+            "current_team": [],
+            "difficulties": "Enemy has strong bunker defense"
+        }
+        response = asyncio.run(rag.aquery_team_composition(context))
+        
+        assert response is not None
+        assert "team" in response.lower() or "tank" in response.lower()
+    
     def test_empty_query(self, rag):
         """Test handling of empty query"""
         response = rag.query_heroes("", top_k=1)
@@ -97,6 +120,43 @@ class TestRAGRetrieval:
         assert response_10 is not None
         # Higher top_k should potentially return more information
         # (though this depends on the retrieval implementation)
+    
+    def test_concurrent_retrieval(self, rag):
+        """Test hero and map lookups fan out and each respect their top_k"""
+        lookups = {"heroes": ("Who counters Bastion?", 3), "maps": ("Dorado", 2)}
+        
+        nodes = rag._retrieve_many(lookups, "test")
+        async_nodes = asyncio.run(rag._aretrieve_many(lookups, "test"))
+        
+        for result in (nodes, async_nodes):
+            assert set(result) == {"heroes", "maps"}
+            assert 0 < len(result["heroes"]) <= 3
+            assert 0 < len(result["maps"]) <= 2
+    
+    def test_saturated_pool_sheds_load(self, rag, monkeypatch):
+        """Test lookups abandoned at the deadline keep their slot and new ones are shed"""
+        release = threading.Event()
+        monkeypatch.setattr(rag, "_retrieve", lambda *args: (release.wait(5), [])[1])
+        monkeypatch.setattr(config, "RETRIEVAL_TIMEOUT_SECONDS", 0.5)
+        lookups = {"heroes": ("Who counters Bastion?", 3), "maps": ("Dorado", 2)}
+        
+        async def burst():
+            return await asyncio.gather(
+                *[rag._aretrieve_many(lookups, "test") for _ in range(8)],
+                return_exceptions=True
+            )
+        
+        try:
+            results = asyncio.run(burst())
+            stats = rag.retrieval_stats()
+        finally:
+            release.set()
+        
+        assert all(isinstance(r, (RetrievalTimeout, RetrievalOverloaded)) for r in results)
+        assert any(isinstance(r, RetrievalOverloaded) for r in results)
+        assert stats["shed"] > 0
+        # Only lookups still running at the deadline stay in flight
+        assert stats["inflight"] == stats["abandoned"] > 0
 
 
 class TestRAGIndexing:
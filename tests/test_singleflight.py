@@ -0,0 +1,81 @@
+"""
+Tests for single-flight request coalescing
+"""
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent identical calls"""
+    
+    def test_concurrent_calls_share_result(self):
+        """Test identical concurrent calls run once and get the same object"""
+        flights = SingleFlight()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"team": ["Winston"]}
+        
+        async def run():
+            return await asyncio.gather(*[flights.do("same", compute) for _ in range(5)])
+        
+        results = asyncio.run(run())
+        
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flights.stats()["coalesced"] == 4
+        assert flights.stats()["in_flight"] == 0
+    
+    def test_different_keys_run_separately(self):
+        """Test calls with different keys are not coalesced"""
+        flights = SingleFlight()
+        
+        async def run():
+            return await asyncio.gather(
+                flights.do("a", lambda: asyncio.sleep(0.01, result="a")),
+                flights.do("b", lambda: asyncio.sleep(0.01, result="b")),
+            )
+        
+        assert asyncio.run(run()) == ["a", "b"]
+        assert flights.stats()["executions"] == 2
+    
+    def test_exception_reaches_every_waiter(self):
+        """Test a failure is raised to all coalesced callers"""
+        flights = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("LLM unavailable")
+        
+        async def run():
+            return await asyncio.gather(
+                *[flights.do("same", fail) for _ in range(3)],
+                return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+    
+    def test_sequential_calls_recompute(self):
+        """Test a finished computation is not reused by later calls"""
+        flights = SingleFlight()
+        
+        async def run():
+            await flights.do("same", lambda: asyncio.sleep(0, result=1))
+            await flights.do("same", lambda: asyncio.sleep(0, result=2))
+        
+        asyncio.run(run())
+        assert flights.stats()["executions"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
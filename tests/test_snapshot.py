@@ -0,0 +1,92 @@
+"""
+Tests for the memory-mapped index snapshot
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from src.rag.snapshot import IndexSnapshot, read_snapshot_version, write_snapshot
+from src.rag.vector_stores import NumpyVectorStore
+
+
+def _node(node_id: str, text: str, embedding) -> TextNode:
+    node = TextNode(id_=node_id, text=text, embedding=list(embedding), metadata={"file_name": f"{node_id}.md"})
+    node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=f"heroes/{node_id}.md")
+    return node
+
+
+@pytest.fixture
+def store():
+    """Heroes store with three nodes"""
+    vector_store = NumpyVectorStore()
+    vector_store.add([
+        _node("genji", "Genji deflects projectiles.", [1.0, 0.0, 0.0]),
+        _node("ana", "Ana throws a Biotic Grenade.", [0.0, 2.0, 0.0]),
+        _node("mercy", "Mercy heals allies.", [0.0, 0.0, 3.0]),
+    ])
+    return vector_store
+
+
+@pytest.fixture
+def snapshot_path(store, tmp_path):
+    """Snapshot of the store, an empty maps collection and two documents"""
+    path = str(tmp_path / "index.snapshot")
+    documents = {
+        "heroes": {"widowmaker.md": "# Widowmaker\n\n- **Role**: Damage\n"},
+        "maps": {"kings-row.md": "# King's Row\n"},
+    }
+    write_snapshot(
+        path,
+        {"heroes": store, "maps": NumpyVectorStore()},
+        documents,
+        embed_model="test-model",
+        index_version="v1",
+    )
+    return path
+
+
+class TestIndexSnapshot:
+    """Test writing, mapping and validating snapshots"""
+    
+    def test_round_trip(self, store, snapshot_path):
+        """Test the mapped collections answer like the original store"""
+        snapshot = IndexSnapshot.open(snapshot_path)
+        assert snapshot.index_version == "v1"
+        assert read_snapshot_version(snapshot_path) == "v1"
+        assert snapshot.embed_model == "test-model"
+        
+        heroes = snapshot.vector_store("heroes")
+        assert not heroes.matrix.flags.owndata
+        query = VectorStoreQuery(query_embedding=[0.1, 1.0, 0.5], similarity_top_k=3)
+        expected, result = store.query(query), heroes.query(query)
+        assert result.ids == expected.ids
+        assert result.similarities == pytest.approx(expected.similarities)
+        assert result.nodes[0].get_content() == "Ana throws a Biotic Grenade."
+        assert result.nodes[0].ref_doc_id == "heroes/ana.md"
+        
+        assert snapshot.vector_store("maps").count() == 0
+        assert snapshot.lexical_index("heroes").search("biotic grenade", top_k=2)[0].node.node_id == "ana"
+        assert snapshot.entity_index().resolve("heroes", "widow") == "widowmaker"
+    
+    def test_rejects_other_files(self, snapshot_path, tmp_path):
+        """Test foreign and truncated files are refused"""
+        other = tmp_path / "other.snapshot"
+        other.write_bytes(b"not a snapshot at all")
+        with pytest.raises(ValueError):
+            IndexSnapshot.open(str(other))
+        assert read_snapshot_version(str(other)) is None
+        
+        truncated = tmp_path / "truncated.snapshot"
+        truncated.write_bytes(Path(snapshot_path).read_bytes()[:-16])
+        with pytest.raises(ValueError):
+            IndexSnapshot.open(str(truncated))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
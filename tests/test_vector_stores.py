@@ -0,0 +1,117 @@
+"""
+Tests for the NumPy vector store backend
+"""
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import (
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+)
+
+from src.rag.vector_stores import NumpyVectorStore
+
+
+def _node(node_id: str, embedding, doc_id: str = "doc") -> TextNode:
+    node = TextNode(
+        id_=node_id,
+        text=f"text of {node_id}",
+        embedding=list(embedding),
+        metadata={"file_name": f"{doc_id}.md"},
+    )
+    node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=doc_id)
+    return node
+
+
+@pytest.fixture
+def store():
+    """Store with three orthogonal-ish unit directions"""
+    vector_store = NumpyVectorStore()
+    vector_store.add([
+        _node("a", [1.0, 0.0, 0.0], "doc1"),
+        _node("b", [0.0, 2.0, 0.0], "doc1"),
+        _node("c", [0.0, 0.0, 3.0], "doc2"),
+    ])
+    return vector_store
+
+
+class TestNumpyVectorStore:
+    """Test exact search, deletion and persistence"""
+    
+    def test_exact_top_k(self, store):
+        """Test results are ranked by cosine similarity, regardless of norm"""
+        result = store.query(VectorStoreQuery(query_embedding=[0.1, 1.0, 0.5], similarity_top_k=2))
+        
+        assert result.ids == ["b", "c"]
+        assert result.similarities[0] > result.similarities[1]
+        assert result.nodes[0].get_content() == "text of b"
+        assert result.nodes[0].metadata["file_name"] == "doc1.md"
+    
+    def test_batched_matches_single(self, store):
+        """Test query_many returns what one query at a time would"""
+        queries = [[1.0, 0.1, 0.0], [0.0, 0.1, 1.0]]
+        batched = store.query_many(queries, similarity_top_k=2)
+        
+        for query, result in zip(queries, batched):
+            single = store.query(VectorStoreQuery(query_embedding=query, similarity_top_k=2))
+            assert result.ids == single.ids
+            assert result.similarities == pytest.approx(single.similarities)
+    
+    def test_metadata_filters(self, store):
+        """Test filtered queries only rank nodes whose metadata matches"""
+        filters = MetadataFilters(filters=[MetadataFilter(key="file_name", value="doc1.md")])
+        result = store.query(VectorStoreQuery(query_embedding=[0.0, 1.0, 1.0], similarity_top_k=5, filters=filters))
+        assert result.ids == ["b", "a"]
+        
+        filters = MetadataFilters(filters=[
+            MetadataFilter(key="file_name", value=["doc2.md", "doc3.md"], operator=FilterOperator.IN),
+        ])
+        result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=5, filters=filters))
+        assert result.ids == ["c"]
+    
+    def test_delete_by_document(self, store):
+        """Test deleting a source document removes all its nodes"""
+        store.delete("doc1")
+        
+        assert store.count() == 1
+        result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=5))
+        assert result.ids == ["c"]
+    
+    def test_persist_round_trip_is_memory_mapped(self, store, tmp_path):
+        """Test a persisted store reloads as a memory-mapped matrix"""
+        path = str(tmp_path / "heroes")
+        store.persist(path)
+        
+        loaded = NumpyVectorStore.from_persist_path(path)
+        assert isinstance(loaded.matrix, np.memmap)
+        assert loaded.count() == 3
+        result = loaded.query(VectorStoreQuery(query_embedding=[0.0, 0.0, 1.0], similarity_top_k=1))
+        assert result.ids == ["c"]
+        assert result.nodes[0].get_content() == "text of c"
+    
+    def test_persist_swaps_matrix_and_nodes_together(self, store, tmp_path):
+        """Test a reader keeps a consistent pair while a smaller store replaces it"""
+        path = str(tmp_path / "heroes")
+        store.persist(path)
+        reader = NumpyVectorStore.from_persist_path(path)
+        
+        store.delete_nodes(node_ids=["a"])
+        store.persist(path)
+        
+        assert reader.count() == 3
+        assert reader.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=1)).ids == ["a"]
+        reloaded = NumpyVectorStore.from_persist_path(path)
+        assert reloaded.count() == 2
+        assert len(list(tmp_path.glob("heroes.*.npy"))) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
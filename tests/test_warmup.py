@@ -0,0 +1,87 @@
+"""
+Tests for background warmup progress tracking
+"""
+import pytest
+from pathlib import Path
+import sys
+import asyncio
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.health import HealthMonitor
+from src.api.warmup import Warmup
+
+
+class TestWarmup:
+    """Test warmup step bookkeeping"""
+    
+    def test_steps_are_timed(self):
+        """Test completed steps report done with a duration"""
+        warmup = Warmup(["indexes", "llm_warmup"])
+        
+        async def run():
+            async with warmup.step("indexes"):
+                await asyncio.sleep(0.01)
+        
+        asyncio.run(run())
+        steps = {step.name: step for step in warmup.report()}
+        
+        assert steps["indexes"].status == "done"
+        assert steps["indexes"].seconds >= 0.01
+        assert steps["llm_warmup"].status == "pending"
+        assert not warmup.done
+    
+    def test_failed_step_keeps_error(self):
+        """Test a failing step is reported and the error propagates"""
+        warmup = Warmup(["llm_warmup"])
+        
+        async def run():
+            async with warmup.step("llm_warmup"):
+                raise ConnectionError("Ollama not reachable")
+        
+        with pytest.raises(ConnectionError):
+            asyncio.run(run())
+        warmup.finish()
+        
+        step = warmup.report()[0]
+        assert step.status == "failed"
+        assert step.error == "Ollama not reachable"
+        assert warmup.done
+
+
+
+class StubRetriever:
+    """Retriever stand-in using a hosted LLM provider"""
+    
+    provider = "openai"
+    
+    def index_counts(self):
+        return {"heroes": 3, "maps": 2}
+
+
+class TestHealthMonitor:
+    """Test the periodic health snapshot"""
+    
+    def test_hosted_provider_skips_ollama(self):
+        """Test no Ollama round trips are made when a hosted LLM is configured"""
+        monitor = HealthMonitor(lambda: StubRetriever())
+        
+        async def unexpected_probe():
+            raise AssertionError("Ollama probed for a hosted provider")
+        
+        monitor._check_ollama = unexpected_probe
+        
+        async def run():
+            await monitor.refresh()
+            await monitor.close()
+        
+        asyncio.run(run())
+        
+        assert monitor.snapshot.status == "healthy"
+        assert monitor.snapshot.ollama_connected is False
+        assert monitor.snapshot.heroes_indexed == 3
+        assert monitor.llm_warm
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])